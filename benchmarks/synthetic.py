@@ -0,0 +1,58 @@
+import os
+import random
+from src.util import hash_file
+
+operators = ['+', '-', '*', '^', '&', '|']
+
+def generate_function(rng, name, statements):
+    lines = [f"int {name}(int a, int b, int values[], int size) {{", "    int result = a;"]
+
+    for index in range(statements):
+        kind = rng.randrange(4)
+        operator = rng.choice(operators)
+        if kind == 0:
+            lines.append(f"    result = result {operator} (b + {rng.randrange(100)});")
+        elif kind == 1:
+            lines += [
+                f"    for (int i{index} = 0; i{index} < size; i{index}++) {{",
+                f"        result = result {operator} values[i{index}];",
+                "    }",
+            ]
+        elif kind == 2:
+            lines += [
+                f"    if (result > {rng.randrange(1000)}) {{",
+                f"        result = result {operator} a;",
+                "    } else {",
+                f"        result = result - {rng.randrange(10)};",
+                "    }",
+            ]
+        else:
+            lines.append(f"    int local{index} = a {operator} b;")
+            lines.append(f"    result += local{index};")
+
+    lines += ["    return result;", "}"]
+    return '\n'.join(lines)
+
+def generate_source(rng, functions, statements):
+    return '\n\n'.join(generate_function(rng, f"function_{index}", statements) for index in range(functions)) + '\n'
+
+def generate_sources(sources_path, count, functions=2, statements=8, seed=0):
+    # Deterministic for a given seed, so runs are comparable between commits
+    rng = random.Random(seed)
+    os.makedirs(sources_path, exist_ok=True)
+
+    for index in range(count):
+        with open(os.path.join(sources_path, f"synthetic_{index:05}.c"), 'w') as file:
+            file.write(generate_source(rng, functions, statements))
+
+class FakePredictor:
+    # Stands in for an LLM: no network, and the same disassembly always gives
+    # the same prediction
+    def __init__(self, name="fake", functions=2, statements=8):
+        self.name = name
+        self.functions = functions
+        self.statements = statements
+
+    def generate_prediction(self, binary_path, disassembly_path):
+        rng = random.Random(hash_file(disassembly_path))
+        return generate_source(rng, self.functions, self.statements)
@@ -0,0 +1,67 @@
+import os
+import pickle
+import pytest
+import random
+import shutil
+import subprocess
+from codebleu import calc_codebleu
+from src.evaluator.codebleuevaluator import CodeBleuEvaluator
+from src.pipeline import Pipeline
+from src.r2runner import R2Runner
+from src.reporting import codebleu_create_graph, codebleu_create_latex_table
+from .synthetic import generate_source
+
+@pytest.fixture(scope="module")
+def code_pairs():
+    rng = random.Random(0)
+    references = [generate_source(rng, 2, 8) for _ in range(50)]
+    predictions = [generate_source(rng, 2, 8) for _ in range(50)]
+    return references, predictions
+
+def test_codebleu_evaluate_samples(benchmark, code_pairs):
+    references, predictions = code_pairs
+    evaluator = CodeBleuEvaluator(calc_codebleu)
+
+    table = benchmark(evaluator.evaluate_samples, references, predictions)
+
+    assert len(table) == len(references)
+
+def test_calc_codebleu_corpus(benchmark, code_pairs):
+    references, predictions = code_pairs
+
+    benchmark(calc_codebleu, references, predictions, lang="c")
+
+def test_put_code_on_single_line(benchmark):
+    pipeline = Pipeline(None, None, [], None)
+    lines = generate_source(random.Random(0), 200, 20).splitlines()
+
+    result = benchmark(pipeline.put_code_on_single_line, lines)
+
+    assert '\n' not in result
+
+@pytest.mark.skipif(shutil.which('radare2') is None, reason="radare2 is not installed")
+def test_r2_runner_spawn(benchmark):
+    runner = R2Runner(subprocess)
+    binary = os.path.join(os.path.dirname(__file__), '..', 'tests', 'sample.o')
+
+    benchmark(runner.run_str, 'i', binary)
+
+@pytest.fixture
+def corpus_results():
+    metrics = ['ngram_match_score', 'weighted_ngram_match_score', 'syntax_match_score',
+               'dataflow_match_score', 'codebleu']
+    rng = random.Random(0)
+    return {predictor: {metric: rng.random() for metric in metrics}
+            for predictor in ['OpenAI-gpt-3.5-turbo', 'OpenAI-gpt-4o', 'r2']}
+
+def test_create_graph(benchmark, tmp_path, corpus_results):
+    pkl_path = os.path.join(tmp_path, "results.pkl")
+    with open(pkl_path, 'wb') as file:
+        pickle.dump(corpus_results, file)
+
+    benchmark(codebleu_create_graph, pkl_path, os.path.join(tmp_path, "plot.png"))
+
+def test_create_latex_table(benchmark, tmp_path, corpus_results):
+    headers = ["Metric"] + list(corpus_results)
+
+    benchmark(codebleu_create_latex_table, os.path.join(tmp_path, "table.tex"), corpus_results, headers)
@@ -0,0 +1,68 @@
+import os
+import pytest
+import shutil
+import subprocess
+from codebleu import calc_codebleu
+from src.compiler.gcccompiler import GCCCompiler
+from src.disassembler.objdumpdisassembler import ObjdumpDisassembler
+from src.evaluator.codebleuevaluator import CodeBleuEvaluator
+from src.pipeline import Pipeline
+from src.resultstore import ResultStore
+from .synthetic import FakePredictor, generate_sources
+
+# Raise for the full-size run, e.g. BENCHMARK_SOURCES=1000
+source_count = int(os.environ.get('BENCHMARK_SOURCES', 50))
+
+pytestmark = pytest.mark.skipif(
+        shutil.which('gcc') is None or shutil.which('objdump') is None,
+        reason="gcc and objdump are needed for end-to-end benchmarks")
+
+@pytest.fixture(scope="module")
+def sources_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("sources")
+    generate_sources(path, source_count)
+    return str(path)
+
+def create_pipeline(sources_path, data_path):
+    pipeline = Pipeline(
+            compiler=GCCCompiler(subprocess),
+            disassembler=ObjdumpDisassembler(subprocess),
+            predictors=[FakePredictor()],
+            evaluator=CodeBleuEvaluator(calc_codebleu),
+            sources_path=sources_path,
+            data_path=data_path,
+            result_store=ResultStore(os.path.join(data_path, 'results.jsonl')))
+    pipeline.init_folders()
+    return pipeline
+
+def run_benchmark(benchmark, tmp_path, sources_path, run):
+    rounds = []
+
+    def setup():
+        data_path = os.path.join(tmp_path, f"data_{len(rounds)}")
+        rounds.append(data_path)
+        return (create_pipeline(sources_path, data_path),), {}
+
+    benchmark.extra_info['sources'] = source_count
+    benchmark.pedantic(run, setup=setup, rounds=3)
+
+def run_serial(pipeline):
+    executables = []
+    for source in pipeline.get_sources():
+        executables.append(pipeline.compile_and_disassemble(source))
+        pipeline.add_source_to_dataset(source)
+    pipeline.generate_and_save_predictions_batch(executables)
+    pipeline.evaluate()
+
+def run_parallel(pipeline):
+    pipeline.run_parallel(jobs=4)
+    pipeline.evaluate()
+
+def test_full_run_serial(benchmark, tmp_path, sources_path):
+    run_benchmark(benchmark, tmp_path, sources_path, run_serial)
+
+def test_full_run_parallel(benchmark, tmp_path, sources_path):
+    run_benchmark(benchmark, tmp_path, sources_path, run_parallel)
+
+def test_prepare_parallel(benchmark, tmp_path, sources_path):
+    run_benchmark(benchmark, tmp_path, sources_path, lambda pipeline: pipeline.prepare_parallel(jobs=4))
@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+main_path = os.path.join(os.path.dirname(__file__), '..', 'main.py')
+
+# The times depend on the machine, regressions are caught by comparing with a
+# saved baseline (--benchmark-compare-fail). That main imports none of the
+# heavy modules is tested in tests/test_registry.py.
+
+def run_main(*args):
+    # No API key on purpose, clean and prepare must not need the predictors
+    environment = {key: value for key, value in os.environ.items() if key != 'OPENAI_API_KEY'}
+    subprocess.run([sys.executable, main_path, *args], env=environment, stdout=subprocess.DEVNULL, check=True)
+
+def test_startup_help(benchmark):
+    benchmark.pedantic(run_main, args=('--help',), rounds=5)
+
+def test_startup_clean(benchmark, tmp_path):
+    benchmark.pedantic(run_main, args=('clean', '-d', str(tmp_path / 'data'), '-x', 'objdump'), rounds=5)
+
+def test_startup_prepare_empty(benchmark, tmp_path):
+    # Without sources the run is all start-up
+    sources_path = tmp_path / 'sources'
+    sources_path.mkdir()
+    benchmark.pedantic(run_main, args=('prepare', '-i', str(sources_path), '-d', str(tmp_path / 'data'),
+                                       '-x', 'objdump', '--no-cache'), rounds=5)
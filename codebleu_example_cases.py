@@ -1,7 +1,8 @@
 import os
 import pickle
 from codebleu import calc_codebleu
-from src.util import read_whole_file, codebleu_create_graph, codebleu_create_latex_table
+from src.reporting import codebleu_create_graph, codebleu_create_latex_table
+from src.util import read_whole_file
 
 if __name__ == '__main__':
     base_path = "data_codebleu_examples"
@@ -1,44 +1,61 @@
-import json
 import os
 import requests
 from pathlib import Path
+from src.dataset import Dataset, decompile_eval_record, iterate_json_array
 from src.util import create_folder_if_not_exists
 
 def download_json(url, local_path):
-    response = requests.get(url)
-    response.raise_for_status()  # Check if the request was successful
-    with open(local_path, 'w') as file:
-        json.dump(response.json(), file)
+    # Written as it arrives, the file is never held in memory as a whole
+    with requests.get(url, stream=True) as response:
+        response.raise_for_status()  # Check if the request was successful
+        with open(local_path, 'wb') as file:
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                file.write(chunk)
+
+def build_dataset(json_file_path, dataset_path):
+    # Every optimization level and the tests, for main.py --dataset
+    dataset = Dataset(dataset_path)
+    with open(json_file_path, 'r') as file:
+        count = dataset.add(decompile_eval_record(task) for task in iterate_json_array(file))
+    dataset.close()
+    print(f"Saved {count} tasks to {dataset_path}")
 
-def extract_source(json_file_path, sources_path):
+def extract_source(json_file_path, sources_path, tests_path):
 
 
     with open(json_file_path, 'r') as file:
-        data = json.load(file)
+        for task in iterate_json_array(file):
+            if task["type"] == "O0":
+                task_id = task["task_id"]
+                c_func = task["c_func"]
+                c_test = task["c_test"]
 
-    for task in data:
-        if task["type"] == "O0":
-            task_id = task["task_id"]
-            c_func = task["c_func"]
+                formatted_task_id = f"{task_id:03d}"
 
-            formatted_task_id = f"{task_id:03d}"
+                filename = f"{sources_path}/task_{formatted_task_id}.c"
 
-            filename = f"{sources_path}/task_{formatted_task_id}.c"
+                with open(filename, 'w') as c_file:
+                    c_file.write(c_func)
 
-            with open(filename, 'w') as c_file:
-                c_file.write(c_func)
+                print(f"Saved {filename}")
 
-            print(f"Saved {filename}")
+                # The test has a main that calls the function, used by --execute
+                with open(f"{tests_path}/task_{formatted_task_id}.c", 'w') as test_file:
+                    test_file.write(c_test)
 
 base_path = Path("sources") / "external" / "data_decompile_eval"
 sources_path = os.path.join(base_path, "sources")
+tests_path = os.path.join(base_path, "tests")
 
 # LLM4Decompile decompile-eval test dataset
 json_url = "https://raw.githubusercontent.com/albertan017/LLM4Decompile/main/decompile-eval/decompile-eval.json"
 json_file_path = os.path.join(base_path, "decompile-eval.json")
+dataset_path = os.path.join(base_path, "decompile-eval.sqlite")
 
 create_folder_if_not_exists(base_path)
 create_folder_if_not_exists(sources_path)
+create_folder_if_not_exists(tests_path)
 
 download_json(json_url, json_file_path)
-extract_source(json_file_path, sources_path)
+extract_source(json_file_path, sources_path, tests_path)
+build_dataset(json_file_path, dataset_path)
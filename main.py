@@ -1,19 +1,27 @@
 import argparse
+import atexit
 import os
-import pickle
 import shutil
+import socket
 import subprocess
 import sys
-from codebleu import calc_codebleu
-from src.compiler.gcccompiler import GCCCompiler
-from src.disassembler.objdumpdisassembler import ObjdumpDisassembler
-from src.disassembler.r2disassembler import R2Disassembler
-from src.predictor.r2decompilepredictor import R2DecompilePredictor
-from src.evaluator.codebleuevaluator import CodeBleuEvaluator
-from src.predictor.openaimodelpredictor import OpenAIModelPredictor
+from src.compiler.objectcache import ObjectCache
+from src.disassembler.normalizer import DisassemblyNormalizer, options as normalizer_options
+from src.predictor.cachedpredictor import create_cached_predictor
+from src.predictor.functionslicer import FunctionSlicer
+from src.predictioncache import PredictionCache
+from src.dataset import Dataset, parse_shard
+from src.distributed import PipelineTasks, collect_run, enqueue_run, wait_for_run
+from src.manifest import Manifest
+from src.artifacts import ArtifactStore
+from src.workqueue import WorkQueue, Worker
 from src.pipeline import Pipeline
-from src.r2runner import R2Runner
-from src.util import create_folder_if_not_exists, codebleu_create_graph, codebleu_create_latex_table
+from src.sweep import Sweep, SweepConfiguration
+from src.resultstore import ResultStore
+from src.tracer import Tracer, percentile, summary_headers
+from src.r2runner import R2Runner, R2SessionPool
+from src.registry import registry
+from src.util import create_folder_if_not_exists
 
 default_llm_prompt="""
 **Prompt:**
@@ -30,10 +38,21 @@ Below is a snippet of assembly code. Please reconstruct the original C code as a
 
 """
 
+# Commands that query the predictors, and the ones that score predictions
+predicting_commands = ['print', 'full-run', 'resume', 'sweep', 'worker']
+evaluating_commands = ['full-run', 'resume', 'evaluate', 'sweep', 'distribute']
+
+# Flags that belong to one process and are not taken over from the coordinator
+worker_only_args = ['command', 'queue', 'worker_name', 'lease_seconds', 'max_attempts']
+
 def run_pipeline_prepare(pipeline, args):
     for source_file in pipeline.get_sources():
         compile_disassemble_reference(pipeline, source_file)
 
+def run_pipeline_prepare_parallel(pipeline, args):
+    print(f"Compiling and disassembling with {args.jobs} jobs...")
+    pipeline.prepare_parallel(args.jobs)
+
 def run_pipeline_print(pipeline, args):
     for source_file in pipeline.get_sources():
         executable_filename = compile_disassemble_reference(pipeline, source_file)
@@ -51,14 +70,27 @@ def run_pipeline_print(pipeline, args):
         input()
 
 def run_pipeline_evaluate(pipeline, args, eval_path):
-    for source_file in pipeline.get_sources():
-        executable_filename = compile_disassemble_reference(pipeline, source_file)
-        print("Generating predictions...")
-        pipeline.generate_and_save_predictions(executable_filename, status_callback=print_prediction_status)
-        print()
+    executable_filenames = [
+        compile_disassemble_reference(pipeline, source_file)
+        for source_file in pipeline.get_sources()
+        ]
+    print("Generating predictions...")
+    pipeline.generate_and_save_predictions_batch(executable_filenames, status_callback=print_prediction_status)
+    print()
+
+    evaluate(pipeline, args, eval_path)
+
+def run_pipeline_evaluate_parallel(pipeline, args, eval_path):
+    run_pipeline_prepare_parallel(pipeline, args)
+    print(f"Generating predictions with {args.jobs} jobs...")
+    pipeline.predict_parallel(args.jobs, status_callback=print_parallel_prediction_status)
+    print()
 
     evaluate(pipeline, args, eval_path)
 
+def print_parallel_prediction_status(executable, predictor_name):
+    print(f"Done: {predictor_name} for {executable}")
+
 def print_prediction_status(status, predictor_name):
     if status == 0:
         print(f"Generating for {predictor_name}...", end='', flush=True)
@@ -67,31 +99,116 @@ def print_prediction_status(status, predictor_name):
 
 def evaluate(pipeline, args, eval_path):
     print("Evaluating...")
-    results = pipeline.evaluate()
+    samples = pipeline.evaluate_samples()
+    results = pipeline.evaluate(samples)
     print("Results:")
     for key, score in results.items():
         print("==")
         print(key)
         for score_key, score_value in score.items():
             print(f"{score_key}: {score_value:.2%}")
+        print(f"mean codebleu per sample: {pipeline.evaluator.mean_scores(samples[key])['codebleu']:.2%}")
         print("==")
 
-    # Save results to a file
-    with open(os.path.join(eval_path, args.results_pkl), 'wb') as f:
-        pickle.dump(results, f)
+    if pipeline.execution_evaluator is not None:
+        print("Recompiling and testing predictions...")
+        execution_samples, execution_results = pipeline.evaluate_execution()
+        for key, rates in execution_results.items():
+            print(f"{key}: {rates['compile_rate']:.2%} recompile, {rates['pass_rate']:.2%} pass "
+                  f"({rates['tested']} tested)")
+            samples[key] = samples[key].join(execution_samples[key])
+
+    # Per-sample scores, one row per (predictor, task)
+    registry.load('reporter', 'samples')(samples, os.path.join(eval_path, args.results_samples))
 
     # Define headers for the LaTeX table
     headers = ["Metric"] + list(results.keys())
 
-    codebleu_create_latex_table(
+    registry.load('reporter', 'latex')(
         os.path.join(eval_path, args.results_latex),
         results,
         headers)
 
-    codebleu_create_graph(
-            os.path.join(eval_path, args.results_pkl),
+    registry.load('reporter', 'graph')(
+            pipeline.result_store.path,
             os.path.join(eval_path, args.plot_filename))
 
+def print_cache_statistics(cache, predictors):
+    print("Prediction cache:")
+    for predictor in unwrap_tiers(predictors):
+        print(f"{predictor.name}: {predictor.hits} hits, {predictor.misses} misses")
+    print(f"Total: {cache.hits} hits, {cache.misses} misses, {len(cache)} entries")
+
+def unwrap_tiers(predictors):
+    # The models of a cascade are cached and streamed one by one
+    return [tier for predictor in predictors for tier in getattr(predictor, 'tiers', [predictor])]
+
+def print_stream_statistics(predictors):
+    for predictor in unwrap_tiers(predictors):
+        # Unwrap cached predictors, only cache misses were streamed
+        latencies = getattr(getattr(predictor, 'predictor', predictor), 'latencies', None)
+        if not latencies:
+            continue
+
+        first_tokens = [first_token for first_token, _ in latencies if first_token is not None] or [float('nan')]
+        totals = [total for _, total in latencies]
+        print(f"{predictor.name}: {len(latencies)} streamed requests, "
+              f"time to first token p50 {percentile(first_tokens, 0.5):.2f}s p95 {percentile(first_tokens, 0.95):.2f}s, "
+              f"total p50 {percentile(totals, 0.5):.2f}s p95 {percentile(totals, 0.95):.2f}s")
+
+def print_cascade_statistics(predictors):
+    for predictor in predictors:
+        if not callable(getattr(type(predictor), 'statistics', None)):
+            continue
+
+        rows = [[row['tier'], row['requests'], row['accepted'], f"{row['hit_rate']:.1%}",
+                 row['seconds'] / row['requests'] if row['requests'] else 0.0,
+                 row['prompt_tokens'], row['completion_tokens'],
+                 ', '.join(f"{check} {count}" for check, count in row['failed_checks'].items())]
+                for row in predictor.statistics()]
+        print(f"{predictor.name}:")
+        from tabulate import tabulate
+        print(tabulate(rows, ['tier', 'requests', 'accepted', 'hit rate', 'mean (s)', 'prompt tokens',
+                              'completion tokens', 'failed checks'], floatfmt=".3f"))
+
+def record_cascade_statistics(pipeline, predictors):
+    # Which tier answered each binary, and the totals per tier
+    for predictor in predictors:
+        if not callable(getattr(type(predictor), 'statistics', None)):
+            continue
+        for entry in predictor.history:
+            pipeline.result_store.append(entry['binary'], predictor.name, cascade=entry)
+        pipeline.result_store.append(None, predictor.name, cascade_tiers=predictor.statistics())
+
+def create_deduplicator(args):
+    # One per pipeline, the pipelines of a sweep find their groups at the same time
+    return registry.load('deduplicator', 'minhash')(
+            threshold=args.dedup_threshold,
+            rename_symbols=not args.dedup_keep_names)
+
+def print_deduplication_summary(pipeline):
+    summary = pipeline.deduplication_summary()
+    print(f"Deduplication: {summary['binaries']} binaries in {summary['groups']} groups, "
+          f"{summary['exact_duplicates']} exact and {summary['near_duplicates']} near duplicates, "
+          f"{summary['saved_requests']} predictor requests saved")
+
+def write_normalization_report(pipeline, eval_path):
+    report = pipeline.normalization_report()
+    if report.empty:
+        return
+
+    report.to_csv(os.path.join(eval_path, 'normalization.csv'), index=False)
+    raw_tokens = report['raw_tokens'].sum()
+    normalized_tokens = report['normalized_tokens'].sum()
+    print(f"Disassembly tokens: {raw_tokens} before, {normalized_tokens} after normalizing "
+          f"({1 - normalized_tokens / raw_tokens:.1%} smaller)")
+
+def print_trace_summary(tracer):
+    print("Time per stage:")
+    # Only imported for the tables, it adds to the start-up time of every command
+    from tabulate import tabulate
+    print(tabulate(tracer.summary(), summary_headers, floatfmt=".3f"))
+
 def compile_disassemble_reference(pipeline, source_file):
     print("==============")
     print(f"File: {source_file}")
@@ -105,8 +222,47 @@ def compile_disassemble_reference(pipeline, source_file):
     pipeline.add_source_to_dataset(source_file)
     return executable_filename
 
-def determine_dataset_size(sources_path):
-    if sources_path == 'sources/small_test':
+def run_distributed(pipeline, queue, args, eval_path):
+    queue.clear()
+    count = enqueue_run(queue, pipeline)
+    queue.put_config({key: value for key, value in vars(args).items() if key not in worker_only_args})
+    print(f"Enqueued {count} tasks, start workers with: python main.py worker --queue {args.queue}")
+
+    wait_for_run(queue, status_callback=print_queue_status)
+    print_queue_status(queue.counts())
+    collect_run(queue, pipeline)
+    evaluate(pipeline, args, eval_path)
+
+def run_worker(pipeline, queue, args):
+    print(f"Worker {args.worker_name} started")
+    worker = Worker(queue, PipelineTasks(pipeline).handlers(), args.worker_name)
+    worker.run(status_callback=print_worker_status)
+    print(f"Worker {args.worker_name} finished: {worker.completed} tasks done, {worker.failed} failed")
+
+def load_worker_args(args, queue):
+    config = queue.get_config()
+    if config is None:
+        print(f'Error: No run in queue {args.queue}, start one with the distribute command first')
+        sys.exit(1)
+
+    worker_args = vars(args)
+    worker_args.update({key: value for key, value in config.items() if key not in worker_only_args})
+    return argparse.Namespace(**worker_args)
+
+def print_queue_status(counts):
+    print(', '.join(f"{counts.get(status, 0)} {status}" for status in ['pending', 'leased', 'done', 'failed']))
+
+def print_worker_status(task, error):
+    if error is None:
+        print(f"Done: {task.key}")
+    else:
+        print(f"Failed (attempt {task.attempts}): {task.key}: {error}")
+
+def determine_dataset_size(sources_path, dataset_path=None, shard=None):
+    if dataset_path is not None:
+        name = os.path.splitext(os.path.basename(dataset_path))[0]
+        return name if shard is None else f"{name}_shard{shard[0]}of{shard[1]}"
+    elif sources_path == 'sources/small_test':
         return 'small'
     else:
         return 'large'
@@ -120,76 +276,346 @@ def determine_models_used(models):
 def determine_strip(strip):
     return 'strip' if strip else 'nostrip'
 
+def create_execution_evaluator(args, sources_path, data_path):
+    # Tests of a dataset are written into the data path with the sources,
+    # extract_decompile-eval.py writes them next to the sources directory
+    if args.dataset:
+        tests_path = os.path.join(data_path, 'tests')
+    else:
+        tests_path = os.path.join(os.path.dirname(os.path.normpath(sources_path)), 'tests')
+    tests_path = args.tests_path or tests_path
+    return registry.load('evaluator', 'execution')(
+            subprocess, tests_path,
+            jobs=args.execute_jobs,
+            timeout=args.execute_timeout,
+            memory_limit=args.execute_memory,
+            cpu_limit=args.execute_timeout)
+
+def determine_data_path(sources_path, models, strip, disassembler, dataset_path=None, shard=None, root='out'):
+    dataset_size = determine_dataset_size(sources_path, dataset_path, shard)
+    models_used = determine_models_used(models)
+    strip_status = determine_strip(strip)
+
+    return os.path.join(root, f"data_{dataset_size}_{models_used}_{strip_status}_{disassembler}/")
+
+def create_disassembler(name, r2_runner):
+    if name == 'objdump':
+        return registry.load('disassembler', 'objdump')(subprocess)
+    elif name == 'r2':
+        return registry.load('disassembler', 'r2')(r2_runner)
+
+    print(f'Error: Unknown disassembler {name}')
+    sys.exit(1)
+
+def create_predictors(args, r2_runner, function_slicer, artifacts):
+    if args.async_openai:
+        predictors = [
+            registry.load('predictor', 'async-openai')(
+                os.environ.get("OPENAI_API_KEY"), model, 0, args.base_prompt,
+                max_in_flight=args.max_in_flight,
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+                function_slicer=function_slicer,
+                artifacts=artifacts)
+            for model in args.models
+            ]
+    else:
+        predictors = [
+            registry.load('predictor', 'openai')(
+                os.environ.get("OPENAI_API_KEY"), model, 0, args.base_prompt, function_slicer,
+                stream=args.stream,
+                completion_token_ratio=args.completion_token_ratio,
+                max_completion_tokens=args.max_completion_tokens,
+                artifacts=artifacts)
+            for model in args.models
+            ]
+
+    if args.local_model:
+        local_url = args.local_url
+        local_name = os.path.basename(args.local_model).removesuffix('.gguf')
+        if local_url is None:
+            from src.llamacppserver import LlamaCppServer
+            local_server = LlamaCppServer(
+                    subprocess, args.local_model, args.llama_server,
+                    threads=args.local_threads,
+                    parallel=args.local_parallel,
+                    context_size=args.local_context)
+            local_url = f"{local_server.url}/v1"
+            # Only commands that query the predictors need the model loaded
+            if args.command in predicting_commands:
+                print(f"Starting llama-server for {args.local_model}...")
+                local_server.start()
+                atexit.register(local_server.close)
+        predictors += [registry.load('predictor', 'local')(
+                local_url, local_name, 0, args.base_prompt, args.local_parallel,
+                function_slicer=function_slicer, artifacts=artifacts)]
+
+    predictors += [registry.load('predictor', 'r2-decompile')(r2_runner)]
+    return predictors
+
+def create_cascade(args, predictors):
+    # create_predictors returns the -m models, then the local model and
+    # radare2 last. Free tiers go first, the -m models in the order given.
+    models = predictors[:len(args.models)]
+    local = predictors[len(args.models):-1]
+    r2 = predictors[-1:] if args.cascade_r2 else []
+
+    checks = []
+    for name in args.cascade_checks:
+        if name == 'compile':
+            checks.append(registry.load('check', name)(subprocess))
+        else:
+            checks.append(registry.load('check', name)())
+    return registry.load('predictor', 'cascade')(r2 + local + models, checks)
+
+def create_evaluator(args):
+    # Imported with the evaluator, reading the CodeBLEU version is slow
+    from src.evaluator.referencecache import ReferenceCache
+    reference_cache = ReferenceCache(None if args.no_cache else args.codebleu_cache_path)
+    calc_codebleu = registry.load('metric', 'codebleu')
+    if args.eval_jobs > 1:
+        return registry.load('evaluator', 'parallel-codebleu')(
+                calc_codebleu, reference_cache=reference_cache, jobs=args.eval_jobs)
+    return registry.load('evaluator', 'codebleu')(calc_codebleu, reference_cache=reference_cache)
+
+def run_sweep(args, root, create_pipeline, normalize):
+    configurations = [
+        SweepConfiguration(
+            sources_path,
+            strip == 'strip',
+            disassembler,
+            determine_data_path(sources_path, args.models, strip == 'strip', disassembler, args.dataset, args.shard,
+                                root))
+        for sources_path in args.sweep_sources or [args.sources_path]
+        for strip in args.sweep_strip
+        for disassembler in args.sweep_disassemblers
+        ]
+
+    def evaluate_configuration(configuration, pipeline):
+        print(f"Evaluating {configuration.data_path}...")
+        eval_path = os.path.join(configuration.data_path, 'evaluation')
+        create_folder_if_not_exists(eval_path)
+        evaluate(pipeline, args, eval_path)
+        if normalize:
+            write_normalization_report(pipeline, eval_path)
+
+    sweep = Sweep(
+            lambda configuration: create_pipeline(
+                configuration.sources_path,
+                configuration.strip,
+                configuration.disassembler,
+                configuration.data_path),
+            evaluate_configuration,
+            args.jobs)
+
+    print(f"Sweeping {len(configurations)} configurations...")
+    sweep.run(configurations, status_callback=print_sweep_status)
+
+def print_sweep_status(key):
+    print(f"Done: {' '.join(str(part) for part in key)}")
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Run pipeline commands.')
     parser.add_argument('-b', '--base-prompt', type=str, default=default_llm_prompt, help='Base prompt to send to LLMs. Use `{disassembly}` in the string where you want to place the disassembled code.')
-    parser.add_argument('-d', '--data-path', type=str, default='out/data', help='Output data directory')
+    parser.add_argument('-d', '--data-path', type=str, default=None, help='Output data directory, out/data by default. A sweep writes one directory per configuration in it, out by default')
     parser.add_argument('-a', '--auto-data-path', action='store_true', help='Generate the data path automatically from flags. This will override the -d flag.')
     parser.add_argument('-i', '--sources-path', type=str, default='sources/small_test', help='Source code input directory')
-    parser.add_argument('-r', '--results-pkl', type=str, default='results.pkl', help='Results filename')
+    parser.add_argument('-r', '--results-store', type=str, default='results.jsonl', help='Results store filename inside the data path, holds sources, predictions, timings and scores')
+    parser.add_argument('--results-samples', type=str, default='samples.csv', help='Per-sample results filename')
     parser.add_argument('-l', '--results-latex', type=str, default='table.tex', help='Results latex table filename')
     parser.add_argument('-p', '--plot-filename', type=str, default='plot.png', help='Plot graph filename')
     parser.add_argument('-m', '--models', type=str, nargs='+', default=['gpt-3.5-turbo'], help='List of model names')
+    parser.add_argument('--dataset', type=str, default=None, help='Dataset file to read the sources from instead of -i, see extract_decompile-eval.py')
+    parser.add_argument('--shard', type=parse_shard, default=None, help='Only run shard i/n of the dataset, e.g. 0/4')
+    parser.add_argument('--limit', type=int, default=None, help='Only run the first N tasks of the dataset')
+    parser.add_argument('--opt-levels', type=str, nargs='+', default=None, help='Only run dataset tasks compiled at these optimization levels, e.g. O0 O2')
+    parser.add_argument('--task-ids', type=int, nargs='+', default=None, help='Only run dataset tasks with these task ids')
     parser.add_argument('-s', '--strip', action='store_true', help='Strip the binary during compilation')
-    parser.add_argument('-x', '--disassembler', choices=['objdump', 'r2'], default='r2', help='Disassembler to run')
-    parser.add_argument('command', choices=['clean', 'prepare', 'print', 'full-run', 'evaluate'], default='full-run', help='Command to execute')
+    parser.add_argument('-x', '--disassembler', choices=registry.names('disassembler'), default='r2', help='Disassembler to run')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of sources to compile, disassemble and predict in parallel')
+    parser.add_argument('--eval-jobs', type=int, default=1, help='Number of processes used to compute CodeBLEU scores')
+    parser.add_argument('--async-openai', action='store_true', help='Send all OpenAI requests for a run as one concurrent batch')
+    parser.add_argument('--max-in-flight', type=int, default=8, help='Maximum concurrent OpenAI requests per model when using --async-openai')
+    parser.add_argument('--rpm', type=int, default=None, help='OpenAI requests per minute budget when using --async-openai')
+    parser.add_argument('--tpm', type=int, default=None, help='OpenAI tokens per minute budget when using --async-openai')
+    parser.add_argument('--cache-path', type=str, default='out/cache/predictions.sqlite', help='Prediction cache database, kept between runs')
+    parser.add_argument('--cache-size', type=int, default=1024, help='Maximum prediction cache size in MB, least recently used entries are evicted first')
+    parser.add_argument('--codebleu-cache-path', type=str, default='out/cache/codebleu', help='Directory for parsed CodeBLEU references, kept between runs')
+    parser.add_argument('--object-cache-path', type=str, default='out/cache/objects', help='Directory for compiled objects, shared between strip and nostrip runs')
+    parser.add_argument('--no-cache', action='store_true', help='Always compile, query the predictors and parse the references instead of reusing cached results')
+    parser.add_argument('--r2-sessions', action='store_true', help='Keep one radare2 process open per binary and share it between the disassembler and the decompiler')
+    parser.add_argument('--r2-max-sessions', type=int, default=8, help='Maximum number of radare2 sessions kept open with --r2-sessions')
+    parser.add_argument('--slice-functions', action='store_true', help='Send the LLMs the disassembly of the source functions only, without runtime functions and section headers')
+    parser.add_argument('--prompt-token-budget', type=int, default=None, help='With --slice-functions, split binaries whose prompt would exceed this many tokens into several requests per group of functions')
+    parser.add_argument('--normalize', action='store_true', help='Compact the disassembly before prompting: strip raw bytes, replace jump addresses with labels, drop padding and repeated headers')
+    parser.add_argument('--normalize-keep', choices=normalizer_options, nargs='+', default=[], help='Parts of the disassembly that --normalize leaves untouched')
+    parser.add_argument('--execute', action='store_true', help='Also recompile every prediction with the test of its task and run it, reporting recompile and pass rates')
+    parser.add_argument('--tests-path', type=str, default=None, help='Directory with one <task>.c test per source, defaults to tests/ next to the sources directory')
+    parser.add_argument('--execute-jobs', type=int, default=os.cpu_count(), help='Number of predictions compiled and tested in parallel')
+    parser.add_argument('--execute-timeout', type=int, default=10, help='Seconds of wall and CPU time a test may run')
+    parser.add_argument('--execute-memory', type=int, default=512, help='Address space limit of a test in MB')
+    parser.add_argument('--in-memory', action='store_true', help='Pass disassemblies and predictions between stages in memory, files are written in the background')
+    parser.add_argument('--no-persist', action='store_true', help='With --in-memory, do not write disassemblies and predictions at all, for benchmarking')
+    parser.add_argument('--trace-path', type=str, default='trace.json', help='Trace filename inside the data path, with the time and resources used by every stage')
+    parser.add_argument('--profile', action='store_true', help='Also profile every stage with cProfile, written to profiles/ inside the data path')
+    parser.add_argument('--stream', action='store_true', help='Stream OpenAI answers and stop reading at the end of the code block, not used with --async-openai')
+    parser.add_argument('--max-completion-tokens', type=int, default=None, help='With --stream, never ask for longer answers than this, defaults to the output limit of the model')
+    parser.add_argument('--completion-token-ratio', type=float, default=1.0, help='With --stream, limit answers to this many tokens per disassembly token')
+    parser.add_argument('--local-model', type=str, default=None, help='GGUF model to run locally with llama.cpp, or the model name when --local-url is set')
+    parser.add_argument('--local-url', type=str, default=None, help='OpenAI compatible URL of an already running llama.cpp server, e.g. http://localhost:8080/v1')
+    parser.add_argument('--llama-server', type=str, default='llama-server', help='llama.cpp server binary used to run --local-model')
+    parser.add_argument('--local-threads', type=int, default=None, help='CPU threads for the local model, defaults to llama.cpp\'s choice')
+    parser.add_argument('--local-parallel', type=int, default=4, help='Local model requests batched together, one server slot each')
+    parser.add_argument('--local-context', type=int, default=4096, help='Context size in tokens of every local model slot')
+    parser.add_argument('--cascade', action='store_true', help='Combine the models into one predictor that asks them one after another in the order of -m, cheapest first, and keeps the first answer that passes --cascade-checks')
+    parser.add_argument('--cascade-r2', action='store_true', help='With --cascade, try the radare2 decompiler first, it costs no tokens')
+    parser.add_argument('--cascade-checks', choices=registry.names('check'), nargs='+', default=registry.names('check'), help='Checks an answer must pass before the cascade stops asking')
+    parser.add_argument('--dedup', action='store_true', help='Ask the predictors once per group of binaries whose disassembly is the same up to addresses, registers and symbol names, or near the same')
+    parser.add_argument('--dedup-threshold', type=float, default=0.9, help='Estimated share of shared instruction sequences for --dedup to treat two binaries as near duplicates, 1.0 only groups exact duplicates')
+    parser.add_argument('--dedup-keep-names', action='store_true', help='With --dedup, copy predictions to duplicates as they are instead of renaming the functions')
+    parser.add_argument('--queue', type=str, default='out/queue.sqlite', help='Work queue shared by the distribute command and its workers, on a file system all of them can reach')
+    parser.add_argument('--worker-name', type=str, default=f'{socket.gethostname()}-{os.getpid()}', help='Name of this worker in the work queue')
+    parser.add_argument('--lease-seconds', type=int, default=120, help='Seconds a worker may go without a heartbeat before its task is handed to another worker')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Times a queued task is tried before it fails')
+    parser.add_argument('--sweep-sources', type=str, nargs='+', default=None, help='Source directories to sweep over, defaults to -i')
+    parser.add_argument('--sweep-strip', choices=['nostrip', 'strip'], nargs='+', default=['nostrip', 'strip'], help='Strip settings to sweep over')
+    parser.add_argument('--sweep-disassemblers', choices=registry.names('disassembler'), nargs='+', default=registry.names('disassembler'), help='Disassemblers to sweep over')
+    parser.add_argument('command', choices=['clean', 'prepare', 'print', 'full-run', 'resume', 'evaluate', 'sweep', 'distribute', 'worker'], default='full-run', help='Command to execute')
 
     args = parser.parse_args()
 
-    data_path = args.data_path
+    if args.no_persist and args.execute:
+        parser.error('--execute recompiles the prediction files, it can not be used with --no-persist')
+
+    # Workers run with the flags the coordinator was started with
+    queue = None
+    if args.command in ['distribute', 'worker']:
+        queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    if args.command == 'worker':
+        args = load_worker_args(args, queue)
+
+    data_path = args.data_path or 'out/data'
 
     # This is pretty specific for generating output folders to be used for the thesis report
     if args.auto_data_path:
-        dataset_size = determine_dataset_size(args.sources_path)
-        models_used = determine_models_used(args.models)
-        strip_status = determine_strip(args.strip)
-
-        data_path = f"out/data_{dataset_size}_{models_used}_{strip_status}_{args.disassembler}/"
+        data_path = determine_data_path(args.sources_path, args.models, args.strip, args.disassembler,
+                                        args.dataset, args.shard)
         print(f"Auto data path set to: {data_path}")
 
-    eval_path = os.path.join(data_path, 'evaluation')
-
-    create_folder_if_not_exists(eval_path)
-
-    r2_runner = R2Runner(subprocess)
+    # A sweep writes one data path per configuration in it, next to the trace
+    if args.command == 'sweep':
+        data_path = args.data_path or 'out'
 
-    predictors = [
-        OpenAIModelPredictor(os.environ.get("OPENAI_API_KEY"), model, 0, args.base_prompt)
-        for model in args.models
-        ] + [R2DecompilePredictor(r2_runner)]
-
-    compiler = GCCCompiler(subprocess, args.strip)
-
-    disassembler = None
+    eval_path = os.path.join(data_path, 'evaluation')
 
-    if args.disassembler == 'objdump':
-        disassembler = ObjdumpDisassembler(subprocess)
-    elif args.disassembler == 'r2':
-        disassembler = R2Disassembler(r2_runner)
+    if args.command != 'sweep':
+        create_folder_if_not_exists(eval_path)
+
+    session_pool = R2SessionPool(subprocess, max_sessions=args.r2_max_sessions) if args.r2_sessions else None
+    r2_runner = R2Runner(subprocess, session_pool=session_pool)
+
+    # Workers on other machines read the files of each other, they always
+    # go through the file system
+    artifacts = None
+    if (args.in_memory or args.no_persist) and args.command not in ['distribute', 'worker']:
+        artifacts = ArtifactStore(persist=not args.no_persist)
+
+    function_slicer = FunctionSlicer(args.prompt_token_budget, artifacts=artifacts) if args.slice_functions else None
+
+    # Loading the predictors imports the OpenAI client, clean and prepare
+    # never query them
+    predictors = []
+    if args.command not in ['clean', 'prepare']:
+        predictors = create_predictors(args, r2_runner, function_slicer, artifacts)
+
+    cache = None
+    if not args.no_cache and args.command in predicting_commands:
+        cache = PredictionCache(args.cache_path, args.cache_size * 1024 * 1024)
+        predictors = [create_cached_predictor(predictor, cache) for predictor in predictors]
+
+    # Tiers are cached one by one, an escalated binary keeps the answers of
+    # the cheaper tiers
+    if args.cascade and predictors:
+        predictors = [create_cascade(args, predictors)]
+
+    object_cache = None if args.no_cache else ObjectCache(args.object_cache_path)
+
+    # CodeBLEU loads tree-sitter, only commands that score predictions need it
+    evaluator = create_evaluator(args) if args.command in evaluating_commands else None
+
+    # Every worker writes its own trace next to the one of the coordinator
+    trace_path = args.trace_path
+    if args.command == 'worker':
+        trace_path = f"{os.path.splitext(trace_path)[0]}_{args.worker_name}.json"
+
+    tracer = Tracer(
+            os.path.join(data_path, trace_path),
+            os.path.join(data_path, 'profiles') if args.profile else None)
+
+    normalizer = None
+    if args.normalize:
+        normalizer = DisassemblyNormalizer(
+                strip_bytes='bytes' not in args.normalize_keep,
+                rebase_addresses='addresses' not in args.normalize_keep,
+                collapse_padding='padding' not in args.normalize_keep,
+                deduplicate_headers='headers' not in args.normalize_keep)
+
+    dataset = None
+    dataset_selection = None
+    if args.dataset:
+        try:
+            dataset = Dataset(args.dataset, read_only=True)
+        except FileNotFoundError as error:
+            print(f"Error: {error}")
+            sys.exit(1)
+        dataset_selection = dataset.select(args.opt_levels, args.task_ids, args.shard, args.limit)
+
+    pipelines = []
+
+    def create_pipeline(sources_path, strip, disassembler_name, pipeline_data_path):
+        pipeline = Pipeline(
+                compiler=registry.load('compiler', 'gcc')(subprocess, strip, object_cache),
+                disassembler=create_disassembler(disassembler_name, r2_runner),
+                predictors=predictors,
+                evaluator=evaluator,
+                sources_path=sources_path,
+                data_path=pipeline_data_path,
+                # Workers leave the manifest and the results to the coordinator
+                manifest=None if args.command == 'worker' else Manifest(os.path.join(pipeline_data_path, 'manifest.json')),
+                result_store=None if args.command == 'worker' else ResultStore(os.path.join(pipeline_data_path, args.results_store)),
+                tracer=tracer,
+                slice_functions=args.slice_functions,
+                normalizer=normalizer,
+                execution_evaluator=create_execution_evaluator(args, sources_path, pipeline_data_path)
+                if args.execute else None,
+                dataset=dataset_selection,
+                artifacts=artifacts,
+                deduplicator=create_deduplicator(args) if args.dedup else None)
+        pipelines.append(pipeline)
+        return pipeline
+
+    if args.command == 'sweep':
+        run_sweep(args, data_path, create_pipeline, normalizer is not None)
     else:
-        print(f'Error: Unknown disassembler {args.disassembler}')
-        sys.exit(1)
-
-    evaluator = CodeBleuEvaluator(calc_codebleu)
-
-    pipeline = Pipeline(
-            compiler=compiler,
-            disassembler=disassembler,
-            predictors=predictors,
-            evaluator=evaluator,
-            sources_path=args.sources_path,
-            data_path=data_path)
+        pipeline = create_pipeline(args.sources_path, args.strip, args.disassembler, data_path)
 
     if args.command == 'clean':
         pipeline.clean()
         if os.path.isdir(eval_path):
             shutil.rmtree(eval_path)
+        if os.path.exists(tracer.trace_path):
+            os.remove(tracer.trace_path)
+        if os.path.isdir(os.path.join(data_path, 'profiles')):
+            shutil.rmtree(os.path.join(data_path, 'profiles'))
         if os.path.isdir(data_path) and not os.listdir(data_path):
             os.rmdir(data_path)
     elif args.command == 'prepare':
         pipeline.clean()
         pipeline.init_folders()
-        run_pipeline_prepare(pipeline, args)
+        if args.jobs > 1:
+            run_pipeline_prepare_parallel(pipeline, args)
+        else:
+            run_pipeline_prepare(pipeline, args)
     elif args.command == 'print':
         pipeline.clean()
         pipeline.init_folders()
@@ -199,6 +625,67 @@ if __name__ == '__main__':
     elif args.command == 'full-run':
         pipeline.clean()
         pipeline.init_folders()
-        run_pipeline_evaluate(pipeline, args, eval_path)
-    else:
+        if args.jobs > 1:
+            run_pipeline_evaluate_parallel(pipeline, args, eval_path)
+        else:
+            run_pipeline_evaluate(pipeline, args, eval_path)
+    elif args.command == 'resume':
+        pipeline.init_folders()
+        pipeline.clean_combined_files()
+        if args.jobs > 1:
+            run_pipeline_evaluate_parallel(pipeline, args, eval_path)
+        else:
+            run_pipeline_evaluate(pipeline, args, eval_path)
+    elif args.command == 'distribute':
+        pipeline.clean()
+        pipeline.init_folders()
+        run_distributed(pipeline, queue, args, eval_path)
+    elif args.command == 'worker':
+        pipeline.init_folders()
+        run_worker(pipeline, queue, args)
+    elif args.command != 'sweep':
         print(f'Error: Unknown command {args.command}')
+
+    if normalizer is not None and args.command in ['prepare', 'full-run', 'resume']:
+        write_normalization_report(pipeline, eval_path)
+
+    if tracer.spans:
+        tracer.write()
+        print_trace_summary(tracer)
+
+    if args.stream:
+        print_stream_statistics(predictors)
+
+    for pipeline in pipelines:
+        if pipeline.duplicates is not None:
+            print_deduplication_summary(pipeline)
+
+    if args.cascade:
+        print_cascade_statistics(predictors)
+        # A sweep shares the predictor between pipelines, the binaries of
+        # its history can't be told apart
+        if len(pipelines) == 1 and pipelines[0].result_store is not None:
+            record_cascade_statistics(pipelines[0], predictors)
+
+    if cache is not None:
+        print_cache_statistics(cache, predictors)
+        cache.close()
+
+    if object_cache is not None and object_cache.hits + object_cache.misses:
+        print(f"Object cache: {object_cache.hits} hits, {object_cache.misses} misses")
+
+    if artifacts is not None:
+        artifacts.close()
+
+    for pipeline in pipelines:
+        if pipeline.manifest is not None:
+            pipeline.manifest.close()
+        if pipeline.result_store is not None:
+            pipeline.result_store.close()
+    if queue is not None:
+        queue.close()
+    r2_runner.close()
+    if evaluator is not None:
+        evaluator.close()
+    if dataset is not None:
+        dataset.close()
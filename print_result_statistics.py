@@ -1,8 +1,12 @@
 import pandas as pd
 from pathlib import Path
+from src.reporting import load_results
 
 def get_max_codebleu_score(path):
-    data = pd.read_pickle(Path("out") / path / "evaluation/results.pkl")
+    results_path = Path("out") / path / "results.jsonl"
+    if not results_path.exists():
+        results_path = Path("out") / path / "evaluation/results.pkl"
+    data = load_results(results_path)
     df = pd.DataFrame(data)
 
     if 'codebleu' in df.index:
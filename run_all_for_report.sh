@@ -11,15 +11,7 @@ fi
 
 source ./init_shell.sh
 
-source_paths=("data/sources" "data_decompile_eval/sources")
-strip_flags=("" "-s")
-disassemblers=("objdump" "r2")
-
-for source_path in "${source_paths[@]}"; do
-    for strip_flag in "${strip_flags[@]}"; do
-        for disassembler in "${disassemblers[@]}"; do
-            echo "Running with source_path=$source_path, strip_flag=$strip_flag, disassembler=$disassembler"
-            python main.py full-run -a -m gpt-3.5-turbo gpt-4o -i "$source_path" $strip_flag -x "$disassembler"
-        done
-    done
-done
+python main.py sweep -m gpt-3.5-turbo gpt-4o -j 4 \
+    --sweep-sources data/sources data_decompile_eval/sources \
+    --sweep-strip nostrip strip \
+    --sweep-disassemblers objdump r2
@@ -0,0 +1,97 @@
+import os
+import queue
+import threading
+from .util import hash_file, hash_text, read_whole_file
+
+class ArtifactStore:
+    # Keeps the text outputs of the stages in memory so the next stage does
+    # not read them back from disk. Files are written by a background thread,
+    # or not at all when persist is off.
+    def __init__(self, persist=True):
+        self.persist = persist
+        self.artifacts = {}
+        self.lock = threading.Lock()
+        self.writes = queue.Queue()
+        self.error = None
+        self.writer = None
+        if persist:
+            self.writer = threading.Thread(target=self.write_files, daemon=True)
+            self.writer.start()
+
+    def put(self, path, text):
+        with self.lock:
+            self.artifacts[path] = text
+        if self.persist:
+            self.writes.put((path, text, None))
+
+    def when_written(self, callback):
+        # Runs callback on the writer thread once every file put so far is on
+        # disk, or never if one of them could not be written
+        if self.persist:
+            self.writes.put((None, None, callback))
+        else:
+            callback()
+
+    def read(self, path):
+        with self.lock:
+            text = self.artifacts.get(path)
+        if text is None:
+            return read_whole_file(path)
+        return text
+
+    def exists(self, path):
+        with self.lock:
+            if path in self.artifacts:
+                return True
+        return os.path.exists(path)
+
+    def hash(self, path):
+        # Same hash as hash_file, so the manifest does not depend on where
+        # the text came from
+        with self.lock:
+            text = self.artifacts.get(path)
+        if text is None:
+            return hash_file(path)
+        return hash_text(text)
+
+    def write_files(self):
+        while True:
+            path, text, callback = self.writes.get()
+            try:
+                if path is not None:
+                    write_file(path, text)
+                elif callback is not None and self.error is None:
+                    callback()
+            except Exception as error:
+                self.error = error
+            finally:
+                self.writes.task_done()
+            if path is None and callback is None:
+                return
+
+    def flush(self):
+        # Blocks until every file put so far is on disk
+        if self.persist:
+            self.writes.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def close(self):
+        if self.writer is not None:
+            self.writes.put((None, None, None))
+            self.writer.join()
+            self.writer = None
+        self.flush()
+
+def write_file(path, text):
+    # Replaced in one step, a reader never sees half a file
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'w') as file:
+        file.write(text)
+    os.replace(temporary_path, path)
+
+def read_artifact(artifacts, path):
+    if artifacts is None:
+        return read_whole_file(path)
+    return artifacts.read(path)
@@ -1,10 +1,48 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from ..util import hash_file, hash_text
+
 class GCCCompiler:
-    def __init__(self, subprocess, should_strip=False):
+    def __init__(self, subprocess, should_strip=False, object_cache=None):
         self.subprocess = subprocess
         self.should_strip = should_strip
+        self.object_cache = object_cache
+        self.name = "gcc-strip" if should_strip else "gcc"
+        self.version = None
 
     def compile(self, source_path, output_path):
-        self.subprocess.run(['gcc', '-c', '-o', output_path, source_path], check=True)
+        if self.object_cache is None:
+            self.run_gcc(source_path, output_path)
+        else:
+            key = self.cache_key(source_path)
+            if not self.object_cache.get(key, output_path):
+                self.run_gcc(source_path, output_path)
+                self.object_cache.put(key, output_path)
 
+        # Only the unstripped object is cached, stripping works on the copy
         if self.should_strip:
             self.subprocess.run(["strip", output_path], check=True)
+
+    def run_gcc(self, source_path, output_path):
+        self.subprocess.run(['gcc', '-c', '-o', output_path, source_path], check=True)
+
+    def compile_many(self, source_output_paths, jobs=None):
+        # gcc and strip run as child processes, so threads are enough to keep
+        # several of them busy at once
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(lambda paths: self.compile(*paths), source_output_paths))
+
+    def get_version(self):
+        if self.version is None:
+            result = self.subprocess.run(['gcc', '--version'], stdout=self.subprocess.PIPE, text=True, check=True)
+            self.version = result.stdout.split('\n')[0]
+        return self.version
+
+    def cache_key(self, source_path):
+        # gcc stores the source file name in the object, so it is part of the key
+        return hash_text('|'.join([
+            self.get_version(),
+            '-c',
+            os.path.basename(source_path),
+            hash_file(source_path),
+        ]))
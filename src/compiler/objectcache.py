@@ -0,0 +1,35 @@
+import os
+import shutil
+import threading
+
+class ObjectCache:
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_file_path(self, key):
+        return os.path.join(self.cache_path, key[:2], f'{key}.o')
+
+    def get(self, key, output_path):
+        try:
+            shutil.copyfile(self.get_file_path(key), output_path)
+        except FileNotFoundError:
+            with self.lock:
+                self.misses += 1
+            return False
+
+        with self.lock:
+            self.hits += 1
+        return True
+
+    def put(self, key, object_path):
+        file_path = self.get_file_path(key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # Copy next to the final name first so concurrent compiles of the
+        # same source never expose a half written object
+        temporary_path = f'{file_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        shutil.copyfile(object_path, temporary_path)
+        os.replace(temporary_path, file_path)
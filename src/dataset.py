@@ -0,0 +1,186 @@
+import json
+import os
+import sqlite3
+import threading
+
+class DatasetRecord:
+    def __init__(self, name, task_id, opt, source, test=None, metadata=None):
+        self.name = name
+        self.task_id = task_id
+        self.opt = opt
+        self.source = source
+        self.test = test
+        self.metadata = metadata or {}
+
+class Dataset:
+    # All tasks of a dataset in one SQLite file, indexed on the columns the
+    # selections filter on. Runs read the dataset with read_only, from any
+    # thread, while only the extraction script writes it.
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.lock = threading.Lock()
+
+        if read_only:
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"Dataset {path} does not exist")
+            self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                name TEXT PRIMARY KEY,
+                task_id INTEGER,
+                opt TEXT,
+                source TEXT NOT NULL,
+                test TEXT,
+                metadata TEXT NOT NULL
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS tasks_task_id ON tasks (task_id)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS tasks_opt ON tasks (opt)")
+        self.connection.commit()
+
+    def add(self, records, batch_size=500):
+        count = 0
+        batch = []
+        for record in records:
+            batch.append((record.name, record.task_id, record.opt, record.source, record.test,
+                          json.dumps(record.metadata)))
+            if len(batch) >= batch_size:
+                count += self.insert(batch)
+                batch = []
+        count += self.insert(batch)
+        return count
+
+    def insert(self, rows):
+        with self.lock:
+            self.connection.executemany("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.connection.commit()
+        return len(rows)
+
+    def query(self, sql, parameters=()):
+        # One connection is shared by the threads of a run
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def __len__(self):
+        return self.query("SELECT COUNT(*) FROM tasks")[0][0]
+
+    def opt_levels(self):
+        return [row[0] for row in self.query("SELECT DISTINCT opt FROM tasks ORDER BY opt")]
+
+    def select(self, opt_levels=None, task_ids=None, shard=None, limit=None):
+        return DatasetSelection(self, opt_levels, task_ids, shard, limit)
+
+    def names(self, opt_levels=None, task_ids=None):
+        query = "SELECT name FROM tasks"
+        conditions = []
+        parameters = []
+        if opt_levels:
+            conditions.append(f"opt IN ({', '.join('?' * len(opt_levels))})")
+            parameters += opt_levels
+        if task_ids:
+            conditions.append(f"task_id IN ({', '.join('?' * len(task_ids))})")
+            parameters += task_ids
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        return [row[0] for row in self.query(query + " ORDER BY name", parameters)]
+
+    def get(self, name):
+        rows = self.query(
+            "SELECT name, task_id, opt, source, test, metadata FROM tasks WHERE name = ?", (name,))
+        if not rows:
+            raise KeyError(name)
+        row = rows[0]
+        return DatasetRecord(*row[:5], json.loads(row[5]))
+
+    def close(self):
+        self.connection.close()
+
+class DatasetSelection:
+    def __init__(self, dataset, opt_levels=None, task_ids=None, shard=None, limit=None):
+        self.dataset = dataset
+        self.opt_levels = opt_levels
+        self.task_ids = task_ids
+        self.shard = shard
+        self.limit = limit
+
+    def names(self):
+        names = self.dataset.names(self.opt_levels, self.task_ids)
+        # Every n-th task, so all shards get a mix of task ids and opt levels
+        if self.shard is not None:
+            index, count = self.shard
+            names = names[index::count]
+        if self.limit is not None:
+            names = names[:self.limit]
+        return names
+
+    def __iter__(self):
+        # Only the names are kept in memory, records are read one at a time
+        for name in self.names():
+            yield self.dataset.get(name)
+
+def parse_shard(text):
+    # "i/n" selects shard i, counting from 0, of n
+    try:
+        index, count = [int(part) for part in text.split('/')]
+    except ValueError:
+        raise ValueError(f"Invalid shard {text}, expected i/n")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {text}, i must be between 0 and n - 1")
+    return index, count
+
+def iterate_json_array(file, chunk_size=1 << 16):
+    # Yields the items of a top level JSON array without loading the whole
+    # file, reading chunk_size characters at a time
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+
+    while True:
+        chunk = file.read(chunk_size)
+        buffer += chunk
+
+        while True:
+            buffer = buffer.lstrip()
+            if not started:
+                if not buffer:
+                    break
+                if buffer[0] != '[':
+                    raise ValueError("Expected a JSON array")
+                buffer = buffer[1:]
+                started = True
+            elif buffer.startswith(','):
+                buffer = buffer[1:]
+            elif buffer.startswith(']'):
+                return
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    break
+                # A number at the end of the buffer may continue in the next chunk
+                if end == len(buffer) and chunk:
+                    break
+                yield item
+                buffer = buffer[end:]
+
+        if not chunk:
+            raise ValueError("Unexpected end of JSON array")
+
+def decompile_eval_record(item):
+    # decompile-eval has one item per task and optimization level
+    metadata = {key: value for key, value in item.items() if key not in ['task_id', 'type', 'c_func', 'c_test']}
+    return DatasetRecord(
+            f"task_{item['task_id']:03d}_{item['type']}",
+            item['task_id'],
+            item['type'],
+            item['c_func'],
+            item.get('c_test'),
+            metadata)
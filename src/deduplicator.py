@@ -0,0 +1,144 @@
+import hashlib
+import re
+import numpy as np
+from .disassembler.normalizer import DisassemblyNormalizer
+
+# x86-64 register names, with and without the AT&T % prefix
+register_names = (
+    [f'r{name}' for name in ['ax', 'bx', 'cx', 'dx', 'si', 'di', 'bp', 'sp', 'ip']] +
+    [f'e{name}' for name in ['ax', 'bx', 'cx', 'dx', 'si', 'di', 'bp', 'sp', 'ip']] +
+    ['ax', 'bx', 'cx', 'dx', 'si', 'di', 'bp', 'sp', 'al', 'bl', 'cl', 'dl', 'ah', 'bh', 'ch', 'dh',
+     'sil', 'dil', 'bpl', 'spl'] +
+    [f'r{number}{suffix}' for number in range(8, 16) for suffix in ['', 'd', 'w', 'b']] +
+    [f'{kind}mm{number}' for kind in ['x', 'y'] for number in range(16)]
+)
+register_pattern = re.compile(r'%?\b(' + '|'.join(sorted(register_names, key=len, reverse=True)) + r')\b')
+symbol_pattern = re.compile(r'<([^>+]+)(\+0x[0-9a-f]+)?>|\b((?:sym|fcn|reloc|obj)\.[\w.]+)')
+function_header = re.compile(r'^(\S+):$')
+# Hashes and permutations are below 2^31, their products fit in 64 bits
+mersenne_prime = (1 << 31) - 1
+
+class CanonicalDisassembly:
+    def __init__(self, lines, symbols):
+        self.lines = lines
+        self.symbols = symbols
+        self.key = hashlib.sha256('\n'.join(lines).encode('utf-8')).hexdigest()
+
+class DisassemblyDeduplicator:
+    # Groups binaries whose disassembly only differs in addresses, register
+    # allocation or symbol names, so the predictors are asked once per group.
+    # Exact duplicates share a canonical form, near duplicates are found
+    # with MinHash signatures in an LSH index.
+    def __init__(self, threshold=0.9, permutations=64, bands=16, shingle_size=3, rename_symbols=True, seed=1):
+        if permutations % bands != 0:
+            raise ValueError("permutations must be a multiple of bands")
+
+        self.threshold = threshold
+        self.permutations = permutations
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.rename_symbols = rename_symbols
+        self.normalizer = DisassemblyNormalizer()
+        self.name = f"dedup[{threshold}]" if rename_symbols else f"dedup[{threshold},keep-names]"
+
+        random = np.random.RandomState(seed)
+        self.a = random.randint(1, mersenne_prime, size=permutations, dtype=np.uint64)
+        self.b = random.randint(0, mersenne_prime, size=permutations, dtype=np.uint64)
+
+    def canonicalize(self, text):
+        # Registers and symbols are numbered in the order they are first
+        # used, registers per function. The symbols are kept to rename
+        # predictions with.
+        symbols = []
+        registers = []
+        lines = []
+        for line in self.normalizer.normalize(text).splitlines():
+            line = line.split('#')[0].strip()
+            if not line or line.startswith('Disassembly of section'):
+                continue
+
+            header = function_header.match(line)
+            if header:
+                lines.append(f'function {symbol_index(symbols, header.group(1))}:')
+                registers = []
+                continue
+
+            line = register_pattern.sub(lambda match: f'R{symbol_index(registers, match.group(1))}', line)
+            line = symbol_pattern.sub(lambda match: f'<S{symbol_index(symbols, match.group(1) or match.group(3))}>',
+                                      line)
+            lines.append(' '.join(line.split()))
+        return CanonicalDisassembly(lines, symbols)
+
+    def signature(self, lines):
+        shingles = {'\n'.join(lines[start:start + self.shingle_size])
+                    for start in range(max(1, len(lines) - self.shingle_size + 1))}
+        hashes = np.array([int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+                           % mersenne_prime for shingle in shingles], dtype=np.uint64)
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % mersenne_prime).min(axis=1)
+
+    def similarity(self, signature, other):
+        return float(np.mean(signature == other))
+
+    def find_duplicates(self, disassemblies):
+        # disassemblies maps names to disassembly text. Every duplicate is
+        # matched to a representative, the first binary of its group, that
+        # it is at least threshold similar to.
+        rows = self.permutations // self.bands
+        exact = {}
+        buckets = {}
+        signatures = {}
+        canonical = {}
+        duplicates = {}
+
+        for name, text in disassemblies.items():
+            canonical[name] = self.canonicalize(text)
+            key = canonical[name].key
+            if key in exact:
+                duplicates[name] = Duplicate(exact[key], 1.0, self.symbol_map(canonical[exact[key]], canonical[name]))
+                continue
+
+            signature = self.signature(canonical[name].lines)
+            band_keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+            best = None
+            for band_key in band_keys:
+                for candidate in buckets.get(band_key, []):
+                    similarity = self.similarity(signature, signatures[candidate])
+                    if similarity >= self.threshold and (best is None or similarity > best[1]):
+                        best = (candidate, similarity)
+            if best is not None:
+                duplicates[name] = Duplicate(best[0], best[1], self.symbol_map(canonical[best[0]], canonical[name]))
+                continue
+
+            exact[key] = name
+            signatures[name] = signature
+            for band_key in band_keys:
+                buckets.setdefault(band_key, []).append(name)
+
+        return duplicates
+
+    def symbol_map(self, representative, duplicate):
+        if not self.rename_symbols:
+            return {}
+        return {source: target for source, target in zip(representative.symbols, duplicate.symbols)
+                if source != target}
+
+    def rename(self, prediction, symbol_map):
+        # One pass, so swapped names are not renamed twice
+        names = [name.removeprefix('sym.') for name in symbol_map]
+        targets = {name.removeprefix('sym.'): target.removeprefix('sym.') for name, target in symbol_map.items()}
+        if not names:
+            return prediction
+        pattern = re.compile(r'\b(' + '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True)) + r')\b')
+        return pattern.sub(lambda match: targets[match.group(1)], prediction)
+
+class Duplicate:
+    def __init__(self, representative, similarity, symbol_map):
+        self.representative = representative
+        self.similarity = similarity
+        self.symbol_map = symbol_map
+
+def symbol_index(symbols, name):
+    if name not in symbols:
+        symbols.append(name)
+    return symbols.index(name)
@@ -0,0 +1,85 @@
+import json
+import re
+
+objdump_function_pattern = re.compile(r'^([0-9a-f]+) <(.+)>:$')
+objdump_instruction_pattern = re.compile(r'^\s*[0-9a-f]+:\t((?:[0-9a-f]{2} )+)')
+
+# Compiler and linker generated functions that say nothing about the source
+runtime_functions = {
+    '_init', '_start', '_fini', 'deregister_tm_clones', 'register_tm_clones',
+    '__do_global_dtors_aux', 'frame_dummy', 'entry0', 'entry.init0', 'entry.fini0',
+}
+
+class DisassembledFunction:
+    def __init__(self, name, address, size, instructions):
+        self.name = name
+        self.address = address
+        self.size = size
+        self.instructions = instructions
+
+    def to_text(self):
+        return '\n'.join([f'{self.address:016x} <{self.name}>:'] + self.instructions)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'address': self.address,
+            'size': self.size,
+            'instructions': self.instructions,
+        }
+
+    def is_runtime(self):
+        name = self.name.removeprefix('sym.')
+        return name in runtime_functions or self.name.startswith('sym.imp.') or name.startswith('__')
+
+def functions_path(disassembly_path):
+    # The functions of foo_d.txt are stored next to it in foo_f.json
+    return re.sub(r'(_d)?\.txt$', '', disassembly_path) + '_f.json'
+
+def save_functions(path, functions):
+    with open(path, 'w') as file:
+        json.dump([function.to_dict() for function in functions], file, indent=1)
+
+def load_functions(path):
+    with open(path, 'r') as file:
+        return [DisassembledFunction(**function) for function in json.load(file)]
+
+def parse_objdump(text):
+    functions = []
+    function = None
+
+    for line in text.splitlines():
+        header = objdump_function_pattern.match(line)
+        if header:
+            function = DisassembledFunction(header.group(2), int(header.group(1), 16), 0, [])
+            functions.append(function)
+            continue
+
+        if function is None or not line.strip():
+            continue
+
+        if line.startswith('Disassembly of section'):
+            function = None
+            continue
+
+        function.instructions.append(line.rstrip())
+        instruction = objdump_instruction_pattern.match(line)
+        if instruction:
+            function.size += len(instruction.group(1).split())
+
+    return functions
+
+def parse_r2_functions(output):
+    # `pdfj @@F` prints one JSON object per function
+    functions = []
+    for line in output.splitlines():
+        line = line.strip()
+        if not line.startswith('{'):
+            continue
+
+        function = json.loads(line)
+        # Same columns as `pd`: address, bytes, instruction
+        instructions = [f"0x{op['offset']:x}  {op.get('bytes', '')}  {op.get('disasm', 'invalid')}"
+                        for op in function.get('ops', [])]
+        functions.append(DisassembledFunction(function['name'], function['addr'], function['size'], instructions))
+    return functions
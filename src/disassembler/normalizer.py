@@ -0,0 +1,143 @@
+import re
+from .disassembledfunction import DisassembledFunction
+
+objdump_file_header = re.compile(r'^\S.*:\s+file format \S+$')
+objdump_function_header = re.compile(r'^[0-9a-f]+ <(.+)>:$')
+objdump_instruction = re.compile(r'^\s*([0-9a-f]+):\t((?:[0-9a-f]{2} ?)+)\s*(?:\t(.*))?$')
+objdump_reference = re.compile(r'\b([0-9a-f]+) (<[^>]+>)')
+# radare2 prefixes lines with box drawing for the function and jump arrows
+r2_instruction = re.compile(r'^([^0-9a-zA-Z;]*)(0x[0-9a-f]+)\s+([0-9a-f]{2,})\s+(\S.*)$')
+r2_xref = re.compile(r'^[^0-9a-zA-Z;]*; (CODE|DATA|CALL) XREFS? ')
+r2_reference = re.compile(r'\b0x([0-9a-f]+)\b')
+padding_instructions = re.compile(r'^(nop[wl]?|xchg\s+%ax,%ax|data16\b.*|cs nopw\b.*|int3)(\s|$)')
+
+options = ['bytes', 'addresses', 'padding', 'headers']
+
+class Instruction:
+    def __init__(self, address, text):
+        self.address = address
+        self.text = text
+
+class DisassemblyNormalizer:
+    def __init__(self, strip_bytes=True, rebase_addresses=True, collapse_padding=True, deduplicate_headers=True):
+        self.strip_bytes = strip_bytes
+        self.rebase_addresses = rebase_addresses
+        self.collapse_padding = collapse_padding
+        self.deduplicate_headers = deduplicate_headers
+
+        enabled = [option for option, flag in zip(options, [strip_bytes, rebase_addresses, collapse_padding,
+                                                           deduplicate_headers]) if flag]
+        self.name = f"normalize[{','.join(enabled)}]"
+
+    def normalize(self, text):
+        return '\n'.join(self.normalize_lines(text.splitlines())) + '\n'
+
+    def normalize_function(self, function):
+        return DisassembledFunction(function.name, function.address, function.size,
+                                    self.normalize_lines(function.instructions))
+
+    def normalize_lines(self, lines):
+        # Instructions are grouped per function so labels can be numbered and
+        # resolved within the function they belong to
+        output = []
+        block = []
+        seen_headers = set()
+        # Label numbers keep counting across functions so every label is unique
+        next_label = 0
+
+        for line in lines:
+            instruction = self.parse_instruction(line)
+            if instruction is not None:
+                block.append(instruction)
+                continue
+
+            if objdump_instruction.match(line):
+                # Raw bytes of a long instruction wrapped onto their own line
+                if not self.strip_bytes:
+                    block.append(Instruction(None, line.rstrip()))
+                continue
+
+            lines, next_label = self.finish_block(block, next_label)
+            output += lines
+            block = []
+
+            header = self.normalize_header(line, seen_headers)
+            if header is not None:
+                output.append(header)
+
+        lines, next_label = self.finish_block(block, next_label)
+        return output + lines
+
+    def parse_instruction(self, line):
+        match = objdump_instruction.match(line)
+        if match and match.group(3) is not None:
+            text = re.sub(r'\s+', ' ', match.group(3).strip()) if self.strip_bytes else line.rstrip()
+            return Instruction(int(match.group(1), 16), text)
+
+        match = r2_instruction.match(line)
+        if match:
+            text = re.sub(r'\s{2,}', '  ', match.group(4).strip()) if self.strip_bytes else line.rstrip()
+            return Instruction(int(match.group(2), 16), text)
+
+        return None
+
+    def normalize_header(self, line, seen_headers):
+        stripped = line.strip()
+        if not stripped:
+            return None
+
+        if self.deduplicate_headers:
+            if objdump_file_header.match(stripped) or r2_xref.match(line):
+                return None
+            if stripped.startswith('Disassembly of section'):
+                if stripped in seen_headers:
+                    return None
+                seen_headers.add(stripped)
+
+        if self.rebase_addresses:
+            function_header = objdump_function_header.match(stripped)
+            if function_header:
+                return f'{function_header.group(1)}:'
+
+        return line.rstrip()
+
+    def finish_block(self, block, next_label):
+        if not block:
+            return [], next_label
+
+        if self.collapse_padding:
+            block = [instruction for instruction in block
+                     if not padding_instructions.match(instruction.text)]
+
+        if not self.rebase_addresses or not self.strip_bytes:
+            return [f'  {instruction.text}' for instruction in block], next_label
+
+        addresses = {instruction.address for instruction in block if instruction.address is not None}
+        targets = sorted({target for instruction in block for target in self.jump_targets(instruction)
+                          if target in addresses})
+        labels = {address: f'.L{index}' for index, address in enumerate(targets, next_label)}
+
+        lines = []
+        for instruction in block:
+            if instruction.address in labels:
+                lines.append(f'{labels[instruction.address]}:')
+            lines.append(f'  {self.rebase(instruction.text, labels)}')
+        return lines, next_label + len(labels)
+
+    def jump_targets(self, instruction):
+        if not instruction.text.startswith(('j', 'loop')):
+            return []
+        return [int(address, 16) for address, _ in objdump_reference.findall(instruction.text)] + \
+               [int(address, 16) for address in r2_reference.findall(instruction.text)]
+
+    def rebase(self, text, labels):
+        def replace_objdump(match):
+            return labels.get(int(match.group(1), 16), match.group(2))
+
+        def replace_r2(match):
+            return labels.get(int(match.group(1), 16), match.group(0))
+
+        text = objdump_reference.sub(replace_objdump, text)
+        if text.startswith(('j', 'loop')):
+            text = r2_reference.sub(replace_r2, text)
+        return text
@@ -1,7 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+from .disassembledfunction import parse_objdump, save_functions
+
 class ObjdumpDisassembler:
-    def __init__(self, subprocess):
+    def __init__(self, subprocess, chunk_size=64):
         self.subprocess = subprocess
+        self.chunk_size = chunk_size
+        self.name = "objdump"
 
     def disassemble(self, executable_path, output_path):
-        self.subprocess.run(["objdump", "-d", executable_path],
-                       stdout=open(output_path, 'w'), check=True)
+        with open(output_path, 'w') as output_file:
+            self.subprocess.run(["objdump", "-d", executable_path],
+                                stdout=output_file, check=True)
+
+    def disassemble_text(self, executable_path):
+        return self.subprocess.run(["objdump", "-d", executable_path],
+                                   stdout=self.subprocess.PIPE, text=True, check=True).stdout
+
+    def disassemble_texts(self, executable_paths, jobs=None):
+        # objdump takes many files at once, for small objects starting the
+        # process costs more than disassembling them. Chunks are made small
+        # enough to give every job one.
+        jobs = jobs or 1
+        chunk_size = max(1, min(self.chunk_size, -(-len(executable_paths) // jobs)))
+        chunks = [executable_paths[start:start + chunk_size]
+                  for start in range(0, len(executable_paths), chunk_size)]
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            return [text for texts in executor.map(self.disassemble_chunk, chunks) for text in texts]
+
+    def disassemble_chunk(self, executable_paths):
+        try:
+            result = self.subprocess.run(["objdump", "-d"] + executable_paths,
+                                         stdout=self.subprocess.PIPE, text=True, check=True)
+        except self.subprocess.CalledProcessError:
+            # One bad file fails the whole chunk, disassembling them one by
+            # one raises for the file that is actually broken
+            return [self.disassemble_text(executable_path) for executable_path in executable_paths]
+        return split_objdump_output(result.stdout, executable_paths)
+
+    def disassemble_functions(self, executable_path, output_path):
+        save_functions(output_path, self.functions_from_text(self.disassemble_text(executable_path)))
+
+    def functions_from_text(self, text):
+        return parse_objdump(text)
+
+def split_objdump_output(text, executable_paths):
+    # Every file starts with an empty line and "<path>:     file format",
+    # the parts are the same as the output of objdump for that file alone
+    starts = []
+    position = 0
+    for executable_path in executable_paths:
+        position = text.index(f'\n{executable_path}:     file format ', position)
+        starts.append(position)
+        position += 1
+    ends = starts[1:] + [len(text)]
+    return [text[start:end] for start, end in zip(starts, ends)]
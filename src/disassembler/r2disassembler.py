@@ -1,6 +1,17 @@
+from .disassembledfunction import parse_r2_functions, save_functions
+
 class R2Disassembler:
     def __init__(self, r2_runner):
         self.r2_runner = r2_runner
+        self.name = "r2"
 
     def disassemble(self, executable_path, output_path):
         self.r2_runner.run('pd', executable_path, output_path)
+
+    def disassemble_text(self, executable_path):
+        output, _ = self.r2_runner.run_str('pd', executable_path, check=True)
+        return output
+
+    def disassemble_functions(self, executable_path, output_path):
+        output, _ = self.r2_runner.run_str('aa;pdfj @@F', executable_path)
+        save_functions(output_path, parse_r2_functions(output))
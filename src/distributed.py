@@ -0,0 +1,80 @@
+import time
+
+class PipelineTasks:
+    # What a worker does for the tasks of a run. Workers share the data path
+    # but not the manifest or the result store. The coordinator records the
+    # stages they ran once the run is collected.
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.predictors = {predictor.name: predictor for predictor in pipeline.predictors}
+
+    def handlers(self):
+        return {
+            'prepare': self.prepare,
+            'predict': self.predict,
+        }
+
+    def prepare(self, payload):
+        executable = self.pipeline.get_executable_name(payload['source'])
+        self.pipeline.compile(payload['source'], executable)
+        self.pipeline.disassemble(executable)
+        return {'executable': executable}
+
+    def predict(self, payload):
+        executable = self.pipeline.get_executable_name(payload['source'])
+        start = time.perf_counter()
+        prediction = self.pipeline.predict_and_save_file(executable, self.predictors[payload['predictor']])
+        return {'prediction': prediction, 'seconds': time.perf_counter() - start}
+
+def prepare_key(source):
+    return f'prepare:{source}'
+
+def predict_key(source, predictor):
+    return f'predict:{source}:{predictor.name}'
+
+def enqueue_run(queue, pipeline):
+    count = 0
+    for source in pipeline.get_sources():
+        prepare = queue.enqueue(prepare_key(source), 'prepare', {'source': source})
+        count += 1
+        for predictor in pipeline.predictors:
+            queue.enqueue(predict_key(source, predictor), 'predict',
+                          {'source': source, 'predictor': predictor.name}, prepare)
+            count += 1
+    return count
+
+def wait_for_run(queue, poll_interval=5.0, status_callback=None):
+    while not queue.is_finished():
+        if status_callback:
+            status_callback(queue.counts())
+        time.sleep(poll_interval)
+    return queue.counts()
+
+def collect_run(queue, pipeline):
+    failures = queue.failures()
+    if failures:
+        raise RuntimeError(f"{len(failures)} queued tasks failed: " +
+                           ', '.join(f'{key} ({error})' for key, error in sorted(failures.items())))
+
+    results = queue.results('predict')
+    for source in pipeline.get_sources():
+        pipeline.add_source_to_dataset(source)
+
+    for source in pipeline.get_sources():
+        executable = pipeline.get_executable_name(source)
+        record_stages(pipeline, source)
+        for predictor in pipeline.predictors:
+            result = results[predict_key(source, predictor)]
+            pipeline.record_prediction(executable, predictor, result['prediction'], result['seconds'], False)
+            pipeline.add_prediction_to_combined_file(predictor, result['prediction'])
+
+def record_stages(pipeline, source):
+    # The inputs are hashed here from the files the workers wrote, with the
+    # settings of the coordinator, which the workers were started with
+    executable = pipeline.get_executable_name(source)
+    pipeline.record_stage(executable, 'compile', pipeline.compile_inputs(source), [pipeline.get_build_path(executable)])
+    pipeline.record_stage(executable, 'disassemble', pipeline.disassemble_inputs(executable),
+                          pipeline.disassemble_outputs(executable))
+    for predictor in pipeline.predictors:
+        pipeline.record_stage(executable, f'predict:{predictor.name}', pipeline.prediction_inputs(predictor, executable),
+                              [pipeline.get_prediction_path(predictor, executable)])
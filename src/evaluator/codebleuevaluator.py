@@ -1,9 +1,19 @@
+import pandas as pd
+from .codebleustatistics import CodeAnalyser, compare, score_columns, scores_from_statistics, statistic_columns
+
+def analyse_reference(analyser, reference_cache, reference):
+    if reference_cache is None:
+        return analyser.analyse(reference)
+    return reference_cache.analyse(analyser, reference)
+
 class CodeBleuEvaluator:
-    def __init__(self, calc_codebleu, lang="c", weights=(0.25, 0.25, 0.25, 0.25), tokenizer=None):
+    def __init__(self, calc_codebleu, lang="c", weights=(0.25, 0.25, 0.25, 0.25), tokenizer=None, reference_cache=None):
         self.calc_codebleu = calc_codebleu
         self.lang = lang
         self.weights = weights
         self.tokenizer = tokenizer
+        self.reference_cache = reference_cache
+        self.analyser = None
 
     def evaluate(self, reference_code, prediction_code):
         return self.calc_codebleu([reference_code], \
@@ -11,3 +21,35 @@ class CodeBleuEvaluator:
                            lang=self.lang, \
                            weights=self.weights, \
                            tokenizer=self.tokenizer)
+
+    def get_analyser(self):
+        if self.analyser is None:
+            self.analyser = CodeAnalyser(self.lang, self.tokenizer)
+        return self.analyser
+
+    def evaluate_samples(self, references, predictions, index=None):
+        if len(references) != len(predictions):
+            raise ValueError(f"Got {len(references)} references but {len(predictions)} predictions")
+
+        statistics = pd.DataFrame(
+                self.compare_pairs(references, predictions),
+                columns=statistic_columns,
+                index=index)
+
+        return pd.concat([scores_from_statistics(statistics, self.weights), statistics], axis=1)
+
+    def compare_pairs(self, references, predictions):
+        analyser = self.get_analyser()
+        return [compare(analyse_reference(analyser, self.reference_cache, reference), analyser.analyse(prediction))
+                for reference, prediction in zip(references, predictions)]
+
+    def close(self):
+        pass
+
+    def corpus_scores(self, samples):
+        totals = samples[statistic_columns].sum().to_frame().T
+        scores = scores_from_statistics(totals, self.weights)
+        return {column: float(scores[column].iloc[0]) for column in score_columns}
+
+    def mean_scores(self, samples):
+        return {column: float(samples[column].mean()) for column in score_columns}
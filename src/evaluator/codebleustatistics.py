@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+from collections import Counter
+from codebleu import dataflow_match
+from codebleu.codebleu import PACKAGE_DIR
+from codebleu.parser import remove_comments_and_docstrings
+from codebleu.utils import get_tree_sitter_language, ngrams
+from tree_sitter import Parser
+
+# These mirror calc_codebleu from the codebleu package, split into a
+# per-sample counting step and a scoring step. Scoring a single row gives the
+# same result as calc_codebleu([reference], [prediction]), and scoring the
+# column sums gives the same result as calc_codebleu(references, predictions).
+
+ngram_orders = [1, 2, 3, 4]
+
+score_columns = [
+    'codebleu',
+    'ngram_match_score',
+    'weighted_ngram_match_score',
+    'syntax_match_score',
+    'dataflow_match_score',
+]
+
+statistic_columns = (
+    ['prediction_length', 'reference_length', 'weighted_reference_length']
+    + [f'ngram_numerator_{n}' for n in ngram_orders]
+    + [f'ngram_denominator_{n}' for n in ngram_orders]
+    + [f'weighted_ngram_numerator_{n}' for n in ngram_orders]
+    + [f'weighted_ngram_denominator_{n}' for n in ngram_orders]
+    + ['syntax_matches', 'syntax_total', 'dataflow_matches', 'dataflow_total']
+)
+
+class CodeAnalysis:
+    def __init__(self, length, ngram_counts, token_weights, subtrees, dataflow):
+        self.length = length
+        self.ngram_counts = ngram_counts
+        self.token_weights = token_weights
+        self.subtrees = subtrees
+        self.dataflow = dataflow
+
+class CodeAnalyser:
+    def __init__(self, lang="c", tokenizer=None):
+        self.lang = lang
+        self.tokenizer = tokenizer if tokenizer is not None else str.split
+
+        with open(PACKAGE_DIR / "keywords" / f"{lang}.txt", "r", encoding="utf-8") as file:
+            self.keywords = set(line.strip() for line in file)
+
+        self.parser = Parser()
+        self.parser.language = get_tree_sitter_language(lang)
+        self.dataflow_parser = [self.parser, dataflow_match.dfg_function[lang]]
+
+    def analyse(self, code):
+        code = code.strip()
+        tokens = self.tokenizer(code)
+
+        try:
+            code_without_comments = remove_comments_and_docstrings(code, self.lang)
+        except Exception:
+            code_without_comments = code
+
+        root_node = self.parser.parse(bytes(code_without_comments, "utf8")).root_node
+        dataflow = dataflow_match.get_data_flow(code_without_comments, self.dataflow_parser)
+
+        return CodeAnalysis(
+            length=len(tokens),
+            ngram_counts=[Counter(ngrams(tokens, n)) if len(tokens) >= n else Counter() for n in ngram_orders],
+            token_weights={token: 1 if token in self.keywords else 0.2 for token in tokens},
+            subtrees=get_all_sub_trees(root_node),
+            dataflow=dataflow_match.normalize_dataflow(dataflow))
+
+def get_all_sub_trees(root_node):
+    node_stack = [root_node]
+    sub_trees = []
+    while node_stack:
+        node = node_stack.pop()
+        sub_trees.append(str(node))
+        for child_node in node.children:
+            if len(child_node.children) != 0:
+                node_stack.append(child_node)
+    return sub_trees
+
+def weighted_sum(weights, counts):
+    return sum(count * weights.get(ngram[0], 1) for ngram, count in counts.items())
+
+def compare(reference, prediction):
+    statistics = {
+        'prediction_length': prediction.length,
+        'reference_length': reference.length,
+        # weighted_ngram_match measures each reference as its [tokens, weights]
+        # pair, so its brevity penalty always sees a reference of length 2
+        'weighted_reference_length': 2,
+    }
+
+    for n, prediction_counts, reference_counts in zip(ngram_orders, prediction.ngram_counts, reference.ngram_counts):
+        clipped_prediction = {ngram: min(count, reference_counts[ngram]) for ngram, count in prediction_counts.items()}
+        statistics[f'ngram_numerator_{n}'] = sum(clipped_prediction.values())
+        statistics[f'ngram_denominator_{n}'] = max(1, sum(prediction_counts.values()))
+
+        clipped_reference = {ngram: min(count, prediction_counts[ngram]) for ngram, count in reference_counts.items()}
+        if n == 1 and len(reference.token_weights) == len(reference_counts):
+            numerator = weighted_sum(reference.token_weights, clipped_reference)
+            denominator = max(1, weighted_sum(reference.token_weights, reference_counts))
+        else:
+            numerator = sum(clipped_reference.values())
+            denominator = max(1, sum(reference_counts.values()))
+        statistics[f'weighted_ngram_numerator_{n}'] = numerator
+        statistics[f'weighted_ngram_denominator_{n}'] = denominator
+
+    prediction_subtrees = set(prediction.subtrees)
+    statistics['syntax_matches'] = sum(1 for subtree in reference.subtrees if subtree in prediction_subtrees)
+    statistics['syntax_total'] = len(reference.subtrees)
+
+    unmatched_dataflow = list(prediction.dataflow)
+    dataflow_matches = 0
+    for dataflow in reference.dataflow:
+        if dataflow in unmatched_dataflow:
+            dataflow_matches += 1
+            unmatched_dataflow.remove(dataflow)
+    statistics['dataflow_matches'] = dataflow_matches
+    statistics['dataflow_total'] = len(reference.dataflow)
+
+    return statistics
+
+def bleu_scores(numerators, denominators, prediction_lengths, reference_lengths):
+    smoothed = np.where(numerators == 0, numerators + 0.1, numerators)
+    log_precision = (0.25 * np.log(smoothed / denominators)).sum(axis=1)
+
+    safe_lengths = np.where(prediction_lengths == 0, 1, prediction_lengths)
+    brevity_penalty = np.where(
+            prediction_lengths > reference_lengths,
+            1.0,
+            np.where(prediction_lengths == 0, 0.0, np.exp(1 - reference_lengths / safe_lengths)))
+
+    return np.where(numerators[:, 0] == 0, 0.0, brevity_penalty * np.exp(log_precision))
+
+def ratio(numerators, denominators):
+    safe_denominators = np.where(denominators == 0, 1, denominators)
+    return np.where(denominators == 0, 0.0, numerators / safe_denominators)
+
+def scores_from_statistics(statistics, weights=(0.25, 0.25, 0.25, 0.25)):
+    def columns(prefix):
+        return statistics[[f'{prefix}_{n}' for n in ngram_orders]].to_numpy(dtype=float)
+
+    prediction_lengths = statistics['prediction_length'].to_numpy(dtype=float)
+    reference_lengths = statistics['reference_length'].to_numpy(dtype=float)
+
+    ngram_match = bleu_scores(
+            columns('ngram_numerator'), columns('ngram_denominator'),
+            prediction_lengths, reference_lengths)
+    weighted_ngram_match = bleu_scores(
+            columns('weighted_ngram_numerator'), columns('weighted_ngram_denominator'),
+            prediction_lengths, statistics['weighted_reference_length'].to_numpy(dtype=float))
+    syntax_match = ratio(
+            statistics['syntax_matches'].to_numpy(dtype=float),
+            statistics['syntax_total'].to_numpy(dtype=float))
+    dataflow_match = ratio(
+            statistics['dataflow_matches'].to_numpy(dtype=float),
+            statistics['dataflow_total'].to_numpy(dtype=float))
+
+    alpha, beta, gamma, theta = weights
+    codebleu = (alpha * ngram_match
+                + beta * weighted_ngram_match
+                + gamma * syntax_match
+                + theta * np.where(dataflow_match == 0, 1.0, dataflow_match))
+
+    return pd.DataFrame({
+        'codebleu': codebleu,
+        'ngram_match_score': ngram_match,
+        'weighted_ngram_match_score': weighted_ngram_match,
+        'syntax_match_score': syntax_match,
+        'dataflow_match_score': dataflow_match,
+    }, index=statistics.index)
@@ -0,0 +1,109 @@
+import os
+import signal
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+execution_columns = ['compiles', 'passes', 'status']
+
+class ExecutionEvaluator:
+    # Recompiles predictions together with the test of their task and runs
+    # them. Tests are <task>.c files with a main that exits with 0 on success,
+    # like the c_test code of decompile-eval.
+    def __init__(self, subprocess, tests_path, jobs=None, timeout=10, memory_limit=512, cpu_limit=10,
+                 compile_timeout=60, isolate_network=True):
+        self.subprocess = subprocess
+        self.tests_path = tests_path
+        self.jobs = jobs
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.compile_timeout = compile_timeout
+        self.isolate_network = isolate_network
+        self.sandbox = None
+
+    def get_sandbox(self):
+        if self.sandbox is not None:
+            return self.sandbox
+
+        # prlimit and unshare wrap the test instead of a preexec_fn, which is
+        # not safe to use from the worker threads
+        limits = ['prlimit',
+                  f'--as={self.memory_limit * 1024 * 1024}',
+                  f'--cpu={self.cpu_limit}',
+                  f'--fsize={16 * 1024 * 1024}',
+                  '--core=0',
+                  '--']
+        network = []
+        if self.isolate_network:
+            network = ['unshare', '--net', '--map-root-user']
+            try:
+                self.subprocess.run(network + ['true'], stdout=self.subprocess.DEVNULL,
+                                    stderr=self.subprocess.DEVNULL, check=True)
+            except (OSError, self.subprocess.CalledProcessError):
+                print("Warning: could not create a network namespace, tests run with network access")
+                network = []
+
+        self.sandbox = network + limits
+        return self.sandbox
+
+    def has_test(self, task):
+        return os.path.exists(self.get_test_path(task))
+
+    def get_test_path(self, task):
+        return os.path.join(self.tests_path, f'{task}.c')
+
+    def run_tests(self, predictions):
+        self.get_sandbox()
+        # gcc and the tests are child processes, threads are enough to keep
+        # all cores busy
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            return list(executor.map(lambda prediction: self.run_test(*prediction), predictions))
+
+    def run_test(self, prediction_path, task):
+        if not self.has_test(task):
+            return outcome(None, None, 'no_test')
+
+        with tempfile.TemporaryDirectory(prefix='execution-') as directory:
+            source_path = os.path.join(directory, 'test.c')
+            executable_path = os.path.join(directory, 'test')
+            with open(source_path, 'w') as source_file:
+                with open(prediction_path, 'r') as prediction_file:
+                    source_file.write(prediction_file.read())
+                source_file.write('\n')
+                with open(self.get_test_path(task), 'r') as test_file:
+                    source_file.write(test_file.read())
+
+            try:
+                result = self.subprocess.run(['gcc', '-o', executable_path, source_path, '-lm'],
+                                             stdout=self.subprocess.DEVNULL, stderr=self.subprocess.DEVNULL,
+                                             timeout=self.compile_timeout)
+            except self.subprocess.TimeoutExpired:
+                return outcome(False, False, 'compile_timeout')
+            if result.returncode != 0:
+                return outcome(False, False, 'compile_error')
+
+            try:
+                result = self.subprocess.run(self.get_sandbox() + [executable_path], cwd=directory,
+                                             stdin=self.subprocess.DEVNULL, stdout=self.subprocess.DEVNULL,
+                                             stderr=self.subprocess.DEVNULL, timeout=self.timeout)
+            except self.subprocess.TimeoutExpired:
+                return outcome(True, False, 'timeout')
+
+        if result.returncode == 0:
+            return outcome(True, True, 'passed')
+        # A failed assert aborts, any other signal means the program crashed
+        # or went over the CPU limit
+        if result.returncode < 0 and result.returncode != -signal.SIGABRT:
+            return outcome(True, False, 'crashed')
+        return outcome(True, False, 'failed')
+
+    def rates(self, table):
+        tested = table[table['status'] != 'no_test']
+        return {
+            'tested': len(tested),
+            'compile_rate': float(tested['compiles'].astype(float).mean()) if len(tested) else 0.0,
+            'pass_rate': float(tested['passes'].astype(float).mean()) if len(tested) else 0.0,
+        }
+
+def outcome(compiles, passes, status):
+    return {'compiles': compiles, 'passes': passes, 'status': status}
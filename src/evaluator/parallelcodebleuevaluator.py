@@ -0,0 +1,54 @@
+from concurrent.futures import ProcessPoolExecutor
+from .codebleuevaluator import CodeBleuEvaluator, analyse_reference
+from .codebleustatistics import CodeAnalyser, compare
+from .referencecache import ReferenceCache
+
+# Each worker process loads the tree-sitter language and parser once, in
+# init_worker, and reuses them for every pair it is sent
+worker_analyser = None
+worker_reference_cache = None
+
+def init_worker(lang, tokenizer, reference_cache_path, use_reference_cache):
+    global worker_analyser, worker_reference_cache
+    worker_analyser = CodeAnalyser(lang, tokenizer)
+    if use_reference_cache:
+        worker_reference_cache = ReferenceCache(reference_cache_path)
+
+def compare_chunk(pairs):
+    return [compare(analyse_reference(worker_analyser, worker_reference_cache, reference),
+                    worker_analyser.analyse(prediction))
+            for reference, prediction in pairs]
+
+class ParallelCodeBleuEvaluator(CodeBleuEvaluator):
+    def __init__(self, calc_codebleu, lang="c", weights=(0.25, 0.25, 0.25, 0.25), tokenizer=None, reference_cache=None, jobs=None, chunk_size=8):
+        super().__init__(calc_codebleu, lang, weights, tokenizer, reference_cache)
+        self.jobs = jobs
+        self.chunk_size = chunk_size
+        self.executor = None
+
+    def get_executor(self):
+        # The pool is kept between calls so every predictor is scored by the
+        # same, already initialised, workers
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                    max_workers=self.jobs,
+                    initializer=init_worker,
+                    initargs=(
+                        self.lang,
+                        self.tokenizer,
+                        self.reference_cache.cache_path if self.reference_cache else None,
+                        self.reference_cache is not None))
+        return self.executor
+
+    def compare_pairs(self, references, predictions):
+        pairs = list(zip(references, predictions))
+        chunks = [pairs[start:start + self.chunk_size] for start in range(0, len(pairs), self.chunk_size)]
+
+        return [statistics
+                for chunk in self.get_executor().map(compare_chunk, chunks)
+                for statistics in chunk]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
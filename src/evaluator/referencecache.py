@@ -0,0 +1,72 @@
+import os
+import pickle
+import threading
+from importlib.metadata import version
+from ..util import hash_text
+
+# The analysis format follows the codebleu package, so a new version of it
+# invalidates everything cached by the old one
+codebleu_version = version('codebleu')
+
+class ReferenceCache:
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def key(self, analyser, reference):
+        tokenizer = analyser.tokenizer
+        tokenizer_name = f"{getattr(tokenizer, '__module__', None)}.{getattr(tokenizer, '__qualname__', repr(tokenizer))}"
+        return hash_text(f"{codebleu_version}|{analyser.lang}|{tokenizer_name}|{reference}")
+
+    def get_file_path(self, key):
+        return os.path.join(self.cache_path, key[:2], f'{key}.pkl')
+
+    def analyse(self, analyser, reference):
+        key = self.key(analyser, reference)
+
+        with self.lock:
+            analysis = self.entries.get(key)
+        if analysis is None:
+            analysis = self.load(key)
+        if analysis is not None:
+            with self.lock:
+                self.hits += 1
+                self.entries[key] = analysis
+            return analysis
+
+        analysis = analyser.analyse(reference)
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = analysis
+        self.store(key, analysis)
+        return analysis
+
+    def load(self, key):
+        if self.cache_path is None:
+            return None
+
+        try:
+            with open(self.get_file_path(key), 'rb') as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # A damaged or outdated entry is simply analysed again
+            return None
+
+    def store(self, key, analysis):
+        if self.cache_path is None:
+            return
+
+        file_path = self.get_file_path(key)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # Several evaluator processes can write the same entry, the rename
+        # makes sure readers never see a partial file
+        temporary_path = f'{file_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary_path, 'wb') as file:
+            pickle.dump(analysis, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, file_path)
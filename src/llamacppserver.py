@@ -0,0 +1,72 @@
+import time
+import urllib.error
+import urllib.request
+
+class LlamaCppServer:
+    # Starts llama.cpp's llama-server for a local GGUF model and stops it on close
+    def __init__(self, subprocess, model_path, server_path="llama-server", threads=None, parallel=4,
+                 context_size=4096, port=8080, startup_timeout=300, urlopen=urllib.request.urlopen):
+        self.subprocess = subprocess
+        self.model_path = model_path
+        self.server_path = server_path
+        self.threads = threads
+        self.parallel = parallel
+        self.context_size = context_size
+        self.port = port
+        self.startup_timeout = startup_timeout
+        self.urlopen = urlopen
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def command(self):
+        # The context is shared by all slots, every slot gets context_size
+        command = [self.server_path,
+                   '-m', self.model_path,
+                   '--host', '127.0.0.1',
+                   '--port', str(self.port),
+                   '-np', str(self.parallel),
+                   '-c', str(self.context_size * self.parallel),
+                   '-cb']
+        if self.threads is not None:
+            command += ['-t', str(self.threads)]
+        return command
+
+    def start(self):
+        self.process = self.subprocess.Popen(self.command(),
+                                             stdout=self.subprocess.DEVNULL,
+                                             stderr=self.subprocess.DEVNULL)
+        self.wait_until_ready()
+        return f"{self.url}/v1"
+
+    def wait_until_ready(self):
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"llama-server exited with code {self.process.returncode}")
+
+            # /health answers 503 while the model is still loading
+            try:
+                with self.urlopen(f"{self.url}/health", timeout=5) as response:
+                    if response.status == 200:
+                        return
+            except (urllib.error.URLError, ConnectionError):
+                pass
+
+            if time.monotonic() > deadline:
+                self.close()
+                raise TimeoutError(f"llama-server did not load {self.model_path} within {self.startup_timeout}s")
+            time.sleep(0.5)
+
+    def close(self):
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except self.subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
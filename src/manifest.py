@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+
+class Manifest:
+    # Records are appended to a journal next to the manifest, one line each,
+    # so recording costs the same however many entries there are. The
+    # journal is folded into the manifest when it is loaded or closed.
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = f'{path}.journal'
+        self.journal = None
+        self.lock = threading.Lock()
+        self.entries = {}
+
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                self.entries = json.load(file)
+
+        if os.path.exists(self.journal_path):
+            self.replay_journal()
+            self.save()
+            os.remove(self.journal_path)
+
+    def replay_journal(self):
+        with open(self.journal_path, 'r') as file:
+            for line in file:
+                try:
+                    item, stage, entry = json.loads(line)
+                except ValueError:
+                    # The last line of an interrupted run may be cut off
+                    break
+                self.entries.setdefault(item, {})[stage] = entry
+
+    def is_current(self, item, stage, inputs):
+        with self.lock:
+            entry = self.entries.get(item, {}).get(stage)
+
+        if entry is None or entry['inputs'] != inputs:
+            return False
+
+        return all(os.path.exists(output) for output in entry['outputs'])
+
+    def record(self, item, stage, inputs, outputs):
+        entry = {
+            'inputs': inputs,
+            'outputs': list(outputs),
+        }
+        line = json.dumps([item, stage, entry]) + '\n'
+        with self.lock:
+            self.entries.setdefault(item, {})[stage] = entry
+            if self.journal is None:
+                folder = os.path.dirname(self.path)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                self.journal = open(self.journal_path, 'a')
+            self.journal.write(line)
+            self.journal.flush()
+
+    def save(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        # Write to a temporary file first so an interrupted run never leaves
+        # a truncated manifest behind
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w') as file:
+            json.dump(self.entries, file, indent=1, sort_keys=True)
+        os.replace(temporary_path, self.path)
+
+    def close(self):
+        with self.lock:
+            if self.journal is None:
+                return
+            self.journal.close()
+            self.journal = None
+            self.save()
+            os.remove(self.journal_path)
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+            for path in [self.path, self.journal_path]:
+                if os.path.exists(path):
+                    os.remove(path)
@@ -1,7 +1,15 @@
 import os
 import shutil
 import subprocess
-from .util import create_folder_if_not_exists, read_whole_file
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from .disassembler.disassembledfunction import functions_path, load_functions, save_functions
+from .artifacts import read_artifact
+from .predictor.batcherror import BatchPredictionError
+from .evaluator.executionevaluator import execution_columns
+from .util import create_folder_if_not_exists, estimate_tokens, hash_file, hash_text, read_whole_file, write_if_changed
 
 class Pipeline:
     def __init__(
@@ -11,13 +19,40 @@ class Pipeline:
             predictors,
             evaluator,
             sources_path="data/sources",
-            data_path="data"):
+            data_path="data",
+            manifest=None,
+            result_store=None,
+            tracer=None,
+            slice_functions=False,
+            normalizer=None,
+            execution_evaluator=None,
+            dataset=None,
+            artifacts=None,
+            deduplicator=None):
         self.compiler = compiler
         self.disassembler = disassembler
         self.predictors = predictors
         self.evaluator = evaluator
+        self.manifest = manifest
+        self.result_store = result_store
+        self.tracer = tracer
+        self.slice_functions = slice_functions
+        self.normalizer = normalizer
+        self.execution_evaluator = execution_evaluator
+        self.dataset = dataset
+        self.dataset_sources = None
+        self.artifacts = artifacts
+        self.deduplicator = deduplicator
+        self.duplicates = None
+        # Sweeps predict for several predictors of one pipeline at once
+        self.duplicates_lock = threading.Lock()
 
+        # The selected tasks of a dataset are written out for gcc, next to the
+        # other outputs of the run
+        if dataset is not None:
+            sources_path = os.path.join(data_path, "sources")
         self.sources_path = sources_path
+        self.tests_path = os.path.join(data_path, "tests")
         self.builds_path = os.path.join(data_path, "builds")
         self.disassemblies_path = os.path.join(data_path, "disassemblies")
         self.predictions_path = os.path.join(data_path, "predictions")
@@ -29,41 +64,414 @@ class Pipeline:
         create_folder_if_not_exists(self.predictions_path)
 
     def get_sources(self):
+        if self.dataset is not None:
+            if self.dataset_sources is None:
+                self.dataset_sources = self.write_dataset_sources()
+            return self.dataset_sources
         return sorted(os.listdir(self.sources_path))
 
+    def write_dataset_sources(self):
+        create_folder_if_not_exists(self.sources_path)
+        sources = []
+        for record in self.dataset:
+            source = f'{record.name}.c'
+            write_if_changed(os.path.join(self.sources_path, source), record.source)
+            if record.test is not None:
+                create_folder_if_not_exists(self.tests_path)
+                write_if_changed(os.path.join(self.tests_path, source), record.test)
+            sources.append(source)
+        return sources
+
     def compile(self, source, output):
-        self.compiler.compile(
-                os.path.join(self.sources_path, source),
-                os.path.join(self.builds_path, output))
+        source_path = os.path.join(self.sources_path, source)
+        output_path = os.path.join(self.builds_path, output)
+
+        inputs = self.compile_inputs(source)
+        if self.is_stage_current(output, 'compile', inputs):
+            return
+
+        with self.trace('compile', output):
+            self.compiler.compile(source_path, output_path)
+        self.record_stage(output, 'compile', inputs, [output_path])
+
+    def compile_inputs(self, source):
+        return self.stage_inputs(self.compiler, os.path.join(self.sources_path, source))
+
+    def disassemble_inputs(self, executable):
+        inputs = self.stage_inputs(self.disassembler, self.get_build_path(executable))
+        if inputs is not None and self.writes_functions():
+            inputs = hash_text(f'{inputs}|functions')
+        if inputs is not None and self.normalizer is not None:
+            inputs = hash_text(f'{inputs}|{self.normalizer.name}')
+        return inputs
+
+    def disassemble(self, executable, text=None):
+        # text is the disassembler output when it already ran in a batch
+        build_path = self.get_build_path(executable)
+        disassembly_path = self.get_disassembly_path(executable)
+
+        inputs = self.disassemble_inputs(executable)
+        if self.is_stage_current(executable, 'disassemble', inputs):
+            return
+
+        outputs = self.disassemble_outputs(executable)
+        with self.trace('disassemble', executable):
+            if self.normalizer is None:
+                text = self.write_disassembly(build_path, disassembly_path, text)
+            else:
+                text = self.write_disassembly(build_path, self.get_raw_disassembly_path(executable), text)
+
+            if self.writes_functions():
+                # Split from the captured output when the disassembler can,
+                # instead of running it once more
+                if text is not None and callable(getattr(type(self.disassembler), 'functions_from_text', None)):
+                    save_functions(self.get_functions_path(executable), self.disassembler.functions_from_text(text))
+                else:
+                    self.disassembler.disassemble_functions(build_path, self.get_functions_path(executable))
+
+        if self.normalizer is not None:
+            with self.trace('normalize', executable):
+                self.normalize(executable)
+        self.record_stage(executable, 'disassemble', inputs, outputs)
+
+    def disassemble_outputs(self, executable):
+        outputs = [self.get_disassembly_path(executable)]
+        if self.normalizer is not None:
+            outputs.append(self.get_raw_disassembly_path(executable))
+        if self.writes_functions():
+            outputs.append(self.get_functions_path(executable))
+        return outputs
+
+    def write_disassembly(self, build_path, output_path, text=None):
+        # Returns the disassembly when it passed through memory
+        if text is not None:
+            self.write_text(output_path, text)
+        # With an artifact store the disassembly goes straight from the
+        # disassembler to the predictors, the file is written in the background
+        elif self.artifacts is not None and callable(getattr(type(self.disassembler), 'disassemble_text', None)):
+            text = self.disassembler.disassemble_text(build_path)
+            self.artifacts.put(output_path, text)
+        else:
+            self.disassembler.disassemble(build_path, output_path)
+        return text
+
+    def write_text(self, path, text):
+        if self.artifacts is not None:
+            self.artifacts.put(path, text)
+            return
+        with open(path, 'w') as file:
+            file.write(text)
+
+    def read_text(self, path):
+        return read_artifact(self.artifacts, path)
+
+    def normalize(self, executable):
+        # The predictors read the normalized disassembly, the disassembler
+        # output is kept next to it for the token report
+        raw_disassembly = self.read_text(self.get_raw_disassembly_path(executable))
+        self.write_text(self.get_disassembly_path(executable), self.normalizer.normalize(raw_disassembly))
+
+        if self.writes_functions():
+            path = self.get_functions_path(executable)
+            save_functions(path, [self.normalizer.normalize_function(function) for function in load_functions(path)])
+
+    def normalization_report(self):
+        rows = []
+        for source in self.get_sources():
+            executable = self.get_executable_name(source)
+            raw_path = self.get_raw_disassembly_path(executable)
+            if not (os.path.exists(raw_path) if self.artifacts is None else self.artifacts.exists(raw_path)):
+                continue
+            raw_tokens = estimate_tokens(self.read_text(raw_path))
+            normalized_tokens = estimate_tokens(self.read_text(self.get_disassembly_path(executable)))
+            rows.append([executable, raw_tokens, normalized_tokens, 1 - normalized_tokens / raw_tokens])
+
+        # pandas takes longer to import than most commands take to run, it is
+        # only loaded for reports
+        import pandas as pd
+        return pd.DataFrame(rows, columns=['task', 'raw_tokens', 'normalized_tokens', 'reduction'])
+
+    def writes_functions(self):
+        return self.slice_functions and callable(getattr(type(self.disassembler), 'disassemble_functions', None))
+
+    def get_build_path(self, executable):
+        return os.path.join(self.builds_path, executable)
+
+    def get_disassembly_path(self, executable):
+        return os.path.join(self.disassemblies_path, f'{executable}_d.txt')
+
+    def get_raw_disassembly_path(self, executable):
+        return os.path.join(self.disassemblies_path, f'{executable}_raw.txt')
+
+    def get_functions_path(self, executable):
+        return functions_path(self.get_disassembly_path(executable))
+
+    def get_prediction_path(self, predictor, executable):
+        return os.path.join(self.predictions_path, f'{predictor.name}_{executable}.c')
+
+    def trace(self, stage, item=None, predictor=None):
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.span(stage, item, predictor)
+
+    def stage_inputs(self, component, *input_paths):
+        if self.manifest is None:
+            return None
+
+        name = getattr(component, 'name', type(component).__name__)
+        return hash_text('|'.join([name] + [self.hash_file(path) for path in input_paths]))
+
+    def hash_file(self, path):
+        if self.artifacts is None:
+            return hash_file(path)
+        return self.artifacts.hash(path)
 
-    def disassemble(self, executable):
-        self.disassembler.disassemble(
-            os.path.join(self.builds_path, executable),
-            os.path.join(self.disassemblies_path, f'{executable}_d.txt'))
+    def prediction_inputs(self, predictor, executable):
+        if self.manifest is None:
+            return None
+
+        build_path = self.get_build_path(executable)
+        disassembly_path = self.get_disassembly_path(executable)
+
+        # cache_key covers the predictor settings as well as its inputs
+        if callable(getattr(type(predictor), 'cache_key', None)):
+            return hash_text(predictor.cache_key(build_path, disassembly_path))
+        if getattr(predictor, 'uses_disassembly', True) is False:
+            return self.stage_inputs(predictor, build_path)
+        return self.stage_inputs(predictor, build_path, disassembly_path)
+
+    def is_stage_current(self, item, stage, inputs):
+        return self.manifest is not None and self.manifest.is_current(item, stage, inputs)
+
+    def record_stage(self, item, stage, inputs, outputs):
+        if self.manifest is None:
+            return
+        # The outputs may still be queued for the background writer, the
+        # stage is done once they are on disk
+        if self.artifacts is not None:
+            self.artifacts.when_written(lambda: self.manifest.record(item, stage, inputs, outputs))
+        else:
+            self.manifest.record(item, stage, inputs, outputs)
 
     def add_source_to_dataset(self, source):
+        with self.trace('add_source_to_dataset', self.get_executable_name(source)):
+            self.add_source(source)
+
+    def add_source(self, source):
         source_path = os.path.join(self.sources_path, source)
 
+        if self.result_store is not None:
+            self.result_store.append(
+                    self.get_executable_name(source),
+                    source=read_whole_file(source_path),
+                    source_path=source_path)
+            return
+
         with open(source_path, 'r') as file:
             source_code = self.put_code_on_single_line(file)
         with open(self.references_file_path, 'a') as file:
             file.write(source_code + '\n')
 
+    def get_executable_name(self, source):
+        return os.path.splitext(source)[0]
+
     def generate_prediction(self, executable, predictor):
-        build_path = os.path.join(self.builds_path, executable)
-        disassembly_path = os.path.join(self.disassemblies_path, f'{executable}_d.txt')
+        prediction = self.predict_and_save_file(executable, predictor)
+        self.add_prediction_to_combined_file(predictor, prediction)
+
+        return prediction
+
+    def predict_and_save_file(self, executable, predictor):
+        prediction_file_path = self.get_prediction_path(predictor, executable)
+        stage = f'predict:{predictor.name}'
+
+        inputs = self.prediction_inputs(predictor, executable)
+        if self.is_stage_current(executable, stage, inputs):
+            prediction = self.read_text(prediction_file_path)
+            self.record_prediction(executable, predictor, prediction, 0, True)
+            return prediction
+
+        start = time.perf_counter()
+        with self.trace('predict', executable, predictor):
+            prediction = predictor.generate_prediction(
+                    self.get_build_path(executable),
+                    self.get_disassembly_path(executable))
+        seconds = time.perf_counter() - start
+
+        self.write_text(prediction_file_path, prediction)
+        self.record_stage(executable, stage, inputs, [prediction_file_path])
+        self.record_prediction(executable, predictor, prediction, seconds, False)
+
+        return prediction
+
+    def record_prediction(self, executable, predictor, prediction, seconds, cached):
+        if self.result_store is None:
+            return
 
-        prediction = predictor.generate_prediction(build_path, disassembly_path)
+        self.result_store.append(
+                executable,
+                predictor.name,
+                prediction=prediction,
+                disassembly_path=self.get_disassembly_path(executable),
+                seconds=seconds,
+                cached=cached)
 
-        prediction_file_path = os.path.join(self.predictions_path, f'{predictor.name}_{executable}.c')
-        with open(prediction_file_path, 'w') as file:
-            file.write(prediction)
+    def add_prediction_to_combined_file(self, predictor, prediction):
+        # The result store already holds the prediction, keyed by task
+        if self.result_store is not None:
+            return
 
         combined_predictions_file_path = os.path.join(self.predictions_path, f'{predictor.name}_all.txt')
         with open(combined_predictions_file_path, 'a') as file:
             file.write(self.put_code_on_single_line(prediction.split('\n')) + '\n')
 
-        return prediction
+    def supports_batches(self, predictor):
+        return callable(getattr(type(predictor), 'generate_predictions', None))
+
+    def predict_and_save_files(self, executables, predictor):
+        stage = f'predict:{predictor.name}'
+        inputs = [self.prediction_inputs(predictor, executable) for executable in executables]
+        predictions = [None] * len(executables)
+        missing = []
+
+        for index, executable in enumerate(executables):
+            if self.is_stage_current(executable, stage, inputs[index]):
+                predictions[index] = self.read_text(self.get_prediction_path(predictor, executable))
+                self.record_prediction(executable, predictor, predictions[index], 0, True)
+            else:
+                missing.append(index)
+
+        if not missing:
+            return predictions
+
+        requests = [
+            (self.get_build_path(executables[index]), self.get_disassembly_path(executables[index]))
+            for index in missing
+        ]
+
+        start = time.perf_counter()
+        failure = None
+        with self.trace('predict_batch', f'{len(requests)} binaries', predictor):
+            try:
+                batch_predictions = predictor.generate_predictions(requests)
+            except BatchPredictionError as error:
+                # The answers that arrived are saved, so resume only asks
+                # for the failed ones
+                failure = error
+                batch_predictions = error.predictions
+        # Requests in a batch run concurrently, so only the average is known
+        seconds = (time.perf_counter() - start) / len(missing)
+
+        for index, prediction in zip(missing, batch_predictions):
+            if prediction is None:
+                continue
+            prediction_file_path = self.get_prediction_path(predictor, executables[index])
+            self.write_text(prediction_file_path, prediction)
+            self.record_stage(executables[index], stage, inputs[index], [prediction_file_path])
+            self.record_prediction(executables[index], predictor, prediction, seconds, False)
+            predictions[index] = prediction
+
+        if failure is not None:
+            raise failure
+        return predictions
+
+    def predict_all(self, executables, predictor):
+        duplicates = self.get_duplicates(executables, predictor)
+        unique = [executable for executable in executables if executable not in duplicates]
+
+        if self.supports_batches(predictor):
+            predictions = self.predict_and_save_files(unique, predictor)
+        else:
+            predictions = [self.predict_and_save_file(executable, predictor) for executable in unique]
+
+        predictions = dict(zip(unique, predictions))
+        self.save_duplicate_predictions(predictor, duplicates, predictions)
+        return [predictions[executable] for executable in executables]
+
+    def find_duplicates(self, executables):
+        with self.duplicates_lock:
+            return self.find_duplicates_once(executables)
+
+    def find_duplicates_once(self, executables):
+        # Once per run, every predictor gets the same groups
+        if self.duplicates is None or self.duplicates[0] != executables:
+            with self.trace('deduplicate', f'{len(executables)} binaries'):
+                disassemblies = {executable: self.read_text(self.get_disassembly_path(executable))
+                                 for executable in executables}
+                self.duplicates = (list(executables), self.deduplicator.find_duplicates(disassemblies))
+            if self.result_store is not None:
+                self.result_store.append(None, None, deduplication=self.deduplication_summary())
+        return self.duplicates[1]
+
+    def get_duplicates(self, executables, predictor):
+        # Predictors that only look at the binary are not deduplicated on
+        # its disassembly
+        if self.deduplicator is None or getattr(predictor, 'uses_disassembly', True) is False:
+            return {}
+        return self.find_duplicates(executables)
+
+    def deduplication_summary(self):
+        executables, duplicates = self.duplicates
+        return {
+            'binaries': len(executables),
+            'groups': len(executables) - len(duplicates),
+            'exact_duplicates': sum(1 for duplicate in duplicates.values() if duplicate.similarity == 1.0),
+            'near_duplicates': sum(1 for duplicate in duplicates.values() if duplicate.similarity < 1.0),
+            'saved_requests': len(duplicates) * sum(
+                    1 for predictor in self.predictors if getattr(predictor, 'uses_disassembly', True)),
+        }
+
+    def save_duplicate_predictions(self, predictor, duplicates, predictions):
+        # The prediction of the representative, with its symbol names
+        # replaced by the ones of the duplicate
+        stage = f'predict:{predictor.name}'
+        for executable, duplicate in duplicates.items():
+            prediction = self.deduplicator.rename(predictions[duplicate.representative], duplicate.symbol_map)
+            prediction_file_path = self.get_prediction_path(predictor, executable)
+            self.write_text(prediction_file_path, prediction)
+            self.record_stage(executable, stage, self.duplicate_inputs(predictor, executable, duplicate),
+                              [prediction_file_path])
+            self.record_prediction(executable, predictor, prediction, 0, True)
+            if self.result_store is not None:
+                self.result_store.append(executable, predictor.name, duplicate_of=duplicate.representative,
+                                         similarity=duplicate.similarity)
+            predictions[executable] = prediction
+
+    def duplicate_inputs(self, predictor, executable, duplicate):
+        # A copied prediction is only current for the same deduplication, a
+        # run without it or with other settings asks the predictor again
+        if self.manifest is None:
+            return None
+        return hash_text('|'.join([
+                self.prediction_inputs(predictor, executable),
+                self.deduplicator.name,
+                duplicate.representative,
+                self.prediction_inputs(predictor, duplicate.representative)]))
+
+    def save_predictions(self, executables, predictor, predictions):
+        # Takes over predictions another pipeline made for identical binaries
+        stage = f'predict:{predictor.name}'
+        for executable, prediction in zip(executables, predictions):
+            prediction_file_path = self.get_prediction_path(predictor, executable)
+            self.write_text(prediction_file_path, prediction)
+            self.record_stage(executable, stage, self.prediction_inputs(predictor, executable), [prediction_file_path])
+            self.record_prediction(executable, predictor, prediction, 0, True)
+
+    def add_predictions_to_combined_files(self, executables, predictions):
+        for index in range(len(executables)):
+            for predictor in self.predictors:
+                self.add_prediction_to_combined_file(predictor, predictions[predictor.name][index])
+
+    def generate_and_save_predictions_batch(self, executables, status_callback=None):
+        predictions = {}
+        for predictor in self.predictors:
+            if status_callback:
+                status_callback(0, predictor.name)
+            predictions[predictor.name] = self.predict_all(executables, predictor)
+            if status_callback:
+                status_callback(1, predictor.name)
+
+        self.add_predictions_to_combined_files(executables, predictions)
 
     def generate_and_save_predictions(self, executable, status_callback=None):
         for predictor in self.predictors:
@@ -73,21 +481,237 @@ class Pipeline:
             if status_callback:
                 status_callback(1, predictor.name)
 
+    def prepare_parallel(self, jobs=None):
+        sources = self.get_sources()
+        executables = self.compile_all(sources, jobs)
+
+        self.disassemble_all(executables, jobs)
+
+        # The reference file is written afterwards so the line order always
+        # follows the sorted source order, regardless of which job finished first
+        for source in sources:
+            self.add_source_to_dataset(source)
+
+    def compile_all(self, sources, jobs=None):
+        executables = [self.get_executable_name(source) for source in sources]
+
+        if not callable(getattr(type(self.compiler), 'compile_many', None)):
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                list(executor.map(self.compile, sources, executables))
+            return executables
+
+        stale = []
+        for source, executable in zip(sources, executables):
+            source_path = os.path.join(self.sources_path, source)
+            inputs = self.stage_inputs(self.compiler, source_path)
+            if not self.is_stage_current(executable, 'compile', inputs):
+                stale.append((source_path, self.get_build_path(executable), executable, inputs))
+
+        with self.trace('compile_batch', f'{len(stale)} sources'):
+            self.compiler.compile_many([(source_path, build_path) for source_path, build_path, _, _ in stale], jobs)
+
+        for _, build_path, executable, inputs in stale:
+            self.record_stage(executable, 'compile', inputs, [build_path])
+
+        return executables
+
+    def disassemble_all(self, executables, jobs=None):
+        texts = [None] * len(executables)
+        if callable(getattr(type(self.disassembler), 'disassemble_texts', None)):
+            stale = [index for index, executable in enumerate(executables)
+                     if not self.is_stage_current(executable, 'disassemble', self.disassemble_inputs(executable))]
+            if stale:
+                with self.trace('disassemble_batch', f'{len(stale)} binaries'):
+                    batch_texts = self.disassembler.disassemble_texts(
+                            [self.get_build_path(executables[index]) for index in stale], jobs)
+                for index, text in zip(stale, batch_texts):
+                    texts[index] = text
+
+        # objdump and radare2 run as child processes, so threads are enough
+        # to keep several of them busy at once. Functions and normalizing
+        # still run per binary.
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(self.disassemble, executables, texts))
+
+    def copy_builds(self, other, sources):
+        # Builds only depend on the sources and the compiler, so a pipeline
+        # with the same ones can take them over instead of compiling again
+        executables = []
+        for source in sources:
+            executable = self.get_executable_name(source)
+            build_path = self.get_build_path(executable)
+            shutil.copy2(other.get_build_path(executable), build_path)
+            inputs = self.stage_inputs(self.compiler, os.path.join(self.sources_path, source))
+            self.record_stage(executable, 'compile', inputs, [build_path])
+            executables.append(executable)
+        return executables
+
+    def compile_and_disassemble(self, source):
+        executable = self.get_executable_name(source)
+        self.compile(source, executable)
+        self.disassemble(executable)
+        return executable
+
+    def predict_parallel(self, jobs=None, status_callback=None):
+        executables = [self.get_executable_name(source) for source in self.get_sources()]
+        duplicates = {predictor.name: self.get_duplicates(executables, predictor) for predictor in self.predictors}
+        unique = {predictor.name: [executable for executable in executables
+                                   if executable not in duplicates[predictor.name]]
+                  for predictor in self.predictors}
+        batch_predictors = [predictor for predictor in self.predictors if self.supports_batches(predictor)]
+        tasks = [(executable, predictor)
+                 for executable in executables
+                 for predictor in self.predictors
+                 if predictor not in batch_predictors and executable not in duplicates[predictor.name]]
+
+        def run_task(task):
+            executable, predictor = task
+            prediction = self.predict_and_save_file(executable, predictor)
+            if status_callback:
+                status_callback(executable, predictor.name)
+            return prediction
+
+        def run_batch(predictor):
+            predictions = self.predict_and_save_files(unique[predictor.name], predictor)
+            if status_callback:
+                for executable in unique[predictor.name]:
+                    status_callback(executable, predictor.name)
+            return predictions
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            batch_futures = [executor.submit(run_batch, predictor) for predictor in batch_predictors]
+            task_predictions = dict(zip(
+                [(executable, predictor.name) for executable, predictor in tasks],
+                executor.map(run_task, tasks)))
+
+        for predictor, future in zip(batch_predictors, batch_futures):
+            for executable, prediction in zip(unique[predictor.name], future.result()):
+                task_predictions[(executable, predictor.name)] = prediction
+
+        for predictor in self.predictors:
+            if not duplicates[predictor.name]:
+                continue
+            predictions = {executable: task_predictions[(executable, predictor.name)]
+                           for executable in unique[predictor.name]}
+            self.save_duplicate_predictions(predictor, duplicates[predictor.name], predictions)
+            for executable in duplicates[predictor.name]:
+                task_predictions[(executable, predictor.name)] = predictions[executable]
+                if status_callback:
+                    status_callback(executable, predictor.name)
+
+        for executable in executables:
+            for predictor in self.predictors:
+                self.add_prediction_to_combined_file(predictor, task_predictions[(executable, predictor.name)])
+
+    def run_parallel(self, jobs=None, status_callback=None):
+        self.prepare_parallel(jobs)
+        self.predict_parallel(jobs, status_callback)
+
     def put_code_on_single_line(self, input_file):
         return ' '.join([line.strip() for line in input_file if line.strip()])
 
-    def evaluate(self):
-        reference_code = read_whole_file(self.references_file_path)
-        results = {}
+    def evaluate_samples(self):
+        if self.result_store is not None:
+            return self.evaluate_stored_samples()
 
+        references = read_whole_file(self.references_file_path).splitlines()
+        task_ids = [self.get_executable_name(source) for source in self.get_sources()]
+        if len(task_ids) != len(references):
+            task_ids = None
+
+        samples = {}
         for predictor in self.predictors:
             combined_predictions_file_path = os.path.join(self.predictions_path, f'{predictor.name}_all.txt')
-            prediction_code = read_whole_file(combined_predictions_file_path)
-            results[predictor.name] = self.evaluator.evaluate(reference_code, prediction_code)
+            predictions = read_whole_file(combined_predictions_file_path).splitlines()
+            with self.trace('evaluate', predictor=predictor):
+                samples[predictor.name] = self.evaluator.evaluate_samples(references, predictions, task_ids)
+
+        return samples
+
+    def evaluate_stored_samples(self):
+        # Rows are matched on task id, so the order the predictions were
+        # written in does not matter
+        references = self.result_store.references()
+
+        samples = {}
+        for predictor in self.predictors:
+            predictions = self.result_store.predictions(predictor.name)
+            task_ids = [task_id for task_id in references if task_id in predictions]
+            with self.trace('evaluate', predictor=predictor):
+                table = self.evaluator.evaluate_samples(
+                        [references[task_id] for task_id in task_ids],
+                        [predictions[task_id] for task_id in task_ids],
+                        task_ids)
+            for task_id, scores in zip(task_ids, table.to_dict('records')):
+                self.result_store.append(task_id, predictor.name, scores=scores)
+            samples[predictor.name] = table
+
+        return samples
+
+    def evaluate_execution(self):
+        # Every prediction file is recompiled and tested in one batch, so the
+        # worker pool stays busy across predictors
+        if self.artifacts is not None:
+            # gcc reads the prediction files
+            self.artifacts.flush()
+        executables = [self.get_executable_name(source) for source in self.get_sources()]
+        tests = [(predictor, executable)
+                 for predictor in self.predictors
+                 for executable in executables
+                 if os.path.exists(self.get_prediction_path(predictor, executable))]
+
+        with self.trace('execute', f'{len(tests)} predictions'):
+            outcomes = self.execution_evaluator.run_tests(
+                    [(self.get_prediction_path(predictor, executable), executable) for predictor, executable in tests])
+
+        import pandas as pd
+        samples = {}
+        for predictor in self.predictors:
+            rows = [(executable, outcome) for (test_predictor, executable), outcome in zip(tests, outcomes)
+                    if test_predictor is predictor]
+            if self.result_store is not None:
+                for executable, outcome in rows:
+                    self.result_store.append(executable, predictor.name, execution=outcome)
+            samples[predictor.name] = pd.DataFrame(
+                    [outcome for _, outcome in rows],
+                    columns=execution_columns,
+                    index=[executable for executable, _ in rows])
+
+        results = {name: self.execution_evaluator.rates(table) for name, table in samples.items()}
+        if self.result_store is not None:
+            for name, rates in results.items():
+                self.result_store.append(None, name, execution_rates=rates)
+
+        return samples, results
+
+    def evaluate(self, samples=None):
+        if samples is None:
+            samples = self.evaluate_samples()
+
+        results = {name: self.evaluator.corpus_scores(table) for name, table in samples.items()}
+        if self.result_store is not None:
+            for name, scores in results.items():
+                self.result_store.append(None, name, scores=scores)
 
         return results
 
+    def clean_combined_files(self):
+        # The combined files are rebuilt from the per-source outputs on every
+        # run, only the per-source outputs are tracked by the manifest
+        if self.result_store is not None:
+            self.result_store.clear()
+        if os.path.exists(self.references_file_path):
+            os.remove(self.references_file_path)
+        for predictor in self.predictors:
+            combined_predictions_file_path = os.path.join(self.predictions_path, f'{predictor.name}_all.txt')
+            if os.path.exists(combined_predictions_file_path):
+                os.remove(combined_predictions_file_path)
+
     def clean(self):
+        if self.manifest is not None:
+            self.manifest.clear()
+        if self.result_store is not None:
+            self.result_store.clear()
         if os.path.isdir(self.builds_path):
             shutil.rmtree(self.builds_path)
         if os.path.isdir(self.disassemblies_path):
@@ -96,3 +720,9 @@ class Pipeline:
             shutil.rmtree(self.predictions_path)
         if os.path.exists(self.references_file_path):
             os.remove(self.references_file_path)
+        self.duplicates = None
+        if self.dataset is not None:
+            self.dataset_sources = None
+            for path in [self.sources_path, self.tests_path]:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
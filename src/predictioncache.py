@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import threading
+import time
+
+class PredictionCache:
+    def __init__(self, db_path, max_size_bytes=1024 * 1024 * 1024, clock=time.time):
+        folder = os.path.dirname(db_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.db_path = db_path
+        self.max_size_bytes = max_size_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        # Predictions are run from worker threads, all access goes through the lock
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                key TEXT PRIMARY KEY,
+                prediction TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS predictions_last_access ON predictions (last_access)")
+        self.connection.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT prediction FROM predictions WHERE key = ?", (key,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.connection.execute(
+                "UPDATE predictions SET last_access = ? WHERE key = ?", (self.clock(), key))
+            self.connection.commit()
+            return row[0]
+
+    def put(self, key, prediction):
+        size = len(prediction.encode('utf-8'))
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO predictions (key, prediction, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, prediction, size, self.clock()))
+            self.evict()
+            self.connection.commit()
+
+    def evict(self):
+        total_size = self.size()
+        if total_size <= self.max_size_bytes:
+            return
+
+        evicted = []
+        for key, size in self.connection.execute(
+                "SELECT key, size FROM predictions ORDER BY last_access ASC"):
+            if total_size <= self.max_size_bytes:
+                break
+            evicted.append((key,))
+            total_size -= size
+
+        self.connection.executemany("DELETE FROM predictions WHERE key = ?", evicted)
+
+    def size(self):
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM predictions").fetchone()[0]
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
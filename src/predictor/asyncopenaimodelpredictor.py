@@ -0,0 +1,189 @@
+import asyncio
+import random
+import time
+from collections import deque
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError
+from ..artifacts import read_artifact
+from ..util import estimate_tokens, hash_text
+from .batcherror import BatchPredictionError
+from .functionslicer import stitch_predictions
+from .openaimodelpredictor import TokenCounter, clean_response
+
+class RateLimiter:
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, window=60.0, clock=time.monotonic):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self.clock = clock
+        self.sent = deque()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens):
+        async with self.lock:
+            while True:
+                now = self.clock()
+                while self.sent and now - self.sent[0][0] >= self.window:
+                    self.sent.popleft()
+
+                if self.has_budget(tokens):
+                    self.sent.append((now, tokens))
+                    return
+
+                await asyncio.sleep(self.window - (now - self.sent[0][0]))
+
+    def has_budget(self, tokens):
+        # An empty window always lets one request through, so a single prompt
+        # larger than the token budget can't block forever
+        if not self.sent:
+            return True
+        if self.requests_per_minute is not None and len(self.sent) >= self.requests_per_minute:
+            return False
+        if self.tokens_per_minute is not None:
+            used = sum(sent_tokens for _, sent_tokens in self.sent)
+            if used + tokens > self.tokens_per_minute:
+                return False
+        return True
+
+def is_retryable(error):
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+def retry_after_seconds(error):
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+class AsyncOpenAIModelPredictor:
+    def __init__(
+            self,
+            api_key,
+            model,
+            temperature,
+            base_prompt,
+            max_in_flight=8,
+            requests_per_minute=None,
+            tokens_per_minute=None,
+            max_retries=5,
+            initial_backoff=1.0,
+            max_backoff=60.0,
+            base_url=None,
+            function_slicer=None,
+            artifacts=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.temperature = temperature
+        self.base_prompt = base_prompt
+        self.function_slicer = function_slicer
+        self.artifacts = artifacts
+        self.max_in_flight = max_in_flight
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.name = f"OpenAI-{model}"
+        self.retries = 0
+        self.tokens = TokenCounter()
+
+    def create_client(self):
+        # Retries are handled here so that they share the rate limiter
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+
+    def create_prompt(self, disassembly_path):
+        disassembly = read_artifact(self.artifacts, disassembly_path)
+        return self.base_prompt.format(disassembly=disassembly)
+
+    def create_prompts(self, disassembly_path):
+        if self.function_slicer is None:
+            return [self.create_prompt(disassembly_path)]
+        return self.function_slicer.create_prompts(self.base_prompt, disassembly_path)
+
+    # Same key as OpenAIModelPredictor, both send identical requests
+    def cache_key(self, binary_path, disassembly_path):
+        prompts = '\0'.join(self.create_prompts(disassembly_path))
+        return f"{self.name}|{self.temperature}|{hash_text(prompts)}"
+
+    def token_usage(self):
+        return self.tokens.current()
+
+    def generate_prediction(self, binary_path, disassembly_path):
+        return self.generate_predictions([(binary_path, disassembly_path)])[0]
+
+    def generate_predictions(self, requests):
+        return asyncio.run(self.generate_predictions_async(requests))
+
+    async def generate_predictions_async(self, requests):
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        rate_limiter = RateLimiter(self.requests_per_minute, self.tokens_per_minute)
+
+        prompts = [self.create_prompts(disassembly_path) for binary_path, disassembly_path in requests]
+
+        async with self.create_client() as client:
+            async def predict(prompt):
+                async with semaphore:
+                    return await self.request_prediction(client, rate_limiter, prompt)
+
+            # The parts of split binaries are sent alongside all other requests.
+            # A failed request doesn't cancel the others, their answers are
+            # already paid for.
+            parts = await asyncio.gather(*[
+                predict(prompt)
+                for request_prompts in prompts
+                for prompt in request_prompts
+                ], return_exceptions=True)
+
+        predictions = []
+        errors = {}
+        for index, request_prompts in enumerate(prompts):
+            request_parts, parts = parts[:len(request_prompts)], parts[len(request_prompts):]
+            failed = [part for part in request_parts if isinstance(part, BaseException)]
+            if failed:
+                errors[index] = failed[0]
+                predictions.append(None)
+            else:
+                predictions.append(request_parts[0] if len(request_parts) == 1 else stitch_predictions(request_parts))
+
+        if errors:
+            raise BatchPredictionError(predictions, errors)
+        return predictions
+
+    async def request_prediction(self, client, rate_limiter, prompt):
+        tokens = estimate_tokens(prompt)
+
+        attempt = 0
+        while True:
+            await rate_limiter.acquire(tokens)
+            try:
+                chat_completion = await client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt,
+                        }
+                    ],
+                    model=self.model,
+                    temperature=self.temperature
+                )
+                # The event loop runs on the thread that called generate_predictions
+                self.tokens.add(chat_completion.usage)
+                return clean_response(chat_completion.choices[0].message.content)
+            except Exception as error:
+                if not is_retryable(error) or attempt >= self.max_retries:
+                    raise
+
+                delay = retry_after_seconds(error)
+                if delay is None:
+                    delay = self.initial_backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+                delay = min(self.max_backoff, delay)
+
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
@@ -0,0 +1,9 @@
+class BatchPredictionError(Exception):
+    # Some requests of a batch failed. predictions has the answers of the
+    # others, with None where errors has the exception of a request, so the
+    # caller can keep them before the error goes on.
+    def __init__(self, predictions, errors):
+        self.predictions = predictions
+        self.errors = errors
+        first = errors[min(errors)]
+        super().__init__(f"{len(errors)} of {len(predictions)} predictions failed, first: {first!r}")
@@ -0,0 +1,77 @@
+import threading
+from ..util import hash_text
+from .batcherror import BatchPredictionError
+
+class CachedPredictor:
+    def __init__(self, predictor, cache):
+        self.predictor = predictor
+        self.cache = cache
+        self.name = predictor.name
+        self.uses_disassembly = getattr(predictor, 'uses_disassembly', True)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    # The same key as the predictor, so the manifest doesn't depend on
+    # whether the cache is used
+    def cache_key(self, binary_path, disassembly_path):
+        return self.predictor.cache_key(binary_path, disassembly_path)
+
+    def storage_key(self, binary_path, disassembly_path):
+        return hash_text(self.cache_key(binary_path, disassembly_path))
+
+    def token_usage(self):
+        if callable(getattr(type(self.predictor), 'token_usage', None)):
+            return self.predictor.token_usage()
+        return None
+
+    def lookup(self, key):
+        prediction = self.cache.get(key)
+        with self.lock:
+            if prediction is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return prediction
+
+    def generate_prediction(self, binary_path, disassembly_path):
+        key = self.storage_key(binary_path, disassembly_path)
+        prediction = self.lookup(key)
+
+        if prediction is None:
+            prediction = self.predictor.generate_prediction(binary_path, disassembly_path)
+            self.cache.put(key, prediction)
+
+        return prediction
+
+class CachedBatchPredictor(CachedPredictor):
+    def generate_predictions(self, requests):
+        keys = [self.storage_key(binary_path, disassembly_path) for binary_path, disassembly_path in requests]
+        predictions = [self.lookup(key) for key in keys]
+
+        missing = [index for index, prediction in enumerate(predictions) if prediction is None]
+        if not missing:
+            return predictions
+
+        try:
+            generated = self.predictor.generate_predictions([requests[index] for index in missing])
+        except BatchPredictionError as error:
+            # Keeps the answers that did arrive, then reports the rest
+            for index, prediction in zip(missing, error.predictions):
+                if prediction is not None:
+                    self.cache.put(keys[index], prediction)
+                    predictions[index] = prediction
+            raise BatchPredictionError(
+                    predictions, {missing[index]: failure for index, failure in error.errors.items()}) from error
+
+        for index, prediction in zip(missing, generated):
+            self.cache.put(keys[index], prediction)
+            predictions[index] = prediction
+        return predictions
+
+def create_cached_predictor(predictor, cache):
+    # Only advertise batching when the wrapped predictor can batch, so the
+    # pipeline keeps running single predictors one binary per worker
+    if callable(getattr(type(predictor), 'generate_predictions', None)):
+        return CachedBatchPredictor(predictor, cache)
+    return CachedPredictor(predictor, cache)
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import threading
+import time
+from codebleu.utils import get_tree_sitter_language
+from tree_sitter import Parser
+
+class CascadePredictor:
+    # Asks the tiers in order, cheapest first, and keeps the first answer
+    # that passes all checks. When no answer passes, the answer of the last
+    # and most capable tier is kept.
+    def __init__(self, tiers, checks, name=None):
+        self.tiers = tiers
+        self.checks = checks
+        self.name = name or "cascade"
+        self.lock = threading.Lock()
+        self.history = []
+
+    def cache_key(self, binary_path, disassembly_path):
+        keys = [tier.cache_key(binary_path, disassembly_path) for tier in self.tiers]
+        return '|'.join([self.name] + [check.name for check in self.checks] + keys)
+
+    def token_usage(self):
+        prompt_tokens = 0
+        completion_tokens = 0
+        for tier in self.tiers:
+            usage = tier_token_usage(tier)
+            prompt_tokens += usage[0]
+            completion_tokens += usage[1]
+        return prompt_tokens, completion_tokens
+
+    def generate_prediction(self, binary_path, disassembly_path):
+        attempts = []
+        prediction = None
+        accepted = None
+
+        for tier in self.tiers:
+            tokens_start = tier_token_usage(tier)
+            start = time.perf_counter()
+            prediction = tier.generate_prediction(binary_path, disassembly_path)
+            seconds = time.perf_counter() - start
+            tokens_end = tier_token_usage(tier)
+
+            failed_check = self.failed_check(prediction)
+            attempts.append({
+                'tier': tier.name,
+                'seconds': seconds,
+                'prompt_tokens': tokens_end[0] - tokens_start[0],
+                'completion_tokens': tokens_end[1] - tokens_start[1],
+                'failed_check': failed_check,
+            })
+            if failed_check is None:
+                accepted = tier.name
+                break
+
+        with self.lock:
+            self.history.append({
+                'binary': os.path.basename(binary_path),
+                'accepted': accepted,
+                'attempts': attempts,
+            })
+        return prediction
+
+    def failed_check(self, prediction):
+        for check in self.checks:
+            if not check.check(prediction):
+                return check.name
+        return None
+
+    def statistics(self):
+        with self.lock:
+            history = list(self.history)
+
+        rows = []
+        for tier in self.tiers:
+            attempts = [attempt for entry in history for attempt in entry['attempts'] if attempt['tier'] == tier.name]
+            accepted = sum(1 for entry in history if entry['accepted'] == tier.name)
+            rows.append({
+                'tier': tier.name,
+                'requests': len(attempts),
+                'accepted': accepted,
+                'hit_rate': accepted / len(attempts) if attempts else 0.0,
+                'seconds': sum(attempt['seconds'] for attempt in attempts),
+                'prompt_tokens': sum(attempt['prompt_tokens'] for attempt in attempts),
+                'completion_tokens': sum(attempt['completion_tokens'] for attempt in attempts),
+                'failed_checks': count_failed_checks(attempts),
+            })
+        return rows
+
+def tier_token_usage(tier):
+    if callable(getattr(type(tier), 'token_usage', None)):
+        return tier.token_usage() or (0, 0)
+    return 0, 0
+
+def count_failed_checks(attempts):
+    counts = {}
+    for attempt in attempts:
+        if attempt['failed_check'] is not None:
+            counts[attempt['failed_check']] = counts.get(attempt['failed_check'], 0) + 1
+    return counts
+
+class ParseCheck:
+    # The answer parses as C without tree-sitter having to recover from errors
+    def __init__(self, lang="c"):
+        self.name = "parse"
+        self.parser = Parser()
+        self.parser.language = get_tree_sitter_language(lang)
+        # A parser can only parse one tree at a time
+        self.lock = threading.Lock()
+
+    def check(self, prediction):
+        if not prediction.strip():
+            return False
+        with self.lock:
+            tree = self.parser.parse(prediction.encode('utf-8'))
+        return not tree.root_node.has_error
+
+class CompileCheck:
+    # The answer compiles to an object file, nothing is linked or run
+    def __init__(self, subprocess, timeout=30):
+        self.name = "compile"
+        self.subprocess = subprocess
+        self.timeout = timeout
+
+    def check(self, prediction):
+        with tempfile.TemporaryDirectory(prefix='cascade-') as directory:
+            source_path = os.path.join(directory, 'prediction.c')
+            with open(source_path, 'w') as source_file:
+                source_file.write(prediction)
+            try:
+                result = self.subprocess.run(['gcc', '-c', '-w', '-o', os.path.join(directory, 'prediction.o'),
+                                              source_path],
+                                             stdout=self.subprocess.DEVNULL, stderr=self.subprocess.DEVNULL,
+                                             timeout=self.timeout)
+            except self.subprocess.TimeoutExpired:
+                return False
+        return result.returncode == 0
@@ -0,0 +1,51 @@
+import os
+from ..disassembler.disassembledfunction import functions_path, load_functions
+from ..artifacts import read_artifact
+from ..util import estimate_tokens
+
+class FunctionSlicer:
+    def __init__(self, token_budget=None, artifacts=None):
+        self.token_budget = token_budget
+        self.artifacts = artifacts
+
+    def create_prompts(self, base_prompt, disassembly_path):
+        path = functions_path(disassembly_path)
+        if not os.path.exists(path):
+            return [base_prompt.format(disassembly=read_artifact(self.artifacts, disassembly_path))]
+
+        functions = load_functions(path)
+        targets = [function for function in functions if not function.is_runtime()] or functions
+        if not targets:
+            return [base_prompt.format(disassembly=read_artifact(self.artifacts, disassembly_path))]
+
+        return [base_prompt.format(disassembly=chunk) for chunk in self.split(base_prompt, targets)]
+
+    def split(self, base_prompt, functions):
+        # Packs whole functions into as few prompts as the budget allows. A
+        # function that is larger than the budget on its own still gets a
+        # prompt, cutting it would leave the model with half a function.
+        chunks = []
+        chunk = []
+        for function in functions:
+            candidate = '\n\n'.join(chunk + [function.to_text()])
+            if chunk and self.token_budget is not None and \
+                    estimate_tokens(base_prompt.format(disassembly=candidate)) > self.token_budget:
+                chunks.append('\n\n'.join(chunk))
+                chunk = []
+            chunk.append(function.to_text())
+        chunks.append('\n\n'.join(chunk))
+        return chunks
+
+def stitch_predictions(predictions):
+    # Every part may repeat the same includes, keep the first of each
+    seen_includes = set()
+    lines = []
+    for prediction in predictions:
+        for line in prediction.strip('\n').split('\n'):
+            if line.strip().startswith('#include'):
+                if line.strip() in seen_includes:
+                    continue
+                seen_includes.add(line.strip())
+            lines.append(line)
+        lines.append('')
+    return '\n'.join(lines)
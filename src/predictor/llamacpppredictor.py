@@ -0,0 +1,96 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI
+from ..artifacts import read_artifact
+from ..util import hash_text
+from .functionslicer import stitch_predictions
+from .openaimodelpredictor import TokenCounter, clean_response
+
+class LlamaCppPredictor:
+    # Talks to a llama.cpp server through its OpenAI compatible endpoint. The
+    # server batches the requests of all its slots together, so the batch is
+    # sent with one request in flight per slot.
+    def __init__(self, base_url, model, temperature, base_prompt, parallel=4, max_tokens=2048, function_slicer=None,
+                 artifacts=None):
+        self.client = OpenAI(
+            api_key="local",
+            base_url=base_url
+        )
+        self.model = model
+        self.temperature = temperature
+        self.base_prompt = base_prompt
+        self.parallel = parallel
+        self.max_tokens = max_tokens
+        self.function_slicer = function_slicer
+        self.artifacts = artifacts
+        self.name = f"local-{model}"
+        self.tokens = TokenCounter()
+
+    def create_prompt(self, disassembly_path):
+        disassembly = read_artifact(self.artifacts, disassembly_path)
+        return self.base_prompt.format(disassembly=disassembly)
+
+    def create_prompts(self, disassembly_path):
+        if self.function_slicer is None:
+            return [self.create_prompt(disassembly_path)]
+        return self.function_slicer.create_prompts(self.base_prompt, disassembly_path)
+
+    def cache_key(self, binary_path, disassembly_path):
+        prompts = '\0'.join(self.create_prompts(disassembly_path))
+        # Answers are cut off at max_tokens, a larger limit asks again
+        return f"{self.name}|{self.temperature}|{self.max_tokens}|{hash_text(prompts)}"
+
+    def token_usage(self):
+        return self.tokens.current()
+
+    def generate_prediction(self, binary_path, disassembly_path):
+        return self.generate_predictions([(binary_path, disassembly_path)])[0]
+
+    def generate_predictions(self, requests):
+        prompts = [self.create_prompts(disassembly_path) for binary_path, disassembly_path in requests]
+
+        slots = queue.Queue()
+        for slot in range(self.parallel):
+            slots.put(slot)
+
+        def predict(prompt):
+            slot = slots.get()
+            try:
+                return self.request_prediction(prompt, slot)
+            finally:
+                slots.put(slot)
+
+        with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+            completions = list(executor.map(predict, [prompt for request_prompts in prompts for prompt in request_prompts]))
+
+        # Counted on the calling thread, like the other predictors
+        for _, usage in completions:
+            self.tokens.add(usage)
+        parts = [content for content, _ in completions]
+
+        predictions = []
+        for request_prompts in prompts:
+            request_parts, parts = parts[:len(request_prompts)], parts[len(request_prompts):]
+            predictions.append(request_parts[0] if len(request_parts) == 1 else stitch_predictions(request_parts))
+        return predictions
+
+    def request_prediction(self, prompt, slot):
+        # Every prompt starts with the same base prompt. Keeping the cache of a
+        # slot and sending requests to the same slots lets the server skip
+        # evaluating that prefix again.
+        chat_completion = self.client.chat.completions.create(
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt,
+                }
+            ],
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            extra_body={
+                "cache_prompt": True,
+                "id_slot": slot,
+            }
+        )
+        return clean_response(chat_completion.choices[0].message.content), chat_completion.usage
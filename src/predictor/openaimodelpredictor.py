@@ -1,19 +1,89 @@
+import threading
+import time
+from types import SimpleNamespace
 from openai import OpenAI
-from ..util import read_whole_file
+from ..artifacts import read_artifact
+from ..util import estimate_tokens, hash_text
+from .functionslicer import stitch_predictions
+
+# Most tokens the models answer with, by model name prefix
+model_output_limits = {
+    'gpt-3.5-turbo': 4096,
+    'gpt-4': 8192,
+    'gpt-4-turbo': 4096,
+    'gpt-4o': 16384,
+    'gpt-4o-mini': 16384,
+}
+default_output_limit = 4096
+
+def model_output_limit(model):
+    prefixes = [prefix for prefix in model_output_limits if model.startswith(prefix)]
+    if not prefixes:
+        return default_output_limit
+    return model_output_limits[max(prefixes, key=len)]
 
 class OpenAIModelPredictor:
-    def __init__(self, api_key, model, temperature, base_prompt):
+    # The model answers with a ```c block, a line with only ``` closes it
+    closing_fence_stops = ['\n```\n']
+
+    def __init__(self, api_key, model, temperature, base_prompt, function_slicer=None, stream=False,
+                 completion_token_ratio=1.0, min_completion_tokens=512, max_completion_tokens=None, artifacts=None):
         self.client = OpenAI(
             api_key=api_key
         )
         self.model = model
         self.temperature = temperature
         self.base_prompt = base_prompt
+        self.function_slicer = function_slicer
+        self.artifacts = artifacts
+        self.stream = stream
+        self.completion_token_ratio = completion_token_ratio
+        self.min_completion_tokens = min_completion_tokens
+        self.completion_token_limit = max_completion_tokens or model_output_limit(model)
         self.name = f"OpenAI-{model}"
+        self.tokens = TokenCounter()
+        # (time to first token, total) in seconds of every streamed request
+        self.latencies = []
+
+    def create_prompt(self, disassembly_path):
+        disassembly = read_artifact(self.artifacts, disassembly_path)
+        return self.base_prompt.format(disassembly=disassembly)
+
+    def create_prompts(self, disassembly_path):
+        if self.function_slicer is None:
+            return [self.create_prompt(disassembly_path)]
+        return self.function_slicer.create_prompts(self.base_prompt, disassembly_path)
+
+    def cache_key(self, binary_path, disassembly_path):
+        prompts = '\0'.join(self.create_prompts(disassembly_path))
+        # Streamed answers end at the code block and are cut off at the
+        # completion budget, so they are cached apart for every budget
+        mode = ''
+        if self.stream:
+            mode = f'|stream:{self.completion_token_ratio}:{self.min_completion_tokens}:{self.completion_token_limit}'
+        return f"{self.name}|{self.temperature}{mode}|{hash_text(prompts)}"
+
+    def token_usage(self):
+        return self.tokens.current()
 
     def generate_prediction(self, binary_path, disassembly_path):
-        disassembly = read_whole_file(disassembly_path)
-        prompt = self.base_prompt.format(disassembly=disassembly)
+        predictions = [self.request_prediction(prompt) for prompt in self.create_prompts(disassembly_path)]
+        if len(predictions) == 1:
+            return predictions[0]
+        return stitch_predictions(predictions)
+
+    def max_completion_tokens(self, prompt):
+        # The source is rarely longer than its disassembly, so the disassembly
+        # size bounds how much of an answer is worth paying for
+        disassembly_tokens = estimate_tokens(prompt) - estimate_tokens(self.base_prompt)
+        budget = max(self.min_completion_tokens, int(disassembly_tokens * self.completion_token_ratio))
+        # Larger requests are rejected by the API
+        return min(budget, self.completion_token_limit)
+
+    def request_prediction(self, prompt):
+        if self.stream:
+            return self.request_streamed_prediction(prompt)
+
         chat_completion = self.client.chat.completions.create(
             messages=[
                 {
@@ -24,12 +94,119 @@ class OpenAIModelPredictor:
             model=self.model,
             temperature=self.temperature
         )
-        response = chat_completion.choices[0].message.content.replace("```", "")
+        self.tokens.add(chat_completion.usage)
+        return clean_response(chat_completion.choices[0].message.content)
+
+    def request_streamed_prediction(self, prompt):
+        start = time.monotonic()
+        first_token = None
+        reader = CodeBlockReader()
+        usage = None
+        chunks = 0
+
+        stream = self.client.chat.completions.create(
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt,
+                }
+            ],
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_completion_tokens(prompt),
+            stop=self.closing_fence_stops,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        try:
+            for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+
+                if first_token is None:
+                    first_token = time.monotonic() - start
+                chunks += 1
+                if reader.feed(chunk.choices[0].delta.content):
+                    break
+        finally:
+            # Closing the response early cancels the rest of the completion
+            stream.close()
+
+        self.latencies.append((first_token, time.monotonic() - start))
+
+        # Usage only comes with the last chunk, estimate it when the stream was
+        # cut off. Chunks carry about one token each.
+        if usage is None:
+            usage = SimpleNamespace(prompt_tokens=estimate_tokens(prompt), completion_tokens=chunks)
+        self.tokens.add(usage)
+        return clean_response(reader.text())
+
+class TokenCounter:
+    # Counted per thread, so a span around a prediction made on one worker
+    # thread does not pick up the tokens of the other workers
+    def __init__(self):
+        self.local = threading.local()
+
+    def add(self, usage):
+        if usage is None:
+            return
+        prompt_tokens, completion_tokens = self.current()
+        self.local.prompt_tokens = prompt_tokens + (usage.prompt_tokens or 0)
+        self.local.completion_tokens = completion_tokens + (usage.completion_tokens or 0)
+
+    def current(self):
+        return getattr(self.local, 'prompt_tokens', 0), getattr(self.local, 'completion_tokens', 0)
+
+class CodeBlockReader:
+    # Follows a streamed answer line by line until its code block is closed.
+    # The prompt already opens a ```c block, so the answer may or may not
+    # open one itself.
+    def __init__(self):
+        self.lines = []
+        self.partial = ''
+        self.opened = False
+        self.closed = False
+
+    def feed(self, text):
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        for line in lines:
+            self.add_line(line)
+            if self.closed:
+                return True
+
+        # A fence after the code closes the block, whatever follows it on the line
+        if self.partial.strip().startswith('```') and self.in_block():
+            self.closed = True
+        return self.closed
+
+    def in_block(self):
+        return self.opened or any(line.strip() for line in self.lines)
+
+    def add_line(self, line):
+        if line.strip().startswith('```'):
+            if self.in_block():
+                self.closed = True
+                return
+            # Only blank lines can come before the opening fence
+            self.opened = True
+            self.lines = []
+        self.lines.append(line)
+
+    def text(self):
+        # The last line has no newline when the stream ended there
+        if not self.closed and self.partial:
+            self.add_line(self.partial)
+            self.partial = ''
+        return '\n'.join(self.lines) + '\n'
 
-        lines = response.split('\n')
-        if lines and lines[0].strip().lower() == "c":
-            lines = lines[1:]
+def clean_response(response):
+    response = response.replace("```", "")
 
-        response = "\n".join(lines)
+    lines = response.split('\n')
+    if lines and lines[0].strip().lower() == "c":
+        lines = lines[1:]
 
-        return response
+    return "\n".join(lines)
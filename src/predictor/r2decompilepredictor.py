@@ -1,9 +1,18 @@
+from ..util import hash_file
+
 class R2DecompilePredictor:
     def __init__(self, r2_runner):
         self.r2_runner = r2_runner
         self.name = "R2_decompile"
+        self.command = "aaa;pdg"
+        # Decompiles the binary itself, the disassembler output is not used
+        self.uses_disassembly = False
+
+    def cache_key(self, binary_path, disassembly_path):
+        return f"{self.name}|{self.command}|{hash_file(binary_path)}"
 
     def generate_prediction(self, binary_path, disassembly_path):
-        result, error = self.r2_runner.run_str("aaa;pdg", binary_path)
+        # A failed run raises instead of leaving its output in the cache
+        result, _ = self.r2_runner.run_str(self.command, binary_path, check=True)
 
         return result
@@ -1,10 +1,22 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
 class R2Runner:
-    def __init__(self, subprocess, r2_path="radare2", r2_default_flags="qc"):
+    def __init__(self, subprocess, r2_path="radare2", r2_default_flags="qc", session_pool=None):
         self.subprocess = subprocess
         self.r2_path = r2_path
         self.r2_default_flags = r2_default_flags
+        self.session_pool = session_pool
 
     def run(self, command, executable_path, output_path, error=None):
+        if self.session_pool is not None:
+            output = self.run_in_session(command, executable_path)
+            with open(output_path, 'w') as output_file:
+                output_file.write(output)
+            return
+
         if error is None:
             error = self.subprocess.DEVNULL
 
@@ -12,7 +24,133 @@ class R2Runner:
             self.subprocess.run([self.r2_path, f'-{self.r2_default_flags}', command, executable_path],
                                 stdout=output_file, stderr=error, check=True)
 
-    def run_str(self, command, executable_path):
-        result = self.subprocess.run([self.r2_path, f'-{self.r2_default_flags}', command, executable_path],
-                                     stdout=self.subprocess.PIPE, stderr=self.subprocess.PIPE, text=True)
+    def run_str(self, command, executable_path, check=False):
+        # check raises like run does when radare2 fails, instead of returning
+        # its partial output
+        if self.session_pool is not None:
+            return self.run_in_session(command, executable_path), ''
+
+        args = [self.r2_path, f'-{self.r2_default_flags}', command, executable_path]
+        result = self.subprocess.run(args, stdout=self.subprocess.PIPE, stderr=self.subprocess.PIPE, text=True)
+        if check and result.returncode != 0:
+            raise self.subprocess.CalledProcessError(result.returncode, args, result.stdout, result.stderr)
         return result.stdout, result.stderr
+
+    def run_in_session(self, command, executable_path):
+        with self.session_pool.session(executable_path) as session:
+            return session.cmd(command)
+
+    def close(self):
+        if self.session_pool is not None:
+            self.session_pool.close()
+
+class R2Session:
+    analysis_commands = ['aa', 'aaa', 'aaaa']
+
+    def __init__(self, subprocess, r2_path, executable_path):
+        self.executable_path = executable_path
+        self.analysis_level = 0
+        self.lock = threading.Lock()
+
+        # -0 makes radare2 end the output of every command with a null byte,
+        # the same protocol r2pipe uses
+        self.process = subprocess.Popen([r2_path, '-q0', executable_path],
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL)
+        self.read_response()
+
+    def cmd(self, command):
+        with self.lock:
+            command = self.skip_repeated_analysis(command)
+            if not command:
+                return ''
+
+            self.process.stdin.write(command.encode('utf-8') + b'\n')
+            self.process.stdin.flush()
+            return self.read_response()
+
+    def skip_repeated_analysis(self, command):
+        commands = []
+        for part in command.split(';'):
+            part = part.strip()
+            if part in self.analysis_commands:
+                level = self.analysis_commands.index(part) + 1
+                if level <= self.analysis_level:
+                    continue
+                self.analysis_level = level
+            commands.append(part)
+        return ';'.join(commands)
+
+    def read_response(self):
+        response = bytearray()
+        while True:
+            chunk = self.process.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError(f"radare2 session for {self.executable_path} exited unexpectedly")
+            response.extend(chunk)
+            if response.endswith(b'\x00'):
+                return response[:-1].decode('utf-8', errors='replace')
+
+    def close(self):
+        with self.lock:
+            try:
+                self.process.stdin.write(b'q!!\n')
+                self.process.stdin.flush()
+                self.process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.wait()
+
+class R2SessionPool:
+    def __init__(self, subprocess, r2_path="radare2", max_sessions=8):
+        self.subprocess = subprocess
+        self.r2_path = r2_path
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()
+        self.in_use = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def session(self, executable_path):
+        key, session = self.acquire(executable_path)
+        try:
+            yield session
+        finally:
+            self.release(key)
+
+    def acquire(self, executable_path):
+        # A rebuilt binary gets a fresh session instead of stale analysis
+        stat = os.stat(executable_path)
+        key = (os.path.abspath(executable_path), stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = R2Session(self.subprocess, self.r2_path, executable_path)
+                self.sessions[key] = session
+            self.sessions.move_to_end(key)
+            self.in_use[key] = self.in_use.get(key, 0) + 1
+            self.evict()
+            return key, session
+
+    def release(self, key):
+        with self.lock:
+            self.in_use[key] -= 1
+            if not self.in_use[key]:
+                del self.in_use[key]
+            self.evict()
+
+    def evict(self):
+        idle = [key for key in self.sessions if key not in self.in_use]
+        while len(self.sessions) > self.max_sessions and idle:
+            self.sessions.pop(idle.pop(0)).close()
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
@@ -0,0 +1,42 @@
+import importlib
+
+class Registry:
+    # Components by kind and name, as "module:attribute". Modules are only
+    # imported when a component is loaded, so a command does not pay for
+    # the dependencies of components it never uses.
+    def __init__(self):
+        self.components = {}
+
+    def register(self, kind, name, target):
+        self.components.setdefault(kind, {})[name] = target
+
+    def names(self, kind):
+        return list(self.components.get(kind, {}))
+
+    def load(self, kind, name):
+        target = self.components.get(kind, {}).get(name)
+        if target is None:
+            raise ValueError(f"Unknown {kind} {name}, expected one of: {', '.join(self.names(kind))}")
+
+        module_name, attribute = target.split(':')
+        return getattr(importlib.import_module(module_name), attribute)
+
+registry = Registry()
+registry.register('compiler', 'gcc', 'src.compiler.gcccompiler:GCCCompiler')
+registry.register('disassembler', 'objdump', 'src.disassembler.objdumpdisassembler:ObjdumpDisassembler')
+registry.register('disassembler', 'r2', 'src.disassembler.r2disassembler:R2Disassembler')
+registry.register('predictor', 'openai', 'src.predictor.openaimodelpredictor:OpenAIModelPredictor')
+registry.register('predictor', 'async-openai', 'src.predictor.asyncopenaimodelpredictor:AsyncOpenAIModelPredictor')
+registry.register('predictor', 'local', 'src.predictor.llamacpppredictor:LlamaCppPredictor')
+registry.register('predictor', 'r2-decompile', 'src.predictor.r2decompilepredictor:R2DecompilePredictor')
+registry.register('predictor', 'cascade', 'src.predictor.cascadepredictor:CascadePredictor')
+registry.register('check', 'parse', 'src.predictor.cascadepredictor:ParseCheck')
+registry.register('check', 'compile', 'src.predictor.cascadepredictor:CompileCheck')
+registry.register('deduplicator', 'minhash', 'src.deduplicator:DisassemblyDeduplicator')
+registry.register('evaluator', 'codebleu', 'src.evaluator.codebleuevaluator:CodeBleuEvaluator')
+registry.register('evaluator', 'parallel-codebleu', 'src.evaluator.parallelcodebleuevaluator:ParallelCodeBleuEvaluator')
+registry.register('evaluator', 'execution', 'src.evaluator.executionevaluator:ExecutionEvaluator')
+registry.register('metric', 'codebleu', 'codebleu:calc_codebleu')
+registry.register('reporter', 'samples', 'src.reporting:write_samples')
+registry.register('reporter', 'latex', 'src.reporting:codebleu_create_latex_table')
+registry.register('reporter', 'graph', 'src.reporting:codebleu_create_graph')
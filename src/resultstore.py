@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+
+class ResultStore:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+
+    def append(self, task, predictor=None, **fields):
+        line = json.dumps({'task': task, 'predictor': predictor, **fields})
+
+        with self.lock:
+            if self.file is None:
+                folder = os.path.dirname(self.path)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                # Line buffered, every record is on disk as soon as it is appended
+                self.file = open(self.path, 'a', buffering=1)
+                if not self.ends_with_newline():
+                    self.file.write('\n')
+            self.file.write(line + '\n')
+
+    def ends_with_newline(self):
+        # Starts a new line after a record cut off by an interrupted run
+        with open(self.path, 'rb') as file:
+            file.seek(0, os.SEEK_END)
+            if file.tell() == 0:
+                return True
+            file.seek(-1, os.SEEK_END)
+            return file.read(1) == b'\n'
+
+    def records(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'r') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def latest(self, field, predictor=None, corpus=False):
+        # Records are never rewritten, a later record for the same task and
+        # predictor replaces the value of an earlier one
+        values = {}
+        for record in self.records():
+            if field in record and record['predictor'] == predictor and (record['task'] is None) == corpus:
+                values[record['task']] = record[field]
+        return values
+
+    def references(self):
+        return self.latest('source')
+
+    def predictions(self, predictor_name):
+        return self.latest('prediction', predictor_name)
+
+    def corpus_results(self):
+        results = {}
+        for record in self.records():
+            if record['task'] is None and 'scores' in record:
+                results[record['predictor']] = record['scores']
+        return results
+
+    def sample_table(self, columns=None):
+        rows = {}
+        for record in self.records():
+            if record['task'] is not None and record['predictor'] is not None and 'scores' in record:
+                scores = record['scores']
+                if columns is not None:
+                    scores = {column: scores.get(column) for column in columns}
+                rows[(record['predictor'], record['task'])] = scores
+
+        # Imported here, commands that never build a table start faster
+        import pandas as pd
+        table = pd.DataFrame.from_dict(rows, orient='index', columns=columns)
+        table.index = pd.MultiIndex.from_tuples(list(rows), names=['predictor', 'task'])
+        return table
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def clear(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
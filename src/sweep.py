@@ -0,0 +1,115 @@
+import threading
+from .taskgraph import TaskGraph
+
+class SweepConfiguration:
+    def __init__(self, sources_path, strip, disassembler, data_path):
+        self.sources_path = sources_path
+        self.strip = strip
+        self.disassembler = disassembler
+        self.data_path = data_path
+
+    def build_key(self):
+        return (self.sources_path, self.strip)
+
+def uses_disassembly(predictor):
+    return getattr(predictor, 'uses_disassembly', True)
+
+class Sweep:
+    def __init__(self, create_pipeline, evaluate, jobs=None):
+        self.create_pipeline = create_pipeline
+        self.evaluate = evaluate
+        self.jobs = jobs
+        # The evaluator and the report plots are not safe to use from
+        # several threads at once
+        self.evaluate_lock = threading.Lock()
+
+    def build(self, configurations):
+        graph = TaskGraph()
+        pipelines = {}
+        primaries = {}
+        primary_disassemble_keys = {}
+
+        for configuration in configurations:
+            pipeline = self.create_pipeline(configuration)
+            pipelines[configuration.data_path] = pipeline
+            # The first configuration of every sources/strip pair compiles and
+            # runs the predictors that only look at the binary
+            primary = primaries.setdefault(configuration.build_key(), pipeline)
+
+            compile_key = graph.add(('compile',) + configuration.build_key(), self.compile_task(primary))
+            disassemble_key = graph.add(
+                    ('disassemble', configuration.data_path),
+                    self.disassemble_task(pipeline, primary),
+                    [compile_key])
+            primary_disassemble_key = primary_disassemble_keys.setdefault(configuration.build_key(), disassemble_key)
+
+            dependencies = [disassemble_key]
+            for predictor in pipeline.predictors:
+                if uses_disassembly(predictor):
+                    dependencies.append(graph.add(
+                            ('predict', configuration.data_path, predictor.name),
+                            self.predict_task(graph, pipeline, predictor, disassemble_key),
+                            [disassemble_key]))
+                else:
+                    # Waits for the disassembly of the primary, with --r2-sessions
+                    # both use the same radare2 session and the analysis of the
+                    # decompiler would change the disassembly
+                    dependencies.append(graph.add(
+                            ('predict',) + configuration.build_key() + (predictor.name,),
+                            self.predict_task(graph, primary, predictor, primary_disassemble_key),
+                            [primary_disassemble_key]))
+
+            graph.add(
+                    ('evaluate', configuration.data_path),
+                    self.evaluate_task(graph, configuration, pipeline, primary, dependencies),
+                    dependencies)
+
+        return graph, pipelines
+
+    def run(self, configurations, status_callback=None):
+        graph, pipelines = self.build(configurations)
+        for pipeline in pipelines.values():
+            pipeline.init_folders()
+            pipeline.clean_combined_files()
+
+        results = graph.run(self.jobs, status_callback)
+        return {configuration.data_path: results[('evaluate', configuration.data_path)]
+                for configuration in configurations}
+
+    def compile_task(self, pipeline):
+        def compile_sources():
+            return pipeline.compile_all(pipeline.get_sources(), self.jobs)
+        return compile_sources
+
+    def disassemble_task(self, pipeline, primary):
+        def disassemble():
+            sources = pipeline.get_sources()
+            if pipeline is primary:
+                executables = [pipeline.get_executable_name(source) for source in sources]
+            else:
+                executables = pipeline.copy_builds(primary, sources)
+
+            pipeline.disassemble_all(executables, self.jobs)
+            for source in sources:
+                pipeline.add_source_to_dataset(source)
+            return executables
+        return disassemble
+
+    def predict_task(self, graph, pipeline, predictor, executables_key):
+        def predict():
+            return pipeline.predict_all(graph.result(executables_key), predictor)
+        return predict
+
+    def evaluate_task(self, graph, configuration, pipeline, primary, dependencies):
+        def evaluate():
+            executables = graph.result(dependencies[0])
+            predictions = {}
+            for predictor, key in zip(pipeline.predictors, dependencies[1:]):
+                predictions[predictor.name] = graph.result(key)
+                if not uses_disassembly(predictor) and pipeline is not primary:
+                    pipeline.save_predictions(executables, predictor, predictions[predictor.name])
+
+            pipeline.add_predictions_to_combined_files(executables, predictions)
+            with self.evaluate_lock:
+                return self.evaluate(configuration, pipeline)
+        return evaluate
@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+class TaskGraph:
+    def __init__(self):
+        self.tasks = {}
+        self.dependencies = {}
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def add(self, key, function, dependencies=()):
+        # Adding the same key twice keeps the first task, so configurations
+        # that need the same work share one node
+        if key in self.tasks:
+            return key
+
+        for dependency in dependencies:
+            if dependency not in self.tasks:
+                raise ValueError(f"Task {key} depends on unknown task {dependency}")
+
+        self.tasks[key] = function
+        self.dependencies[key] = list(dependencies)
+        return key
+
+    def __contains__(self, key):
+        return key in self.tasks
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def result(self, key):
+        with self.lock:
+            return self.results[key]
+
+    def run(self, jobs=None, status_callback=None):
+        remaining = {key: set(dependencies) for key, dependencies in self.dependencies.items()}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            while remaining or running:
+                for key in [key for key, dependencies in remaining.items() if not dependencies]:
+                    del remaining[key]
+                    running[executor.submit(self.tasks[key])] = key
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = running.pop(future)
+                    # Stops scheduling new tasks, the ones already running
+                    # finish when the executor shuts down
+                    result = future.result()
+                    with self.lock:
+                        self.results[key] = result
+                    for dependencies in remaining.values():
+                        dependencies.discard(key)
+                    if status_callback:
+                        status_callback(key)
+
+        return self.results
@@ -0,0 +1,169 @@
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+
+summary_headers = ['stage', 'predictor', 'count', 'p50 (s)', 'p95 (s)', 'max (s)', 'total (s)', 'cpu (s)',
+                   'child peak RSS (MB)', 'prompt tokens', 'completion tokens']
+
+def read_io_counters():
+    # Characters read and written through syscalls, including reaped child
+    # processes. Only available on Linux.
+    try:
+        with open('/proc/self/io', 'r') as file:
+            counters = dict(line.split(': ') for line in file.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def children_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def children_max_rss_kb():
+    # The high-water mark of all child processes that have exited so far,
+    # not of the children of one span
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+def token_usage(predictor):
+    if predictor is None or not callable(getattr(type(predictor), 'token_usage', None)):
+        return None
+    return predictor.token_usage()
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+class Tracer:
+    def __init__(self, trace_path=None, profile_path=None):
+        self.trace_path = trace_path
+        self.profile_path = profile_path
+        self.spans = []
+        self.profiles = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage, item=None, predictor=None):
+        # Counters for I/O and child processes are process wide, spans that
+        # overlap in parallel runs share them
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        children_cpu_start = children_cpu_seconds()
+        children_rss_start = children_max_rss_kb()
+        io_start = read_io_counters()
+        tokens_start = token_usage(predictor)
+
+        profiler = self.start_profiler()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self.local.profiling = False
+
+            wall_end = time.perf_counter()
+            children_rss_end = children_max_rss_kb()
+            io_end = read_io_counters()
+            tokens_end = token_usage(predictor)
+
+            span = {
+                'stage': stage,
+                'item': item,
+                'predictor': getattr(predictor, 'name', None),
+                'thread': threading.get_ident(),
+                'start': wall_start - self.start,
+                'wall_seconds': wall_end - wall_start,
+                'cpu_seconds': time.thread_time() - cpu_start,
+                'children_cpu_seconds': children_cpu_seconds() - children_cpu_start,
+                # Only known when a child of the span raised the high-water
+                # mark, smaller children are hidden behind earlier ones
+                'children_peak_rss_kb': children_rss_end if children_rss_end > children_rss_start else None,
+                'bytes_read': None if io_start is None else io_end[0] - io_start[0],
+                'bytes_written': None if io_start is None else io_end[1] - io_start[1],
+                'prompt_tokens': None if tokens_start is None else tokens_end[0] - tokens_start[0],
+                'completion_tokens': None if tokens_start is None else tokens_end[1] - tokens_start[1],
+            }
+
+            with self.lock:
+                self.spans.append(span)
+                if profiler is not None:
+                    if stage in self.profiles:
+                        self.profiles[stage].add(profiler)
+                    else:
+                        import pstats
+                        self.profiles[stage] = pstats.Stats(profiler)
+
+    def start_profiler(self):
+        # Only the outermost span of a thread is profiled, a thread can only
+        # run one profiler at a time
+        if self.profile_path is None or getattr(self.local, 'profiling', False):
+            return None
+
+        # The profilers are only imported with --profile, they add to the
+        # start-up time of every command
+        import cProfile
+        self.local.profiling = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def summary(self):
+        groups = {}
+        with self.lock:
+            for span in self.spans:
+                groups.setdefault((span['stage'], span['predictor']), []).append(span)
+
+        rows = []
+        for (stage, predictor), spans in groups.items():
+            wall_seconds = [span['wall_seconds'] for span in spans]
+            peak_rss = [span['children_peak_rss_kb'] for span in spans if span['children_peak_rss_kb'] is not None]
+            rows.append([
+                stage,
+                predictor or '',
+                len(spans),
+                percentile(wall_seconds, 0.5),
+                percentile(wall_seconds, 0.95),
+                max(wall_seconds),
+                sum(wall_seconds),
+                sum(span['cpu_seconds'] + span['children_cpu_seconds'] for span in spans),
+                max(peak_rss) / 1024 if peak_rss else None,
+                sum(span['prompt_tokens'] or 0 for span in spans),
+                sum(span['completion_tokens'] or 0 for span in spans),
+            ])
+        return rows
+
+    def write(self):
+        if self.trace_path is not None:
+            self.write_trace()
+        if self.profile_path is not None:
+            self.write_profiles()
+
+    def write_trace(self):
+        # Chrome trace event format, opens in chrome://tracing and Perfetto
+        with self.lock:
+            events = [{
+                'name': span['stage'] if span['predictor'] is None else f"{span['stage']}:{span['predictor']}",
+                'cat': span['stage'],
+                'ph': 'X',
+                'ts': span['start'] * 1e6,
+                'dur': span['wall_seconds'] * 1e6,
+                'pid': os.getpid(),
+                'tid': span['thread'],
+                'args': span,
+            } for span in self.spans]
+
+        folder = os.path.dirname(self.trace_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.trace_path, 'w') as file:
+            json.dump({'traceEvents': events}, file)
+
+    def write_profiles(self):
+        os.makedirs(self.profile_path, exist_ok=True)
+        with self.lock:
+            for stage, stats in self.profiles.items():
+                stats.dump_stats(os.path.join(self.profile_path, f'{stage}.prof'))
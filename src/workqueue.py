@@ -0,0 +1,225 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+class QueuedTask:
+    def __init__(self, key, kind, payload, attempts):
+        self.key = key
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+
+class WorkQueue:
+    # Tasks in a SQLite file that workers in other processes, or on other
+    # machines sharing the file system, lease one at a time. A lease that is
+    # not renewed runs out, so the task of a worker that died is handed to
+    # the next worker.
+    def __init__(self, path, lease_seconds=60, max_attempts=3, clock=time.time):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.lock = threading.Lock()
+
+        # Transactions are started explicitly, BEGIN IMMEDIATE takes the write
+        # lock up front so two workers can't lease the same task
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                dependency TEXT,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                worker TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS config (id INTEGER PRIMARY KEY, config TEXT NOT NULL)")
+
+    def transaction(self):
+        return Transaction(self)
+
+    def put_config(self, config):
+        with self.transaction():
+            self.connection.execute("INSERT OR REPLACE INTO config VALUES (0, ?)", (json.dumps(config),))
+
+    def get_config(self):
+        with self.lock:
+            row = self.connection.execute("SELECT config FROM config WHERE id = 0").fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def clear(self):
+        with self.transaction():
+            self.connection.execute("DELETE FROM tasks")
+            self.connection.execute("DELETE FROM config")
+
+    def enqueue(self, key, kind, payload, dependency=None):
+        with self.transaction():
+            self.connection.execute(
+                "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, 'pending', 0, NULL, NULL, NULL, NULL)",
+                (key, kind, json.dumps(payload), dependency))
+        return key
+
+    def lease(self, worker):
+        now = self.clock()
+        with self.transaction():
+            self.expire_leases(now)
+            row = self.connection.execute("""
+                SELECT key, kind, payload, attempts FROM tasks
+                WHERE status = 'pending'
+                AND (dependency IS NULL OR dependency IN (SELECT key FROM tasks WHERE status = 'done'))
+                ORDER BY rowid LIMIT 1""").fetchone()
+            if row is None:
+                return None
+
+            key, kind, payload, attempts = row
+            self.connection.execute(
+                "UPDATE tasks SET status = 'leased', attempts = ?, worker = ?, lease_expires = ? WHERE key = ?",
+                (attempts + 1, worker, now + self.lease_seconds, key))
+        return QueuedTask(key, kind, json.loads(payload), attempts + 1)
+
+    def expire_leases(self, now):
+        # Called inside a lease transaction
+        self.connection.execute("""
+            UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                             error = 'lease expired', worker = NULL
+            WHERE status = 'leased' AND lease_expires < ?""", (self.max_attempts, now))
+        # Tasks that depend on a failed task can never run
+        while self.connection.execute("""
+                UPDATE tasks SET status = 'failed', error = 'dependency ' || dependency || ' failed'
+                WHERE status = 'pending' AND dependency IN (SELECT key FROM tasks WHERE status = 'failed')
+                """).rowcount:
+            pass
+
+    def heartbeat(self, key, worker):
+        # False when the lease ran out and the task went to another worker
+        with self.transaction():
+            return self.connection.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE key = ? AND worker = ? AND status = 'leased'",
+                (self.clock() + self.lease_seconds, key, worker)).rowcount == 1
+
+    def complete(self, key, worker, result):
+        with self.transaction():
+            return self.connection.execute(
+                "UPDATE tasks SET status = 'done', result = ?, error = NULL WHERE key = ? AND worker = ? "
+                "AND status = 'leased'",
+                (json.dumps(result), key, worker)).rowcount == 1
+
+    def fail(self, key, worker, error):
+        with self.transaction():
+            return self.connection.execute("""
+                UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                                 error = ?, worker = NULL
+                WHERE key = ? AND worker = ? AND status = 'leased'""",
+                (self.max_attempts, error, key, worker)).rowcount == 1
+
+    def counts(self):
+        with self.transaction():
+            self.expire_leases(self.clock())
+            rows = self.connection.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def is_finished(self):
+        counts = self.counts()
+        return not counts.get('pending') and not counts.get('leased')
+
+    def results(self, kind=None):
+        query = "SELECT key, result FROM tasks WHERE status = 'done'"
+        parameters = []
+        if kind is not None:
+            query += " AND kind = ?"
+            parameters.append(kind)
+        with self.lock:
+            return {key: json.loads(result) for key, result in self.connection.execute(query, parameters)}
+
+    def failures(self):
+        with self.lock:
+            return dict(self.connection.execute("SELECT key, error FROM tasks WHERE status = 'failed'"))
+
+    def close(self):
+        self.connection.close()
+
+class Transaction:
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __enter__(self):
+        self.queue.lock.acquire()
+        try:
+            self.queue.connection.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.queue.lock.release()
+            raise
+
+    def __exit__(self, exception_type, exception, traceback):
+        try:
+            self.queue.connection.execute("ROLLBACK" if exception_type else "COMMIT")
+        finally:
+            self.queue.lock.release()
+
+class Worker:
+    def __init__(self, queue, handlers, name=None, poll_interval=1.0):
+        self.queue = queue
+        self.handlers = handlers
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.completed = 0
+        self.failed = 0
+
+    def run(self, status_callback=None):
+        # Runs until no task is pending or leased by another worker
+        while True:
+            task = self.queue.lease(self.name)
+            if task is None:
+                if self.queue.is_finished():
+                    return self.completed
+                time.sleep(self.poll_interval)
+                continue
+
+            with Heartbeat(self.queue, task.key, self.name):
+                try:
+                    result = self.handlers[task.kind](task.payload)
+                except Exception as error:
+                    self.failed += 1
+                    self.queue.fail(task.key, self.name, f"{type(error).__name__}: {error}")
+                    if status_callback:
+                        status_callback(task, error)
+                    continue
+
+            if self.queue.complete(task.key, self.name, result):
+                self.completed += 1
+            if status_callback:
+                status_callback(task, None)
+
+class Heartbeat:
+    # Renews the lease of a task from a background thread while it runs
+    def __init__(self, queue, key, worker):
+        self.queue = queue
+        self.key = key
+        self.worker = worker
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(self.key, self.worker):
+                return
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        self.thread.join()
@@ -0,0 +1,81 @@
+import os
+import pytest
+from src.artifacts import ArtifactStore, read_artifact
+from src.util import hash_file, hash_text, read_whole_file
+
+def test_put_is_read_from_memory_and_written_in_background(tmp_path):
+    path = os.path.join(tmp_path, "disassembly.txt")
+    artifacts = ArtifactStore()
+
+    artifacts.put(path, "text")
+
+    assert artifacts.read(path) == "text"
+    assert artifacts.exists(path)
+    artifacts.flush()
+    assert read_whole_file(path) == "text"
+    assert not os.path.exists(f"{path}.tmp")
+    artifacts.close()
+
+def test_read_falls_back_to_file(tmp_path):
+    path = os.path.join(tmp_path, "prediction.c")
+    with open(path, 'w') as file:
+        file.write("on disk")
+    artifacts = ArtifactStore()
+
+    assert artifacts.read(path) == "on disk"
+    assert read_artifact(None, path) == "on disk"
+    assert artifacts.hash(path) == hash_file(path)
+    assert not artifacts.exists(os.path.join(tmp_path, "missing"))
+    artifacts.close()
+
+def test_hash_matches_hash_of_written_file(tmp_path):
+    path = os.path.join(tmp_path, "disassembly.txt")
+    artifacts = ArtifactStore()
+
+    artifacts.put(path, "line\n" * 100)
+    in_memory = artifacts.hash(path)
+    artifacts.close()
+
+    assert in_memory == hash_file(path) == hash_text("line\n" * 100)
+
+def test_no_persist_keeps_text_in_memory_only(tmp_path):
+    path = os.path.join(tmp_path, "disassembly.txt")
+    artifacts = ArtifactStore(persist=False)
+
+    artifacts.put(path, "text")
+    artifacts.close()
+
+    assert artifacts.read(path) == "text"
+    assert not os.path.exists(path)
+
+def test_write_error_is_raised_on_flush(tmp_path):
+    artifacts = ArtifactStore()
+    artifacts.put(os.path.join(tmp_path, "missing", "disassembly.txt"), "text")
+
+    with pytest.raises(FileNotFoundError):
+        artifacts.flush()
+    artifacts.close()
+
+def test_when_written_runs_after_earlier_writes(tmp_path):
+    path = os.path.join(tmp_path, "disassembly.txt")
+    artifacts = ArtifactStore()
+    written = []
+
+    artifacts.put(path, "text")
+    artifacts.when_written(lambda: written.append(read_whole_file(path)))
+    artifacts.flush()
+
+    assert written == ["text"]
+    artifacts.close()
+
+def test_when_written_skipped_after_write_error(tmp_path):
+    artifacts = ArtifactStore()
+    written = []
+
+    artifacts.put(os.path.join(tmp_path, "missing", "disassembly.txt"), "text")
+    artifacts.when_written(lambda: written.append(True))
+
+    with pytest.raises(FileNotFoundError):
+        artifacts.flush()
+    assert written == []
+    artifacts.close()
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import os
+import pytest
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+from src.predictor.asyncopenaimodelpredictor import AsyncOpenAIModelPredictor, RateLimiter
+from src.predictor.batcherror import BatchPredictionError
+
+base_promt = "test prompt with code: {disassembly}\nend"
+
+class StubOpenAIServer:
+    def __init__(self, failures=None, delay=0.05):
+        # failures maps a disassembly to the status codes returned before it succeeds
+        self.failures = dict(failures or {})
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []
+        self.bodies = []
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                prompt = body['messages'][0]['content']
+                code = prompt.split(': ', 1)[1].split('\n')[0]
+
+                with stub.lock:
+                    stub.requests.append(code)
+                    stub.bodies.append(body)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    pending_failures = stub.failures.get(code, [])
+                    status = pending_failures.pop(0) if pending_failures else 200
+
+                time.sleep(stub.delay)
+
+                with stub.lock:
+                    stub.in_flight -= 1
+
+                if status == 200:
+                    payload = {
+                        "id": "stub",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": body['model'],
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": f"```c\nprediction for {code}\n```"},
+                            "finish_reason": "stop"
+                        }],
+                        "usage": {"prompt_tokens": 10, "completion_tokens": 4, "total_tokens": 14}
+                    }
+                else:
+                    payload = {"error": {"message": "stub error", "type": "stub"}}
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+def write_disassemblies(tmp_path, count):
+    requests = []
+    for index in range(count):
+        disassembly_path = tmp_path / f"task_{index}_d.txt"
+        disassembly_path.write_text(f"code{index}")
+        requests.append((str(tmp_path / f"task_{index}"), str(disassembly_path)))
+    return requests
+
+def create_predictor(server, **kwargs):
+    return AsyncOpenAIModelPredictor("replace_me", "test-model", 0, base_promt,
+                                     base_url=server.base_url, initial_backoff=0.01, **kwargs)
+
+def test_generate_predictions_keeps_order_and_caps_in_flight(tmp_path):
+    requests = write_disassemblies(tmp_path, 12)
+
+    with StubOpenAIServer() as server:
+        predictor = create_predictor(server, max_in_flight=3)
+        predictions = predictor.generate_predictions(requests)
+
+    assert predictions == [f"prediction for code{index}\n" for index in range(12)]
+    assert len(server.requests) == 12
+    assert 1 < server.max_in_flight <= 3
+
+def test_generate_predictions_counts_tokens(tmp_path):
+    requests = write_disassemblies(tmp_path, 3)
+
+    with StubOpenAIServer() as server:
+        predictor = create_predictor(server)
+        predictor.generate_predictions(requests)
+
+    assert predictor.token_usage() == (30, 12)
+
+def test_generate_predictions_stitches_split_binaries(tmp_path):
+    requests = write_disassemblies(tmp_path, 3)
+    function_slicer = MagicMock()
+    function_slicer.create_prompts.side_effect = lambda base_prompt, disassembly_path: \
+            [base_prompt.format(disassembly=f"{os.path.basename(disassembly_path)}:{part}")
+             for part in range(2 if disassembly_path.endswith("task_1_d.txt") else 1)]
+
+    with StubOpenAIServer() as server:
+        predictor = create_predictor(server, function_slicer=function_slicer)
+        predictions = predictor.generate_predictions(requests)
+
+    assert len(server.requests) == 4
+    assert predictions == [
+        "prediction for task_0_d.txt:0\n",
+        "prediction for task_1_d.txt:0\n\nprediction for task_1_d.txt:1\n",
+        "prediction for task_2_d.txt:0\n",
+    ]
+
+def test_generate_predictions_runs_concurrently(tmp_path):
+    requests = write_disassemblies(tmp_path, 8)
+
+    with StubOpenAIServer(delay=0.2) as server:
+        predictor = create_predictor(server, max_in_flight=8)
+        predictor.generate_predictions(requests)
+
+    # Counted by the server, so a slow machine can't make it fail
+    assert server.max_in_flight > 1, "Requests were not sent concurrently"
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_generate_predictions_retries(tmp_path, status):
+    requests = write_disassemblies(tmp_path, 3)
+
+    with StubOpenAIServer(failures={"code1": [status, status]}) as server:
+        predictor = create_predictor(server)
+        predictions = predictor.generate_predictions(requests)
+
+    assert predictions[1] == "prediction for code1\n"
+    assert server.requests.count("code1") == 3
+    assert predictor.retries == 2
+
+def test_generate_predictions_does_not_retry_client_errors(tmp_path):
+    requests = write_disassemblies(tmp_path, 1)
+
+    with StubOpenAIServer(failures={"code0": [400]}) as server:
+        predictor = create_predictor(server)
+        with pytest.raises(Exception):
+            predictor.generate_predictions(requests)
+
+    assert server.requests == ["code0"]
+
+def test_generate_predictions_keeps_answers_of_failed_batch(tmp_path):
+    requests = write_disassemblies(tmp_path, 3)
+
+    with StubOpenAIServer(failures={"code1": [400]}) as server:
+        predictor = create_predictor(server)
+        with pytest.raises(BatchPredictionError) as error:
+            predictor.generate_predictions(requests)
+
+    assert error.value.predictions == ["prediction for code0\n", None, "prediction for code2\n"]
+    assert list(error.value.errors) == [1]
+
+def test_generate_predictions_gives_up_after_max_retries(tmp_path):
+    requests = write_disassemblies(tmp_path, 1)
+
+    with StubOpenAIServer(failures={"code0": [429] * 10}) as server:
+        predictor = create_predictor(server, max_retries=2)
+        with pytest.raises(Exception):
+            predictor.generate_predictions(requests)
+
+    assert len(server.requests) == 3
+
+def test_generate_prediction_single(tmp_path):
+    binary_path, disassembly_path = write_disassemblies(tmp_path, 1)[0]
+
+    with StubOpenAIServer() as server:
+        prediction = create_predictor(server).generate_prediction(binary_path, disassembly_path)
+
+    assert prediction == "prediction for code0\n"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_rate_limiter_requests_per_minute():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=2, clock=clock)
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock.now += seconds
+
+    async def run():
+        with patch("asyncio.sleep", fake_sleep):
+            for _ in range(3):
+                await limiter.acquire(1)
+
+    asyncio.run(run())
+
+    assert sleeps == [60.0]
+
+def test_rate_limiter_tokens_per_minute():
+    clock = FakeClock()
+    limiter = RateLimiter(tokens_per_minute=100, clock=clock)
+
+    async def run():
+        await limiter.acquire(60)
+        clock.now = 10
+        assert not limiter.has_budget(60)
+        assert limiter.has_budget(40)
+
+    asyncio.run(run())
+
+def test_rate_limiter_lets_oversized_request_through_when_idle():
+    limiter = RateLimiter(tokens_per_minute=10)
+    assert limiter.has_budget(1000)
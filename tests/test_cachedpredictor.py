@@ -0,0 +1,99 @@
+import os
+import pytest
+from src.predictioncache import PredictionCache
+from src.predictor.batcherror import BatchPredictionError
+from src.predictor.cachedpredictor import CachedBatchPredictor, CachedPredictor, create_cached_predictor
+from unittest.mock import MagicMock
+
+class FakePredictor:
+    def __init__(self, name="fake"):
+        self.name = name
+        self.calls = []
+
+    def cache_key(self, binary_path, disassembly_path):
+        return f"{self.name}|{binary_path}"
+
+    def generate_prediction(self, binary_path, disassembly_path):
+        self.calls.append(binary_path)
+        return f"prediction for {binary_path}"
+
+class FakeBatchPredictor(FakePredictor):
+    def generate_predictions(self, requests):
+        self.calls.append([binary_path for binary_path, _ in requests])
+        return [f"prediction for {binary_path}" for binary_path, _ in requests]
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PredictionCache(os.path.join(tmp_path, "cache.sqlite"))
+    yield cache
+    cache.close()
+
+def test_create_cached_predictor(cache):
+    assert type(create_cached_predictor(FakePredictor(), cache)) is CachedPredictor
+    assert type(create_cached_predictor(FakeBatchPredictor(), cache)) is CachedBatchPredictor
+
+def test_generate_prediction_uses_cache(cache):
+    predictor = FakePredictor()
+    cached_predictor = create_cached_predictor(predictor, cache)
+
+    first = cached_predictor.generate_prediction("a.o", "a_d.txt")
+    second = cached_predictor.generate_prediction("a.o", "a_d.txt")
+
+    assert first == second == "prediction for a.o"
+    assert predictor.calls == ["a.o"]
+    assert cached_predictor.name == predictor.name
+    assert (cached_predictor.hits, cached_predictor.misses) == (1, 1)
+
+def test_cache_is_keyed_on_predictor(cache):
+    first = FakePredictor("first")
+    second = FakePredictor("second")
+
+    create_cached_predictor(first, cache).generate_prediction("a.o", "a_d.txt")
+    create_cached_predictor(second, cache).generate_prediction("a.o", "a_d.txt")
+
+    assert first.calls == ["a.o"]
+    assert second.calls == ["a.o"]
+
+def test_cache_key_is_the_predictor_key(cache):
+    predictor = FakePredictor()
+
+    # The manifest hashes cache_key, so a cached resume matches an uncached run
+    assert create_cached_predictor(predictor, cache).cache_key("a.o", "a_d.txt") == \
+            predictor.cache_key("a.o", "a_d.txt")
+
+def test_generate_predictions_only_sends_misses(cache):
+    predictor = FakeBatchPredictor()
+    cached_predictor = create_cached_predictor(predictor, cache)
+    cached_predictor.generate_prediction("b.o", "b_d.txt")
+
+    predictions = cached_predictor.generate_predictions([("a.o", "a_d.txt"), ("b.o", "b_d.txt"), ("c.o", "c_d.txt")])
+
+    assert predictions == ["prediction for a.o", "prediction for b.o", "prediction for c.o"]
+    assert predictor.calls == ["b.o", ["a.o", "c.o"]]
+
+def test_generate_predictions_all_cached(cache):
+    predictor = FakeBatchPredictor()
+    cached_predictor = create_cached_predictor(predictor, cache)
+    requests = [("a.o", "a_d.txt"), ("b.o", "b_d.txt")]
+    cached_predictor.generate_predictions(requests)
+
+    predictions = cached_predictor.generate_predictions(requests)
+
+    assert predictions == ["prediction for a.o", "prediction for b.o"]
+    assert predictor.calls == [["a.o", "b.o"]]
+    assert cached_predictor.hits == 2
+
+def test_generate_predictions_caches_answers_of_failed_batch(cache):
+    predictor = FakeBatchPredictor()
+    cached = CachedBatchPredictor(predictor, cache)
+    cached.generate_predictions([("a", "a_d.txt")])
+    failing = MagicMock(side_effect=BatchPredictionError(["prediction for b", None], {1: RuntimeError("400")}))
+    predictor.generate_predictions = failing
+
+    with pytest.raises(BatchPredictionError) as error:
+        cached.generate_predictions([("a", "a_d.txt"), ("b", "b_d.txt"), ("c", "c_d.txt")])
+
+    assert error.value.predictions == ["prediction for a", "prediction for b", None]
+    assert list(error.value.errors) == [2]
+    assert cache.get(cached.storage_key("b", "b_d.txt")) == "prediction for b"
+    assert cache.get(cached.storage_key("c", "c_d.txt")) is None
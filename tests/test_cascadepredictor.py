@@ -0,0 +1,99 @@
+import subprocess
+from unittest.mock import MagicMock
+from src.predictor.cascadepredictor import CascadePredictor, CompileCheck, ParseCheck
+
+valid_code = "int sum(int a, int b) { return a + b; }\n"
+broken_code = "int sum(int a, int b) { return a + ; \n"
+
+class FakeModel:
+    def __init__(self, name, prediction, tokens=(0, 0)):
+        self.name = name
+        self.prediction = prediction
+        self.tokens = tokens
+        self.usage = (0, 0)
+        self.calls = 0
+
+    def cache_key(self, binary_path, disassembly_path):
+        return f"{self.name}|{binary_path}"
+
+    def token_usage(self):
+        return self.usage
+
+    def generate_prediction(self, binary_path, disassembly_path):
+        self.calls += 1
+        self.usage = (self.usage[0] + self.tokens[0], self.usage[1] + self.tokens[1])
+        return self.prediction
+
+def test_stops_at_first_tier_that_passes():
+    tiers = [FakeModel('r2', valid_code), FakeModel('gpt-4o', "other")]
+    cascade = CascadePredictor(tiers, [ParseCheck()])
+
+    assert cascade.generate_prediction("builds/task_a", "task_a_d.txt") == valid_code
+    assert tiers[1].calls == 0
+    assert cascade.history[0]['accepted'] == 'r2'
+    assert cascade.history[0]['binary'] == 'task_a'
+
+def test_escalates_when_a_check_fails():
+    tiers = [FakeModel('cheap', broken_code, (100, 10)), FakeModel('expensive', valid_code, (100, 50))]
+    cascade = CascadePredictor(tiers, [ParseCheck()])
+
+    assert cascade.generate_prediction("builds/task_a", "task_a_d.txt") == valid_code
+    assert cascade.generate_prediction("builds/task_b", "task_b_d.txt") == valid_code
+
+    cheap, expensive = cascade.statistics()
+    assert cheap['requests'] == 2
+    assert cheap['accepted'] == 0
+    assert cheap['hit_rate'] == 0.0
+    assert cheap['failed_checks'] == {'parse': 2}
+    assert (cheap['prompt_tokens'], cheap['completion_tokens']) == (200, 20)
+    assert expensive['hit_rate'] == 1.0
+    assert (expensive['prompt_tokens'], expensive['completion_tokens']) == (200, 100)
+    assert cascade.token_usage() == (400, 120)
+
+def test_keeps_last_answer_when_no_tier_passes():
+    tiers = [FakeModel('cheap', ""), FakeModel('expensive', broken_code)]
+    cascade = CascadePredictor(tiers, [ParseCheck()])
+
+    assert cascade.generate_prediction("builds/task_a", "task_a_d.txt") == broken_code
+    assert cascade.history[0]['accepted'] is None
+    assert [attempt['failed_check'] for attempt in cascade.history[0]['attempts']] == ['parse', 'parse']
+
+def test_checks_run_in_order_and_stop_at_first_failure():
+    first = MagicMock()
+    first.name = 'first'
+    first.check.return_value = False
+    second = MagicMock()
+    cascade = CascadePredictor([FakeModel('model', valid_code)], [first, second])
+
+    cascade.generate_prediction("builds/task_a", "task_a_d.txt")
+
+    second.check.assert_not_called()
+    assert cascade.history[0]['attempts'][0]['failed_check'] == 'first'
+
+def test_cache_key_covers_tiers_and_checks():
+    tiers = [FakeModel('cheap', valid_code), FakeModel('expensive', valid_code)]
+
+    key = CascadePredictor(tiers, [ParseCheck()]).cache_key("builds/task_a", "task_a_d.txt")
+
+    assert key == "cascade|parse|cheap|builds/task_a|expensive|builds/task_a"
+    assert key != CascadePredictor(tiers[1:], [ParseCheck()]).cache_key("builds/task_a", "task_a_d.txt")
+
+def test_parse_check():
+    check = ParseCheck()
+
+    assert check.check(valid_code)
+    assert not check.check(broken_code)
+    assert not check.check("  \n")
+
+def test_compile_check():
+    check = CompileCheck(subprocess)
+
+    assert check.check(valid_code)
+    assert not check.check("int sum(int a, int b) { return a + c; }\n")
+
+def test_compile_check_timeout():
+    mock_subprocess = MagicMock()
+    mock_subprocess.TimeoutExpired = subprocess.TimeoutExpired
+    mock_subprocess.run.side_effect = subprocess.TimeoutExpired('gcc', 30)
+
+    assert not CompileCheck(mock_subprocess).check(valid_code)
@@ -62,3 +62,76 @@ def test_evaluate_integration(prediction_filename, expected_score):
     assert isinstance(result['syntax_match_score'], (int, float)), "Value is not a number"
     assert isinstance(result['dataflow_match_score'], (int, float)), "Value is not a number"
     assert result == expected_score, f'Unexpected score: {result}'
+
+def read_lines(filename):
+    return read_whole_file(os.path.join(test_sample_path, filename)).splitlines()
+
+@pytest.mark.parametrize("prediction_filename", ["r2_predictions.txt", "references.txt"])
+def test_evaluate_samples_matches_calc_codebleu(prediction_filename):
+    references = read_lines('references.txt')
+    predictions = read_lines(prediction_filename)
+    evaluator = CodeBleuEvaluator(calc_codebleu)
+
+    samples = evaluator.evaluate_samples(references, predictions, index=['a', 'b', 'c', 'd'])
+
+    assert list(samples.index) == ['a', 'b', 'c', 'd']
+    for task, reference, prediction in zip(samples.index, references, predictions):
+        expected = calc_codebleu([reference], [prediction], lang="c")
+        for key, value in expected.items():
+            assert samples.loc[task, key] == pytest.approx(value), f'Unexpected {key} for {task}'
+
+@pytest.mark.parametrize("prediction_filename", ["r2_predictions.txt", "references.txt"])
+def test_corpus_scores_matches_calc_codebleu(prediction_filename):
+    references = read_lines('references.txt')
+    predictions = read_lines(prediction_filename)
+    evaluator = CodeBleuEvaluator(calc_codebleu)
+
+    samples = evaluator.evaluate_samples(references, predictions)
+    result = evaluator.corpus_scores(samples)
+
+    assert result == pytest.approx(calc_codebleu(references, predictions, lang="c"))
+    assert list(result.keys()) == ['codebleu', 'ngram_match_score', 'weighted_ngram_match_score',
+                                   'syntax_match_score', 'dataflow_match_score']
+
+def test_scores_match_calc_codebleu_for_short_predictions():
+    # Predictions shorter than their references get a brevity penalty in the
+    # ngram match but, as calc_codebleu computes it, not in the weighted one
+    sources_path = "sources/small_test"
+    references = [read_whole_file(os.path.join(sources_path, source)) for source in sorted(os.listdir(sources_path))]
+    predictions = [reference[:len(reference) // 2] if index % 2 == 0 else reference.replace('int', 'long')
+                   for index, reference in enumerate(references)]
+    evaluator = CodeBleuEvaluator(calc_codebleu)
+
+    samples = evaluator.evaluate_samples(references, predictions)
+
+    for index, (reference, prediction) in enumerate(zip(references, predictions)):
+        expected = calc_codebleu([reference], [prediction], lang="c")
+        for key, value in expected.items():
+            assert samples.loc[index, key] == pytest.approx(value), f'Unexpected {key} for sample {index}'
+    assert evaluator.corpus_scores(samples) == pytest.approx(calc_codebleu(references, predictions, lang="c"))
+
+def test_mean_scores():
+    references = read_lines('references.txt')
+    predictions = read_lines('r2_predictions.txt')
+    evaluator = CodeBleuEvaluator(calc_codebleu)
+
+    samples = evaluator.evaluate_samples(references, predictions)
+    result = evaluator.mean_scores(samples)
+
+    assert result['codebleu'] == pytest.approx(
+            sum(calc_codebleu([r], [p], lang="c")['codebleu'] for r, p in zip(references, predictions)) / len(references))
+
+def test_evaluate_samples_empty_prediction():
+    evaluator = CodeBleuEvaluator(calc_codebleu)
+
+    samples = evaluator.evaluate_samples(["int main() { return 0; }"], [""])
+
+    assert samples.loc[0, 'ngram_match_score'] == 0
+    assert samples.loc[0, 'codebleu'] == pytest.approx(
+            calc_codebleu(["int main() { return 0; }"], [""], lang="c")['codebleu'])
+
+def test_evaluate_samples_length_mismatch():
+    evaluator = CodeBleuEvaluator(calc_codebleu)
+
+    with pytest.raises(ValueError):
+        evaluator.evaluate_samples(["int a;"], [])
@@ -0,0 +1,103 @@
+import io
+import json
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.dataset import Dataset, DatasetRecord, decompile_eval_record, iterate_json_array, parse_shard
+
+def create_items(count):
+    return [{"task_id": index // 2, "type": f"O{index % 2}", "c_func": f"int f{index}() {{ return {index}; }}",
+             "c_test": f"int main() {{ return f{index}() != {index}; }}", "input_asm_prompt": "asm"}
+            for index in range(count)]
+
+@pytest.fixture
+def dataset(tmp_path):
+    dataset = Dataset(str(tmp_path / "dataset.sqlite"))
+    dataset.add(decompile_eval_record(item) for item in create_items(10))
+    yield dataset
+    dataset.close()
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_iterate_json_array(chunk_size):
+    items = create_items(5) + [1, 23, "x", [1, 2], None]
+    file = io.StringIO(json.dumps(items, indent=2))
+
+    assert list(iterate_json_array(file, chunk_size)) == items
+
+def test_iterate_json_array_reads_incrementally():
+    file = io.StringIO('[{"a": 1}, {"a": 2}, this is not json')
+    items = iterate_json_array(file, chunk_size=4)
+
+    assert next(items) == {"a": 1}
+    assert next(items) == {"a": 2}
+    with pytest.raises(ValueError):
+        next(items)
+
+@pytest.mark.parametrize("text", ["", "{}", "[1, 2"])
+def test_iterate_json_array_rejects_invalid_input(text):
+    with pytest.raises(ValueError):
+        list(iterate_json_array(io.StringIO(text)))
+
+def test_decompile_eval_record():
+    record = decompile_eval_record(create_items(2)[1])
+
+    assert record.name == "task_000_O1"
+    assert record.task_id == 0
+    assert record.opt == "O1"
+    assert record.source == "int f1() { return 1; }"
+    assert record.test == "int main() { return f1() != 1; }"
+    assert record.metadata == {"input_asm_prompt": "asm"}
+
+def test_dataset_keeps_all_records(dataset):
+    assert len(dataset) == 10
+    assert dataset.opt_levels() == ["O0", "O1"]
+    assert dataset.get("task_002_O1").metadata == {"input_asm_prompt": "asm"}
+    with pytest.raises(KeyError):
+        dataset.get("task_100_O0")
+
+def test_dataset_add_replaces_records(dataset):
+    dataset.add([DatasetRecord("task_000_O0", 0, "O0", "changed")])
+
+    assert len(dataset) == 10
+    assert dataset.get("task_000_O0").source == "changed"
+
+def test_select_filters(dataset):
+    assert dataset.select(opt_levels=["O1"], task_ids=[1, 3]).names() == ["task_001_O1", "task_003_O1"]
+    assert dataset.select(limit=3).names() == ["task_000_O0", "task_000_O1", "task_001_O0"]
+
+def test_select_shards_cover_dataset(dataset):
+    shards = [dataset.select(shard=(index, 3)).names() for index in range(3)]
+
+    assert sorted(name for shard in shards for name in shard) == dataset.names()
+    assert [len(shard) for shard in shards] == [4, 3, 3]
+
+def test_selection_iterates_records(dataset):
+    records = list(dataset.select(task_ids=[4]))
+
+    assert [(record.name, record.source) for record in records] == [
+        ("task_004_O0", "int f8() { return 8; }"),
+        ("task_004_O1", "int f9() { return 9; }"),
+    ]
+
+def test_read_only_dataset_is_shared_between_threads(dataset):
+    read_only = Dataset(dataset.path, read_only=True)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        sources = list(executor.map(lambda name: read_only.get(name).source, read_only.names()))
+
+    assert sources == [dataset.get(name).source for name in dataset.names()]
+    read_only.close()
+
+def test_read_only_dataset_must_exist(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Dataset(str(tmp_path / "missing.sqlite"), read_only=True)
+
+    assert not (tmp_path / "missing.sqlite").exists()
+
+@pytest.mark.parametrize("text, expected", [("0/4", (0, 4)), ("3/4", (3, 4))])
+def test_parse_shard(text, expected):
+    assert parse_shard(text) == expected
+
+@pytest.mark.parametrize("text", ["4/4", "1", "a/b", "0/0"])
+def test_parse_shard_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        parse_shard(text)
@@ -0,0 +1,76 @@
+import os
+import subprocess
+from src.compiler.gcccompiler import GCCCompiler
+from src.deduplicator import DisassemblyDeduplicator
+from src.disassembler.objdumpdisassembler import ObjdumpDisassembler
+
+sum_code = """int sum(int number1, int number2) {
+    return number1 + number2;
+}
+"""
+
+def disassemble_code(tmp_path, name, code):
+    source_path = os.path.join(tmp_path, f'{name}.c')
+    with open(source_path, 'w') as source_file:
+        source_file.write(code)
+    build_path = os.path.join(tmp_path, name)
+    GCCCompiler(subprocess).compile(source_path, build_path)
+    return ObjdumpDisassembler(subprocess).disassemble_text(build_path)
+
+def test_renamed_function_is_exact_duplicate(tmp_path):
+    disassemblies = {
+        'sum': disassemble_code(tmp_path, 'sum', sum_code),
+        'add': disassemble_code(tmp_path, 'add', sum_code.replace('sum', 'add')),
+    }
+
+    duplicates = DisassemblyDeduplicator().find_duplicates(disassemblies)
+
+    assert list(duplicates) == ['add']
+    assert duplicates['add'].representative == 'sum'
+    assert duplicates['add'].similarity == 1.0
+    assert duplicates['add'].symbol_map == {'sum': 'add'}
+
+def test_different_code_is_not_grouped(tmp_path):
+    disassemblies = {
+        'sum': disassemble_code(tmp_path, 'sum', sum_code),
+        'factorial': disassemble_code(tmp_path, 'factorial',
+                                      open('sources/small_test/factorial.c').read()),
+    }
+
+    assert DisassemblyDeduplicator().find_duplicates(disassemblies) == {}
+
+def test_keeps_names_without_renaming(tmp_path):
+    disassemblies = {
+        'sum': disassemble_code(tmp_path, 'sum', sum_code),
+        'add': disassemble_code(tmp_path, 'add', sum_code.replace('sum', 'add')),
+    }
+
+    duplicates = DisassemblyDeduplicator(rename_symbols=False).find_duplicates(disassemblies)
+
+    assert duplicates['add'].symbol_map == {}
+
+def test_canonicalize_numbers_registers_and_symbols():
+    deduplicator = DisassemblyDeduplicator()
+    first = deduplicator.canonicalize("foo:\n  mov %eax,%ebx\n  call <bar>\n")
+    second = deduplicator.canonicalize("baz:\n  mov %ecx,%edx\n  call <qux>\n")
+
+    assert first.key == second.key
+    assert first.symbols == ['foo', 'bar']
+    assert second.symbols == ['baz', 'qux']
+
+def test_near_duplicates_respect_threshold():
+    lines = [f"  add $0x{number:x},%eax" for number in range(40)]
+    original = "f:\n" + "\n".join(lines) + "\n"
+    changed = "f:\n" + "\n".join(lines[:-1] + ["  sub $0x1,%eax"]) + "\n"
+
+    assert 'changed' in DisassemblyDeduplicator(threshold=0.8).find_duplicates(
+            {'original': original, 'changed': changed})
+    assert DisassemblyDeduplicator(threshold=1.0).find_duplicates(
+            {'original': original, 'changed': changed}) == {}
+
+def test_rename_swaps_names_in_one_pass():
+    deduplicator = DisassemblyDeduplicator()
+
+    renamed = deduplicator.rename("int a(void) { return b() + a_b; }", {'a': 'b', 'b': 'a'})
+
+    assert renamed == "int b(void) { return a() + a_b; }"
@@ -0,0 +1,71 @@
+import os
+import subprocess
+from src.disassembler.disassembledfunction import DisassembledFunction, functions_path, load_functions, \
+        parse_objdump, parse_r2_functions, save_functions
+
+multi_function_source = """
+static int helper(int a) { return a * 3 + 1; }
+int compute(int *values, int count) { int sum = 0; for (int i = 0; i < count; i++) sum += helper(values[i]); return sum; }
+long constant(void) { return 0x1122334455667788L; }
+"""
+
+def disassemble_source(tmp_path, source):
+    source_path = os.path.join(tmp_path, "source.c")
+    with open(source_path, 'w') as file:
+        file.write(source)
+    object_path = os.path.join(tmp_path, "source.o")
+    subprocess.run(["gcc", "-c", "-O0", source_path, "-o", object_path], check=True)
+    return subprocess.run(["objdump", "-d", object_path], stdout=subprocess.PIPE, text=True, check=True).stdout
+
+def test_parse_objdump(tmp_path):
+    functions = parse_objdump(disassemble_source(tmp_path, multi_function_source))
+
+    assert [function.name for function in functions] == ["helper", "compute", "constant"]
+    assert functions[0].address == 0
+    # Sizes include instructions whose bytes wrap onto a second line
+    for function, next_function in zip(functions, functions[1:]):
+        assert function.address + function.size == next_function.address
+    assert all(function.instructions for function in functions)
+    assert not any('Disassembly of section' in line for function in functions for line in function.instructions)
+
+def test_to_text_matches_objdump_layout(tmp_path):
+    output = disassemble_source(tmp_path, multi_function_source)
+
+    helper = parse_objdump(output)[0]
+
+    assert helper.to_text() in output
+
+def test_is_runtime():
+    assert DisassembledFunction("_start", 0, 1, []).is_runtime()
+    assert DisassembledFunction("__do_global_dtors_aux", 0, 1, []).is_runtime()
+    assert DisassembledFunction("sym.imp.printf", 0, 1, []).is_runtime()
+    assert DisassembledFunction("entry0", 0, 1, []).is_runtime()
+    assert not DisassembledFunction("sym.factorial", 0, 1, []).is_runtime()
+    assert not DisassembledFunction("main", 0, 1, []).is_runtime()
+
+def test_functions_path():
+    assert functions_path(os.path.join("data", "disassemblies", "sumtwo_d.txt")) == \
+            os.path.join("data", "disassemblies", "sumtwo_f.json")
+
+def test_save_and_load_functions(tmp_path):
+    path = os.path.join(tmp_path, "functions.json")
+    functions = [DisassembledFunction("sum", 0x40, 20, ["  40:\tpush %rbp"])]
+
+    save_functions(path, functions)
+
+    loaded, = load_functions(path)
+    assert loaded.to_dict() == functions[0].to_dict()
+
+def test_parse_r2_functions():
+    output = '\n'.join([
+        '{"name":"sym.sum","addr":134217792,"size":20,"ops":[{"offset":134217792,"bytes":"55","disasm":"push rbp"},'
+        '{"offset":134217793,"bytes":"4889e5","disasm":"mov rbp, rsp"}]}',
+        '{"name":"sym.factorial","addr":134217812,"size":43,"ops":[]}',
+        '',
+    ])
+
+    functions = parse_r2_functions(output)
+
+    assert [(function.name, function.address, function.size) for function in functions] == \
+            [("sym.sum", 0x8000040, 20), ("sym.factorial", 0x8000054, 43)]
+    assert functions[0].instructions == ["0x8000040  55  push rbp", "0x8000041  4889e5  mov rbp, rsp"]
@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import pytest
+import subprocess
+from shutil import copytree
+from unittest.mock import MagicMock
+from src.compiler.gcccompiler import GCCCompiler
+from src.disassembler.objdumpdisassembler import ObjdumpDisassembler
+from src.distributed import PipelineTasks, collect_run, enqueue_run
+from src.manifest import Manifest
+from src.pipeline import Pipeline
+from src.resultstore import ResultStore
+from src.workqueue import WorkQueue, Worker
+
+class EchoPredictor:
+    def __init__(self, name, fail_on=None):
+        self.name = name
+        self.fail_on = fail_on
+
+    def generate_prediction(self, binary_path, disassembly_path):
+        if os.path.basename(binary_path) == self.fail_on:
+            raise RuntimeError("prediction failed")
+        return f"// {self.name} {os.path.basename(binary_path)} pid {os.getpid()}\n"
+
+def create_pipeline(tmp_path, result_store=None, fail_on=None, manifest=None, predictors=None):
+    return Pipeline(
+            GCCCompiler(subprocess),
+            ObjdumpDisassembler(subprocess),
+            predictors or [EchoPredictor('a'), EchoPredictor('b', fail_on)],
+            MagicMock(),
+            sources_path=os.path.join(tmp_path, "sources"),
+            data_path=os.path.join(tmp_path, "data"),
+            manifest=manifest,
+            result_store=result_store)
+
+def run_worker(tmp_path, queue_path, name, fail_on):
+    queue = WorkQueue(queue_path, max_attempts=2)
+    pipeline = create_pipeline(tmp_path, fail_on=fail_on)
+    Worker(queue, PipelineTasks(pipeline).handlers(), name, poll_interval=0.01).run()
+    queue.close()
+
+def run_distributed(tmp_path, workers, fail_on=None, manifest=None):
+    copytree("sources/small_test", os.path.join(tmp_path, "sources"))
+    coordinator = create_pipeline(tmp_path, ResultStore(os.path.join(tmp_path, "data", "results.jsonl")),
+                                  manifest=manifest)
+    coordinator.init_folders()
+    queue_path = os.path.join(tmp_path, "queue.sqlite")
+    queue = WorkQueue(queue_path)
+
+    count = enqueue_run(queue, coordinator)
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=run_worker, args=(tmp_path, queue_path, f"worker{index}", fail_on))
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+
+    return coordinator, queue, count
+
+def test_workers_run_every_stage(tmp_path):
+    coordinator, queue, count = run_distributed(tmp_path, 3)
+    sources = coordinator.get_sources()
+
+    collect_run(queue, coordinator)
+
+    assert count == len(sources) * 3
+    assert queue.counts() == {'done': count}
+    executables = [coordinator.get_executable_name(source) for source in sources]
+    assert sorted(coordinator.result_store.references()) == sorted(executables)
+    predictions = coordinator.result_store.predictions('b')
+    assert sorted(predictions) == sorted(executables)
+    for executable in executables:
+        assert predictions[executable].startswith(f"// b {executable} pid ")
+        assert os.path.exists(coordinator.get_disassembly_path(executable))
+        assert os.path.exists(coordinator.get_prediction_path(coordinator.predictors[0], executable))
+
+def test_collect_reports_failed_tasks(tmp_path):
+    coordinator, queue, _ = run_distributed(tmp_path, 2, fail_on='helloworld')
+
+    assert queue.is_finished()
+    with pytest.raises(RuntimeError, match='predict:helloworld.c:b'):
+        collect_run(queue, coordinator)
+
+def test_resume_after_distribute_redoes_nothing(tmp_path):
+    manifest_path = os.path.join(tmp_path, "data", "manifest.json")
+    coordinator, queue, _ = run_distributed(tmp_path, 2, manifest=Manifest(manifest_path))
+    collect_run(queue, coordinator)
+    coordinator.manifest.close()
+
+    predictors = [MagicMock(wraps=EchoPredictor('a')), MagicMock(wraps=EchoPredictor('b'))]
+    for predictor, name in zip(predictors, ['a', 'b']):
+        predictor.name = name
+    resumed = create_pipeline(tmp_path, manifest=Manifest(manifest_path), predictors=predictors)
+    resumed.compiler.compile = MagicMock(wraps=resumed.compiler.compile)
+    resumed.disassembler.disassemble = MagicMock(wraps=resumed.disassembler.disassemble)
+    for source in resumed.get_sources():
+        executable = resumed.compile_and_disassemble(source)
+        for predictor in predictors:
+            resumed.predict_and_save_file(executable, predictor)
+
+    resumed.compiler.compile.assert_not_called()
+    resumed.disassembler.disassemble.assert_not_called()
+    for predictor in predictors:
+        predictor.generate_prediction.assert_not_called()
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+import subprocess
+from unittest.mock import MagicMock
+from src.evaluator.executionevaluator import ExecutionEvaluator
+
+test_code = """#include <assert.h>
+int func0(int a);
+int main() {
+    assert(func0(2) == 4);
+    return 0;
+}
+"""
+
+@pytest.fixture
+def evaluator(tmp_path):
+    tests_path = tmp_path / "tests"
+    tests_path.mkdir()
+    (tests_path / "task_001.c").write_text(test_code)
+    return ExecutionEvaluator(subprocess, str(tests_path), jobs=4, timeout=1, compile_timeout=30)
+
+def write_prediction(tmp_path, name, code):
+    path = tmp_path / f"{name}.c"
+    path.write_text(code)
+    return str(path)
+
+@pytest.mark.parametrize("code, expected", [
+    ("int func0(int a) { return a * 2; }", {'compiles': True, 'passes': True, 'status': 'passed'}),
+    ("int func0(int a) { return a + 1; }", {'compiles': True, 'passes': False, 'status': 'failed'}),
+    ("int func0(int a) { return a * ; }", {'compiles': False, 'passes': False, 'status': 'compile_error'}),
+    ("int func0(int a) { while (a) {} return 0; }", {'compiles': True, 'passes': False, 'status': 'timeout'}),
+    ("int func0(int a) { return *(volatile int *)0; }", {'compiles': True, 'passes': False, 'status': 'crashed'}),
+])
+def test_run_test(evaluator, tmp_path, code, expected):
+    assert evaluator.run_test(write_prediction(tmp_path, "prediction", code), "task_001") == expected
+
+def test_run_test_without_test(evaluator, tmp_path):
+    prediction_path = write_prediction(tmp_path, "prediction", "int func0(int a) { return a * 2; }")
+
+    assert evaluator.run_test(prediction_path, "task_002")['status'] == 'no_test'
+
+def test_run_tests_keeps_order(evaluator, tmp_path):
+    passing = write_prediction(tmp_path, "passing", "int func0(int a) { return a * 2; }")
+    failing = write_prediction(tmp_path, "failing", "int func0(int a) { return a; }")
+
+    outcomes = evaluator.run_tests([(passing, "task_001"), (failing, "task_001"), (passing, "task_001")])
+
+    assert [outcome['status'] for outcome in outcomes] == ['passed', 'failed', 'passed']
+
+def test_sandbox_falls_back_without_network_namespace(tmp_path):
+    mock_subprocess = MagicMock()
+    mock_subprocess.CalledProcessError = subprocess.CalledProcessError
+    mock_subprocess.run.side_effect = subprocess.CalledProcessError(1, 'unshare')
+    evaluator = ExecutionEvaluator(mock_subprocess, str(tmp_path), memory_limit=1, cpu_limit=2)
+
+    sandbox = evaluator.get_sandbox()
+
+    assert sandbox[0] == 'prlimit'
+    assert '--as=1048576' in sandbox
+    assert '--cpu=2' in sandbox
+
+def test_rates(evaluator):
+    table = pd.DataFrame([
+        {'compiles': True, 'passes': True, 'status': 'passed'},
+        {'compiles': True, 'passes': False, 'status': 'failed'},
+        {'compiles': False, 'passes': False, 'status': 'compile_error'},
+        {'compiles': True, 'passes': False, 'status': 'failed'},
+        {'compiles': None, 'passes': None, 'status': 'no_test'},
+    ])
+
+    assert evaluator.rates(table) == {'tested': 4, 'compile_rate': 0.75, 'pass_rate': 0.25}
@@ -0,0 +1,67 @@
+import os
+from src.disassembler.disassembledfunction import DisassembledFunction, save_functions
+from src.predictor.functionslicer import FunctionSlicer, stitch_predictions
+from src.util import estimate_tokens
+
+base_prompt = "Decompile:\n{disassembly}\nC code:"
+
+def create_function(name, instruction_count):
+    return DisassembledFunction(name, 0, instruction_count, [f"  {index:x}:\tnop" for index in range(instruction_count)])
+
+def write_disassembly(tmp_path, functions):
+    disassembly_path = os.path.join(tmp_path, "task_d.txt")
+    with open(disassembly_path, 'w') as file:
+        file.write("full disassembly")
+    if functions is not None:
+        save_functions(os.path.join(tmp_path, "task_f.json"), functions)
+    return disassembly_path
+
+def test_without_functions_uses_whole_disassembly(tmp_path):
+    disassembly_path = write_disassembly(tmp_path, None)
+
+    prompts = FunctionSlicer(10).create_prompts(base_prompt, disassembly_path)
+
+    assert prompts == ["Decompile:\nfull disassembly\nC code:"]
+
+def test_leaves_out_runtime_functions(tmp_path):
+    functions = [create_function("_start", 3), create_function("sum", 3), create_function("sym.imp.printf", 3)]
+    disassembly_path = write_disassembly(tmp_path, functions)
+
+    prompts = FunctionSlicer().create_prompts(base_prompt, disassembly_path)
+
+    assert prompts == [base_prompt.format(disassembly=functions[1].to_text())]
+
+def test_keeps_runtime_functions_when_there_is_nothing_else(tmp_path):
+    disassembly_path = write_disassembly(tmp_path, [create_function("_start", 3)])
+
+    prompts = FunctionSlicer().create_prompts(base_prompt, disassembly_path)
+
+    assert len(prompts) == 1 and "_start" in prompts[0]
+
+def test_splits_functions_over_budget(tmp_path):
+    functions = [create_function(f"function_{index}", 20) for index in range(6)]
+    disassembly_path = write_disassembly(tmp_path, functions)
+    two_functions = base_prompt.format(disassembly='\n\n'.join(function.to_text() for function in functions[:2]))
+
+    prompts = FunctionSlicer(estimate_tokens(two_functions)).create_prompts(base_prompt, disassembly_path)
+
+    assert len(prompts) == 3
+    assert all(estimate_tokens(prompt) <= estimate_tokens(two_functions) for prompt in prompts)
+    assert all(f"function_{index}" in prompts[index // 2] for index in range(6))
+
+def test_oversized_function_gets_its_own_prompt(tmp_path):
+    functions = [create_function("small", 2), create_function("huge", 500), create_function("tiny", 2)]
+    disassembly_path = write_disassembly(tmp_path, functions)
+
+    prompts = FunctionSlicer(100).create_prompts(base_prompt, disassembly_path)
+
+    assert [prompt.count("huge") for prompt in prompts] == [0, 1, 0]
+
+def test_stitch_predictions_keeps_first_include():
+    predictions = [
+        "#include <stdio.h>\nint a() { return 1; }\n",
+        "#include <stdio.h>\n#include <stdlib.h>\nint b() { return 2; }",
+    ]
+
+    assert stitch_predictions(predictions) == \
+            "#include <stdio.h>\nint a() { return 1; }\n\n#include <stdlib.h>\nint b() { return 2; }\n"
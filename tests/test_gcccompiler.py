@@ -4,6 +4,7 @@ import pytest
 import re
 import subprocess
 from src.compiler.gcccompiler import GCCCompiler
+from src.compiler.objectcache import ObjectCache
 from unittest.mock import MagicMock, call
 
 @pytest.mark.parametrize("should_strip", [True, False])
@@ -42,6 +43,65 @@ def test_compile_integration(tmp_path, should_strip):
     was_stripped = is_stripped(file_type)
     assert was_stripped == should_strip, f"Strip parameter was not respected, expected {should_strip}, but was {was_stripped}"
 
+def test_compile_uses_object_cache(tmp_path):
+    mock_subprocess = MagicMock()
+    mock_subprocess.run.return_value.stdout = "gcc (test) 1.0\n"
+    object_cache = MagicMock()
+    object_cache.get.return_value = True
+    source_path = "sources/small_test/helloworld.c"
+    output_path = os.path.join(tmp_path, "binary")
+
+    compiler = GCCCompiler(mock_subprocess, True, object_cache)
+    compiler.compile(source_path, output_path)
+
+    key = compiler.cache_key(source_path)
+    object_cache.get.assert_called_once_with(key, output_path)
+    object_cache.put.assert_not_called()
+    assert call.run(['gcc', '-c', '-o', output_path, source_path], check=True) not in mock_subprocess.mock_calls
+    mock_subprocess.run.assert_called_with(["strip", output_path], check=True)
+
+def test_cache_key(tmp_path):
+    mock_subprocess = MagicMock()
+    mock_subprocess.run.return_value.stdout = "gcc (test) 1.0\n"
+    source_path = os.path.join(tmp_path, "source.c")
+    with open(source_path, 'w') as file:
+        file.write("int a;")
+
+    first_key = GCCCompiler(mock_subprocess, False).cache_key(source_path)
+    assert first_key == GCCCompiler(mock_subprocess, True).cache_key(source_path)
+
+    with open(source_path, 'w') as file:
+        file.write("int b;")
+    assert GCCCompiler(mock_subprocess, False).cache_key(source_path) != first_key
+
+def test_compile_many_integration(tmp_path):
+    sources = sorted(os.listdir("sources/small_test"))
+    paths = [(os.path.join("sources/small_test", source), os.path.join(tmp_path, source[:-2]))
+             for source in sources]
+
+    GCCCompiler(subprocess).compile_many(paths, jobs=4)
+
+    for _, output_path in paths:
+        file_type = magic.from_file(output_path)
+        assert str_contains_word(file_type, 'ELF') and str_contains_word(file_type, 'relocatable')
+
+def test_object_cache_integration(tmp_path):
+    object_cache = ObjectCache(os.path.join(tmp_path, "objects"))
+    counting_subprocess = MagicMock(wraps=subprocess)
+    counting_subprocess.PIPE = subprocess.PIPE
+    source_path = "sources/small_test/helloworld.c"
+    unstripped_path = os.path.join(tmp_path, 'unstripped')
+    stripped_path = os.path.join(tmp_path, 'stripped')
+
+    GCCCompiler(counting_subprocess, False, object_cache).compile(source_path, unstripped_path)
+    GCCCompiler(counting_subprocess, True, object_cache).compile(source_path, stripped_path)
+
+    gcc_compiles = [c for c in counting_subprocess.run.call_args_list if c.args[0][:2] == ['gcc', '-c']]
+    assert len(gcc_compiles) == 1
+    assert (object_cache.hits, object_cache.misses) == (1, 1)
+    assert not is_stripped(magic.from_file(unstripped_path))
+    assert is_stripped(magic.from_file(stripped_path))
+
 def str_contains_word(string, word):
     return re.search(r'\b' + word + r'\b', string) is not None
 
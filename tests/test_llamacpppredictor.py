@@ -0,0 +1,56 @@
+from src.predictor.llamacpppredictor import LlamaCppPredictor
+from tests.test_asyncopenaimodelpredictor import StubOpenAIServer, base_promt, write_disassemblies
+
+def create_predictor(server, **kwargs):
+    return LlamaCppPredictor(server.base_url, "test-model", 0, base_promt, **kwargs)
+
+def test_name():
+    predictor = LlamaCppPredictor("http://localhost:8080/v1", "test-model", 0, base_promt)
+    assert predictor.name == "local-test-model"
+
+def test_generate_predictions_keeps_order_and_caps_in_flight(tmp_path):
+    requests = write_disassemblies(tmp_path, 12)
+
+    with StubOpenAIServer() as server:
+        predictor = create_predictor(server, parallel=3)
+        predictions = predictor.generate_predictions(requests)
+
+    assert predictions == [f"prediction for code{index}\n" for index in range(12)]
+    assert 1 < server.max_in_flight <= 3
+
+def test_generate_predictions_reuses_slots_and_prompt_cache(tmp_path):
+    requests = write_disassemblies(tmp_path, 6)
+
+    with StubOpenAIServer() as server:
+        predictor = create_predictor(server, parallel=2, max_tokens=100)
+        predictor.generate_predictions(requests)
+
+    assert all(body['cache_prompt'] for body in server.bodies)
+    assert {body['id_slot'] for body in server.bodies} == {0, 1}
+    assert all(body['max_tokens'] == 100 for body in server.bodies)
+
+def test_generate_prediction(tmp_path):
+    [(binary_path, disassembly_path)] = write_disassemblies(tmp_path, 1)
+
+    with StubOpenAIServer() as server:
+        predictor = create_predictor(server)
+        prediction = predictor.generate_prediction(binary_path, disassembly_path)
+
+    assert prediction == "prediction for code0\n"
+    assert predictor.token_usage() == (10, 4)
+
+def test_cache_key_depends_on_prompt(tmp_path):
+    requests = write_disassemblies(tmp_path, 2)
+    predictor = LlamaCppPredictor("http://localhost:8080/v1", "test-model", 0, base_promt)
+
+    assert predictor.cache_key(*requests[0]) == predictor.cache_key(*requests[0])
+    assert predictor.cache_key(*requests[0]) != predictor.cache_key(*requests[1])
+
+def test_cache_key_depends_on_max_tokens(tmp_path):
+    [request] = write_disassemblies(tmp_path, 1)
+
+    def cache_key(max_tokens):
+        return LlamaCppPredictor("http://localhost:8080/v1", "test-model", 0, base_promt,
+                                 max_tokens=max_tokens).cache_key(*request)
+
+    assert cache_key(2048) != cache_key(4096)
@@ -0,0 +1,54 @@
+import pytest
+import subprocess
+import urllib.error
+from unittest.mock import MagicMock
+from src.llamacppserver import LlamaCppServer
+
+def create_urlopen(statuses):
+    def urlopen(url, timeout):
+        status = statuses.pop(0)
+        if status != 200:
+            raise urllib.error.URLError('loading')
+        response = MagicMock()
+        response.__enter__.return_value.status = status
+        return response
+    return urlopen
+
+def create_subprocess():
+    mock_subprocess = MagicMock()
+    mock_subprocess.Popen.return_value.poll.return_value = None
+    mock_subprocess.TimeoutExpired = subprocess.TimeoutExpired
+    return mock_subprocess
+
+def test_command():
+    server = LlamaCppServer(MagicMock(), 'model.gguf', threads=6, parallel=2, context_size=1000, port=9000)
+
+    assert server.command() == ['llama-server', '-m', 'model.gguf', '--host', '127.0.0.1', '--port', '9000',
+                                '-np', '2', '-c', '2000', '-cb', '-t', '6']
+
+def test_start_waits_until_healthy():
+    mock_subprocess = create_subprocess()
+    statuses = [503, 503, 200]
+    server = LlamaCppServer(mock_subprocess, 'model.gguf', port=9000, urlopen=create_urlopen(statuses))
+
+    assert server.start() == 'http://127.0.0.1:9000/v1'
+    assert statuses == []
+    mock_subprocess.Popen.assert_called_once()
+
+def test_start_fails_when_server_exits():
+    mock_subprocess = create_subprocess()
+    mock_subprocess.Popen.return_value.poll.return_value = 1
+    server = LlamaCppServer(mock_subprocess, 'model.gguf', urlopen=create_urlopen([]))
+
+    with pytest.raises(RuntimeError):
+        server.start()
+
+def test_close_terminates_server():
+    mock_subprocess = create_subprocess()
+    server = LlamaCppServer(mock_subprocess, 'model.gguf', urlopen=create_urlopen([200]))
+    server.start()
+
+    server.close()
+    server.close()
+
+    mock_subprocess.Popen.return_value.terminate.assert_called_once()
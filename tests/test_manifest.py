@@ -0,0 +1,86 @@
+import json
+import os
+from src.manifest import Manifest
+
+def test_missing_entry_is_not_current(tmp_path):
+    manifest = Manifest(os.path.join(tmp_path, "manifest.json"))
+
+    assert not manifest.is_current("task", "compile", "hash")
+
+def test_record_and_is_current(tmp_path):
+    output_path = os.path.join(tmp_path, "task")
+    open(output_path, 'w').close()
+    manifest = Manifest(os.path.join(tmp_path, "manifest.json"))
+
+    manifest.record("task", "compile", "hash", [output_path])
+
+    assert manifest.is_current("task", "compile", "hash")
+    assert not manifest.is_current("task", "compile", "other hash")
+    assert not manifest.is_current("task", "disassemble", "hash")
+
+def test_missing_output_is_not_current(tmp_path):
+    output_path = os.path.join(tmp_path, "task")
+    open(output_path, 'w').close()
+    manifest = Manifest(os.path.join(tmp_path, "manifest.json"))
+    manifest.record("task", "compile", "hash", [output_path])
+
+    os.remove(output_path)
+
+    assert not manifest.is_current("task", "compile", "hash")
+
+def test_persists_between_instances(tmp_path):
+    manifest_path = os.path.join(tmp_path, "manifest.json")
+    output_path = os.path.join(tmp_path, "task")
+    open(output_path, 'w').close()
+    Manifest(manifest_path).record("task", "compile", "hash", [output_path])
+
+    manifest = Manifest(manifest_path)
+
+    assert manifest.is_current("task", "compile", "hash")
+    with open(manifest_path) as file:
+        assert json.load(file) == {"task": {"compile": {"inputs": "hash", "outputs": [output_path]}}}
+
+def test_clear(tmp_path):
+    manifest_path = os.path.join(tmp_path, "manifest.json")
+    manifest = Manifest(manifest_path)
+    manifest.record("task", "compile", "hash", [])
+
+    manifest.clear()
+
+    assert not os.path.exists(manifest_path)
+    assert not manifest.is_current("task", "compile", "hash")
+
+def test_close_folds_journal_into_manifest(tmp_path):
+    manifest_path = os.path.join(tmp_path, "manifest.json")
+    manifest = Manifest(manifest_path)
+    manifest.record("task", "compile", "hash", [])
+    manifest.record("task", "compile", "new hash", [])
+
+    assert not os.path.exists(manifest_path)
+
+    manifest.close()
+
+    assert not os.path.exists(f"{manifest_path}.journal")
+    with open(manifest_path) as file:
+        assert json.load(file) == {"task": {"compile": {"inputs": "new hash", "outputs": []}}}
+
+def test_ignores_cut_off_journal_line(tmp_path):
+    manifest_path = os.path.join(tmp_path, "manifest.json")
+    Manifest(manifest_path).record("task", "compile", "hash", [])
+    with open(f"{manifest_path}.journal", 'a') as file:
+        file.write('["task", "disas')
+
+    manifest = Manifest(manifest_path)
+
+    assert manifest.is_current("task", "compile", "hash")
+    assert not os.path.exists(f"{manifest_path}.journal")
+
+def test_record_appends_one_journal_line(tmp_path):
+    manifest = Manifest(os.path.join(tmp_path, "manifest.json"))
+
+    for index in range(3):
+        manifest.record(f"task_{index}", "compile", "hash", [])
+
+    with open(manifest.journal_path) as file:
+        assert [json.loads(line)[0] for line in file] == ["task_0", "task_1", "task_2"]
+    manifest.close()
@@ -0,0 +1,103 @@
+import subprocess
+from src.disassembler.disassembledfunction import DisassembledFunction
+from src.disassembler.normalizer import DisassemblyNormalizer
+from src.util import estimate_tokens
+
+objdump_output = """
+tests/sample.o:     file format elf64-x86-64
+
+
+Disassembly of section .text:
+
+0000000000000000 <factorial>:
+   0:	55                   	push   %rbp
+   1:	48 89 e5             	mov    %rsp,%rbp
+   4:	83 7d fc 00          	cmpl   $0x0,-0x4(%rbp)
+   8:	75 07                	jne    11 <factorial+0x11>
+   a:	b8 01 00 00 00       	mov    $0x1,%eax
+   f:	eb 0a                	jmp    1b <factorial+0x1b>
+  11:	48 8d 14 85 00 00 00 	lea    0x0(,%rax,4),%rdx
+  18:	00 
+  19:	66 90                	xchg   %ax,%ax
+  1b:	c9                   	leave
+  1c:	c3                   	ret
+  1d:	0f 1f 00             	nopl   (%rax)
+
+Disassembly of section .text:
+
+0000000000000020 <sum>:
+  20:	e8 00 00 00 00       	call   25 <factorial>
+  25:	eb f9                	jmp    20 <sum>
+"""
+
+r2_output = """            ;-- section..text:
+┌ 20: sym.sum (int64_t arg1, int64_t arg2);
+│           ; CALL XREF from main @ 0x8000070
+│           0x08000040      55             push rbp
+│       ┌─< 0x08000041      7405           je 0x8000048
+│       │   0x08000043      90             nop
+│       │   0x08000044      4889e5         mov rbp, rsp                ; [0x8:4]=0
+│       └─> 0x08000048      c3             ret
+"""
+
+def test_normalize_objdump():
+    normalized = DisassemblyNormalizer().normalize(objdump_output)
+
+    assert normalized == """Disassembly of section .text:
+factorial:
+  push %rbp
+  mov %rsp,%rbp
+  cmpl $0x0,-0x4(%rbp)
+  jne .L0
+  mov $0x1,%eax
+  jmp .L1
+.L0:
+  lea 0x0(,%rax,4),%rdx
+.L1:
+  leave
+  ret
+sum:
+.L2:
+  call <factorial>
+  jmp .L2
+"""
+
+def test_normalize_r2():
+    normalized = DisassemblyNormalizer().normalize(r2_output)
+
+    assert normalized == """            ;-- section..text:
+┌ 20: sym.sum (int64_t arg1, int64_t arg2);
+  push rbp
+  je .L0
+  mov rbp, rsp  ; [0x8:4]=0
+.L0:
+  ret
+"""
+
+def test_options_can_be_disabled():
+    normalizer = DisassemblyNormalizer(strip_bytes=False, collapse_padding=False, deduplicate_headers=False)
+
+    normalized = normalizer.normalize(objdump_output)
+
+    assert normalizer.name == "normalize[addresses]"
+    assert "48 8d 14 85 00 00 00" in normalized
+    assert "   18:\t00" in normalized
+    assert "xchg" in normalized
+    assert normalized.count("Disassembly of section .text:") == 2
+    assert "file format" in normalized
+
+def test_normalize_function():
+    function = DisassembledFunction("factorial", 0, 29, objdump_output.splitlines()[7:19])
+
+    normalized = DisassemblyNormalizer().normalize_function(function)
+
+    assert normalized.name == "factorial"
+    assert normalized.instructions[:4] == ["  push %rbp", "  mov %rsp,%rbp", "  cmpl $0x0,-0x4(%rbp)", "  jne .L0"]
+
+def test_normalize_shrinks_real_objdump_output():
+    output = subprocess.run(["objdump", "-d", "tests/sample.o"], stdout=subprocess.PIPE, text=True, check=True).stdout
+
+    normalized = DisassemblyNormalizer().normalize(output)
+
+    assert "call" in normalized and "print_hello:" in normalized
+    assert estimate_tokens(normalized) < 0.7 * estimate_tokens(output)
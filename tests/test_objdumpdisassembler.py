@@ -1,6 +1,9 @@
 import os
+import pytest
+import shutil
 import subprocess
-from src.disassembler.objdumpdisassembler import ObjdumpDisassembler
+from src.disassembler.disassembledfunction import load_functions
+from src.disassembler.objdumpdisassembler import ObjdumpDisassembler, split_objdump_output
 from unittest.mock import MagicMock, mock_open, patch
 
 test_sample_path = "tests/sample.o"
@@ -26,3 +29,61 @@ def test_disassemble_integration(tmp_path):
     disassembler.disassemble(test_sample_path, output_path)
 
     assert os.path.exists(output_path), "objdump output file not created"
+
+def test_disassemble_functions_integration(tmp_path):
+    output_path = os.path.join(tmp_path, 'objdump_out_f.json')
+
+    disassembler = ObjdumpDisassembler(subprocess)
+
+    disassembler.disassemble_functions(test_sample_path, output_path)
+
+    function, = load_functions(output_path)
+    assert function.name == "print_hello"
+    assert function.size == 26
+
+def create_objects(tmp_path, count):
+    paths = []
+    for index in range(count):
+        path = os.path.join(tmp_path, f'sample_{index}.o')
+        shutil.copyfile(test_sample_path, path)
+        paths.append(path)
+    return paths
+
+def test_disassemble_texts_matches_one_file_at_a_time(tmp_path):
+    paths = create_objects(tmp_path, 5)
+    disassembler = ObjdumpDisassembler(subprocess, chunk_size=2)
+
+    texts = disassembler.disassemble_texts(paths, jobs=2)
+
+    assert texts == [disassembler.disassemble_text(path) for path in paths]
+
+def test_disassemble_texts_runs_one_objdump_per_chunk():
+    mock_subprocess = MagicMock()
+    mock_subprocess.run.side_effect = lambda command, **kwargs: MagicMock(stdout=''.join(
+            f'\n{path}:     file format elf64-x86-64\n' for path in command[2:]))
+    paths = [f'object_{index}.o' for index in range(5)]
+
+    texts = ObjdumpDisassembler(mock_subprocess, chunk_size=64).disassemble_texts(paths, jobs=2)
+
+    # Chunks are split between the jobs
+    assert [call.args[0] for call in mock_subprocess.run.call_args_list] == [
+        ["objdump", "-d"] + paths[:3],
+        ["objdump", "-d"] + paths[3:],
+    ]
+    assert texts == [f'\n{path}:     file format elf64-x86-64\n' for path in paths]
+
+def test_disassemble_texts_raises_for_broken_file(tmp_path):
+    paths = create_objects(tmp_path, 2) + [os.path.join(tmp_path, 'missing.o')]
+
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        ObjdumpDisassembler(subprocess).disassemble_texts(paths)
+
+    assert error.value.cmd == ["objdump", "-d", paths[-1]]
+
+def test_split_objdump_output_keeps_paths_that_contain_others():
+    text = '\na.o:     file format elf64-x86-64\nf\n\nba.o:     file format elf64-x86-64\ng\n'
+
+    assert split_objdump_output(text, ['a.o', 'ba.o']) == [
+        '\na.o:     file format elf64-x86-64\nf\n',
+        '\nba.o:     file format elf64-x86-64\ng\n',
+    ]
@@ -0,0 +1,25 @@
+import os
+from src.compiler.objectcache import ObjectCache
+
+def test_get_missing(tmp_path):
+    cache = ObjectCache(os.path.join(tmp_path, "objects"))
+    output_path = os.path.join(tmp_path, "out.o")
+
+    assert not cache.get("abcdef", output_path)
+    assert not os.path.exists(output_path)
+    assert cache.misses == 1
+
+def test_put_and_get(tmp_path):
+    cache = ObjectCache(os.path.join(tmp_path, "objects"))
+    object_path = os.path.join(tmp_path, "in.o")
+    output_path = os.path.join(tmp_path, "out.o")
+    with open(object_path, 'wb') as file:
+        file.write(b"\x7fELF object")
+
+    cache.put("abcdef", object_path)
+    os.remove(object_path)
+
+    assert cache.get("abcdef", output_path)
+    with open(output_path, 'rb') as file:
+        assert file.read() == b"\x7fELF object"
+    assert cache.hits == 1
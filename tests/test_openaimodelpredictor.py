@@ -1,6 +1,7 @@
 import pytest
+import threading
 from unittest.mock import patch, MagicMock, mock_open
-from src.predictor.openaimodelpredictor import OpenAIModelPredictor
+from src.predictor.openaimodelpredictor import CodeBlockReader, OpenAIModelPredictor, clean_response
 
 api_key = "replace_me"
 
@@ -26,6 +27,7 @@ def mock_openai_client():
         mock_instance = mock.return_value
         mock_chat_completion = MagicMock()
         mock_chat_completion.choices = [MagicMock(message=MagicMock(content=mock_prediction))]
+        mock_chat_completion.usage = MagicMock(prompt_tokens=12, completion_tokens=3)
         mock_instance.chat.completions.create.return_value = mock_chat_completion
         yield mock
 
@@ -48,3 +50,133 @@ def test_openaimodel_generate_prediction(mock_openai_client, setup_model, mock_f
 
     # Assert the mock response is correctly returned
     assert response == mock_prediction_expected_result, "The response from generate_prediction was not as expected"
+
+def test_openaimodel_counts_tokens_per_thread(mock_openai_client, setup_model, mock_file_open):
+    setup_model.generate_prediction("binary_filename.o", "path/to/text_file.txt")
+    setup_model.generate_prediction("binary_filename.o", "path/to/text_file.txt")
+
+    assert setup_model.token_usage() == (24, 6)
+
+    other_thread_usage = []
+    thread = threading.Thread(target=lambda: other_thread_usage.append(setup_model.token_usage()))
+    thread.start()
+    thread.join()
+    assert other_thread_usage == [(0, 0)]
+
+def test_openaimodel_sends_one_request_per_slice(mock_openai_client, mock_file_open):
+    function_slicer = MagicMock()
+    function_slicer.create_prompts.return_value = ["first part", "second part"]
+    model = OpenAIModelPredictor(api_key, "test-model", 0.5, base_promt, function_slicer)
+
+    response = model.generate_prediction("binary_filename.o", "path/to/text_file.txt")
+
+    function_slicer.create_prompts.assert_called_with(base_promt, "path/to/text_file.txt")
+    assert [call.kwargs['messages'][0]['content'] for call in model.client.chat.completions.create.call_args_list] == \
+            ["first part", "second part"]
+    assert response == "Mocked prediction\n\nMocked prediction\n"
+
+def test_openaimodel_cache_key(setup_model, mock_file_open):
+    key = setup_model.cache_key("binary_filename.o", "path/to/text_file.txt")
+
+    assert key.startswith("OpenAI-test-model|0.5|")
+    assert key == setup_model.cache_key("other_binary.o", "path/to/text_file.txt")
+
+def test_openaimodel_cache_key_depends_on_prompt(setup_model):
+    with patch('builtins.open', mock_open(read_data="first")):
+        first_key = setup_model.cache_key("binary_filename.o", "path/to/text_file.txt")
+    with patch('builtins.open', mock_open(read_data="second")):
+        second_key = setup_model.cache_key("binary_filename.o", "path/to/text_file.txt")
+
+    assert first_key != second_key
+
+def create_chunk(content=None, usage=None):
+    chunk = MagicMock(usage=usage)
+    chunk.choices = [] if content is None else [MagicMock(delta=MagicMock(content=content))]
+    return chunk
+
+def create_stream(contents, usage=None):
+    chunks = [create_chunk(content) for content in contents]
+    if usage is not None:
+        chunks.append(create_chunk(usage=usage))
+    stream = MagicMock()
+    stream.__iter__.return_value = iter(chunks)
+    return stream
+
+def test_openaimodel_stream_stops_at_closing_fence(mock_openai_client, mock_file_open):
+    stream = create_stream(["```c\n", "int main", "() {}\n", "```", "\nThis code", " does things"])
+    mock_openai_client.return_value.chat.completions.create.return_value = stream
+    model = OpenAIModelPredictor(api_key, "test-model", 0.5, base_promt, stream=True)
+
+    response = model.generate_prediction("binary_filename.o", "path/to/text_file.txt")
+
+    assert response == "int main() {}\n"
+    stream.close.assert_called_once()
+    # The explanation after the block was never read
+    assert model.token_usage()[1] == 4
+    assert len(model.latencies) == 1
+    first_token, total = model.latencies[0]
+    assert 0 <= first_token <= total
+
+def test_openaimodel_stream_request(mock_openai_client, mock_file_open):
+    mock_openai_client.return_value.chat.completions.create.return_value = create_stream(["code"])
+    model = OpenAIModelPredictor(api_key, "test-model", 0.5, base_promt, stream=True, min_completion_tokens=1)
+
+    response = model.generate_prediction("binary_filename.o", "path/to/text_file.txt")
+
+    kwargs = model.client.chat.completions.create.call_args.kwargs
+    assert kwargs['stream'] is True
+    assert kwargs['stop'] == ['\n```\n']
+    assert kwargs['max_tokens'] == 3
+    assert response == "code\n"
+
+@pytest.mark.parametrize("model_name, max_completion_tokens, expected", [
+    ("gpt-3.5-turbo", None, 4096),
+    ("gpt-4o-mini-2024-07-18", None, 16384),
+    ("unknown-model", None, 4096),
+    ("gpt-4o", 1000, 1000),
+])
+def test_openaimodel_clamps_completion_tokens(mock_openai_client, model_name, max_completion_tokens, expected):
+    model = OpenAIModelPredictor(api_key, model_name, 0.5, base_promt, stream=True,
+                                 max_completion_tokens=max_completion_tokens)
+
+    assert model.max_completion_tokens(base_promt.format(disassembly="mov " * 100000)) == expected
+    assert model.max_completion_tokens(base_promt.format(disassembly="mov")) == min(512, expected)
+
+def test_openaimodel_stream_uses_reported_usage(mock_openai_client, mock_file_open):
+    mock_openai_client.return_value.chat.completions.create.return_value = \
+            create_stream(["code\n"], usage=MagicMock(prompt_tokens=12, completion_tokens=3))
+    model = OpenAIModelPredictor(api_key, "test-model", 0.5, base_promt, stream=True)
+
+    model.generate_prediction("binary_filename.o", "path/to/text_file.txt")
+
+    assert model.token_usage() == (12, 3)
+
+def test_openaimodel_stream_cache_key(setup_model, mock_file_open):
+    model = OpenAIModelPredictor(api_key, "test-model", 0.5, base_promt, stream=True)
+
+    assert model.cache_key("binary_filename.o", "path/to/text_file.txt") != \
+            setup_model.cache_key("binary_filename.o", "path/to/text_file.txt")
+
+def test_openaimodel_stream_cache_key_depends_on_budget(mock_openai_client, mock_file_open):
+    def cache_key(**kwargs):
+        model = OpenAIModelPredictor(api_key, "test-model", 0.5, base_promt, stream=True, **kwargs)
+        return model.cache_key("binary_filename.o", "path/to/text_file.txt")
+
+    assert cache_key() == cache_key()
+    assert cache_key() != cache_key(completion_token_ratio=2.0)
+    assert cache_key() != cache_key(min_completion_tokens=1024)
+    assert cache_key() != cache_key(max_completion_tokens=1000)
+
+@pytest.mark.parametrize("contents, expected, closed", [
+    (["```c\nint a;\n```\nmore"], "int a;\n", True),
+    (["int a;\n", "```\n"], "int a;\n", True),
+    (["\n```", "c\nint a;\nint b;\n``", "`"], "int a;\nint b;\n", True),
+    (["int a;"], "int a;\n", False),
+])
+def test_code_block_reader(contents, expected, closed):
+    reader = CodeBlockReader()
+    for content in contents:
+        reader.feed(content)
+
+    assert reader.closed == closed
+    assert clean_response(reader.text()) == expected
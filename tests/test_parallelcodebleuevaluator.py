@@ -0,0 +1,41 @@
+import os
+import pytest
+from codebleu import calc_codebleu
+from src.evaluator.codebleuevaluator import CodeBleuEvaluator
+from src.evaluator.parallelcodebleuevaluator import ParallelCodeBleuEvaluator
+from src.util import read_whole_file
+
+test_sample_path = "tests/data"
+
+def read_lines(filename):
+    return read_whole_file(os.path.join(test_sample_path, filename)).splitlines()
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 10])
+def test_evaluate_samples_matches_serial(chunk_size):
+    references = read_lines('references.txt') * 3
+    predictions = read_lines('r2_predictions.txt') + read_lines('references.txt') + [''] * 4
+    index = [f'task_{i}' for i in range(len(references))]
+    evaluator = ParallelCodeBleuEvaluator(calc_codebleu, jobs=2, chunk_size=chunk_size)
+
+    try:
+        samples = evaluator.evaluate_samples(references, predictions, index)
+    finally:
+        evaluator.close()
+
+    expected = CodeBleuEvaluator(calc_codebleu).evaluate_samples(references, predictions, index)
+    assert samples.equals(expected)
+
+def test_pool_is_reused_between_calls():
+    references = read_lines('references.txt')
+    evaluator = ParallelCodeBleuEvaluator(calc_codebleu, jobs=2)
+
+    try:
+        evaluator.evaluate_samples(references, references)
+        executor = evaluator.executor
+        samples = evaluator.evaluate_samples(references, references)
+        assert evaluator.executor is executor
+    finally:
+        evaluator.close()
+
+    assert evaluator.executor is None
+    assert evaluator.corpus_scores(samples)['codebleu'] == pytest.approx(1.0)
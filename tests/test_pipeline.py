@@ -3,10 +3,22 @@ import os
 import magic
 import re
 import subprocess
+from src.artifacts import ArtifactStore
+from src.disassembler.disassembledfunction import load_functions
+from src.disassembler.normalizer import DisassemblyNormalizer
+from src.deduplicator import DisassemblyDeduplicator
+from src.predictor.batcherror import BatchPredictionError
+from src.dataset import Dataset, DatasetRecord
+from src.manifest import Manifest
 from src.pipeline import Pipeline
+from src.resultstore import ResultStore
+from src.tracer import Tracer
 from src.r2runner import R2Runner
 from src.disassembler.objdumpdisassembler import ObjdumpDisassembler
+from codebleu import calc_codebleu
 from src.compiler.gcccompiler import GCCCompiler
+from src.evaluator.codebleuevaluator import CodeBleuEvaluator
+from src.evaluator.executionevaluator import ExecutionEvaluator
 from src.util import create_folder_if_not_exists, read_whole_file
 from shutil import copyfile
 from types import SimpleNamespace
@@ -23,7 +35,7 @@ def create_mock_predictor(name):
     mock_predictor.generate_prediction.return_value = mock_prediction_expected_result
     return mock_predictor
 
-def setup_pipeline(tmp_path, compiler, disassembler, predictors, evaluator):
+def setup_pipeline(tmp_path, compiler, disassembler, predictors, evaluator, manifest=None, result_store=None):
     if compiler is None:
         compiler = GCCCompiler(subprocess)
 
@@ -52,7 +64,9 @@ def setup_pipeline(tmp_path, compiler, disassembler, predictors, evaluator):
             predictors=predictors,
             evaluator=evaluator,
             sources_path=sources_path,
-            data_path=data_path)
+            data_path=data_path,
+            manifest=manifest,
+            result_store=result_store)
     pipeline.init_folders()
 
     return pipeline
@@ -147,6 +161,70 @@ def test_generate_and_save_predictions_with_callback(pipeline_factory):
 
     mock_callback.assert_has_calls(expected_calls, any_order=False)
 
+class BatchPredictor:
+    def __init__(self, name):
+        self.name = name
+        self.batches = []
+
+    def generate_prediction(self, binary_path, disassembly_path):
+        raise AssertionError("Batch predictors should not be called one binary at a time")
+
+    def generate_predictions(self, requests):
+        self.batches.append(requests)
+        return [os.path.basename(binary_path) for binary_path, disassembly_path in requests]
+
+class FailingBatchPredictor(BatchPredictor):
+    def generate_predictions(self, requests):
+        predictions = super().generate_predictions(requests)
+        raise BatchPredictionError(predictions[:-1] + [None], {len(requests) - 1: RuntimeError("400")})
+
+def test_failed_batch_saves_answers_that_arrived(tmp_path):
+    predictor = FailingBatchPredictor('batch')
+    pipeline = create_resumable_pipeline(tmp_path, [predictor])
+    for executable in ['a', 'b', 'c']:
+        Path(pipeline.get_build_path(executable)).write_text(executable)
+        Path(pipeline.get_disassembly_path(executable)).write_text(executable)
+
+    with pytest.raises(BatchPredictionError):
+        pipeline.predict_and_save_files(['a', 'b', 'c'], predictor)
+
+    assert read_whole_file(os.path.join(pipeline.predictions_path, 'batch_a.c')) == 'a'
+    assert read_whole_file(os.path.join(pipeline.predictions_path, 'batch_b.c')) == 'b'
+    assert not os.path.exists(os.path.join(pipeline.predictions_path, 'batch_c.c'))
+
+    predictor.batches = []
+    with pytest.raises(BatchPredictionError):
+        pipeline.predict_and_save_files(['a', 'b', 'c'], predictor)
+    assert [[os.path.basename(binary_path) for binary_path, _ in batch] for batch in predictor.batches] == [['c']]
+
+def test_generate_and_save_predictions_batch(pipeline_factory):
+    batch_predictor = BatchPredictor('batch')
+    single_predictor = create_mock_predictor('single')
+    pipeline = pipeline_factory(compiler=MagicMock(), disassembler=MagicMock(),
+                                predictors=[batch_predictor, single_predictor])
+    executables = ['a', 'b', 'c']
+    mock_callback = MagicMock()
+
+    pipeline.generate_and_save_predictions_batch(executables, status_callback=mock_callback)
+
+    assert batch_predictor.batches == [[
+        (os.path.join(pipeline.builds_path, executable),
+         os.path.join(pipeline.disassemblies_path, f'{executable}_d.txt'))
+        for executable in executables
+        ]]
+    assert single_predictor.generate_prediction.call_count == len(executables)
+
+    for executable in executables:
+        prediction_file_path = os.path.join(pipeline.predictions_path, f'batch_{executable}.c')
+        assert read_whole_file(prediction_file_path) == executable
+
+    assert read_whole_file(os.path.join(pipeline.predictions_path, 'batch_all.txt')) == 'a\nb\nc\n'
+    assert read_whole_file(os.path.join(pipeline.predictions_path, 'single_all.txt')) == \
+            f'{mock_prediction_expected_result}\n' * len(executables)
+    assert mock_callback.call_args_list == [
+        call(0, 'batch'), call(1, 'batch'), call(0, 'single'), call(1, 'single')
+        ]
+
 @pytest.mark.parametrize("source,expected", [
     (["hey", "there", "you"], "hey there you"),
     (["quick", "brown", "", "fox"], "quick brown fox"),
@@ -170,12 +248,316 @@ def test_evaluate_predictors(pipeline_factory):
 
     for predictor in predictors:
         prediction_file_path = os.path.join(pipeline.predictions_path, f'{predictor.name}_all.txt')
-        evaluator.evaluate.assert_any_call(
-            read_whole_file(pipeline.references_file_path),
-            read_whole_file(prediction_file_path))
+        evaluator.evaluate_samples.assert_any_call(
+            read_whole_file(pipeline.references_file_path).splitlines(),
+            read_whole_file(prediction_file_path).splitlines(),
+            [executable_filename])
 
+    assert evaluator.corpus_scores.call_count == len(predictors)
     assert len(results) == len(predictors)
 
+def test_evaluate_scores_each_sample(pipeline_factory):
+    evaluator = CodeBleuEvaluator(calc_codebleu)
+    predictors = [create_mock_predictor('a')]
+    pipeline = pipeline_factory(compiler=MagicMock(), disassembler=MagicMock(), predictors=predictors, evaluator=evaluator)
+    sources = copy_all_small_test_sources(pipeline)
+    for source in sources:
+        pipeline.add_source_to_dataset(source)
+        pipeline.generate_prediction(pipeline.get_executable_name(source), predictors[0])
+
+    samples = pipeline.evaluate_samples()
+    results = pipeline.evaluate(samples)
+
+    assert list(samples['a'].index) == [pipeline.get_executable_name(source) for source in sources]
+    references = read_whole_file(pipeline.references_file_path).splitlines()
+    assert results['a'] == pytest.approx(
+            calc_codebleu(references, [mock_prediction_expected_result] * len(sources), lang="c"))
+
+def copy_all_small_test_sources(pipeline):
+    sources = sorted(os.listdir("sources/small_test"))
+    for source in sources:
+        copyfile(os.path.join("sources/small_test", source),
+                 os.path.join(pipeline.sources_path, source))
+    return sources
+
+def test_prepare_parallel(pipeline_factory):
+    pipeline = pipeline_factory()
+    sources = copy_all_small_test_sources(pipeline)
+
+    pipeline.prepare_parallel(jobs=4)
+
+    for source in sources:
+        executable = pipeline.get_executable_name(source)
+        assert os.path.exists(os.path.join(pipeline.builds_path, executable))
+        assert os.path.exists(os.path.join(pipeline.disassemblies_path, f'{executable}_d.txt'))
+
+    expected_lines = []
+    for source in sources:
+        with open(os.path.join(pipeline.sources_path, source)) as file:
+            expected_lines.append(pipeline.put_code_on_single_line(file))
+
+    assert read_whole_file(pipeline.references_file_path) == '\n'.join(expected_lines) + '\n'
+
+def test_prepare_parallel_compiles_in_one_batch(pipeline_factory):
+    compiler = spy_on(GCCCompiler(subprocess), 'compile_many')
+    pipeline = pipeline_factory(compiler=compiler)
+    sources = copy_all_small_test_sources(pipeline)
+
+    pipeline.prepare_parallel(jobs=4)
+
+    compiler.compile_many.assert_called_once_with(
+            [(os.path.join(pipeline.sources_path, source),
+              pipeline.get_build_path(pipeline.get_executable_name(source)))
+             for source in sources],
+            4)
+
+def test_prepare_parallel_disassembles_in_one_batch(pipeline_factory):
+    disassembler = spy_on(ObjdumpDisassembler(subprocess), 'disassemble', 'disassemble_texts')
+    pipeline = pipeline_factory(disassembler=disassembler)
+    sources = copy_all_small_test_sources(pipeline)
+
+    pipeline.prepare_parallel(jobs=4)
+
+    build_paths = [pipeline.get_build_path(pipeline.get_executable_name(source)) for source in sources]
+    disassembler.disassemble_texts.assert_called_once_with(build_paths, 4)
+    disassembler.disassemble.assert_not_called()
+    for build_path, source in zip(build_paths, sources):
+        assert read_whole_file(pipeline.get_disassembly_path(pipeline.get_executable_name(source))) == \
+                ObjdumpDisassembler(subprocess).disassemble_text(build_path)
+
+def test_prepare_parallel_splits_functions_from_batch(pipeline_factory, tmp_path):
+    disassembler = spy_on(ObjdumpDisassembler(subprocess), 'disassemble_texts', 'disassemble_functions')
+    pipeline = pipeline_factory(disassembler=disassembler)
+    pipeline.slice_functions = True
+    sources = copy_all_small_test_sources(pipeline)
+
+    pipeline.prepare_parallel(jobs=4)
+
+    disassembler.disassemble_texts.assert_called_once()
+    disassembler.disassemble_functions.assert_not_called()
+    for source in sources:
+        executable = pipeline.get_executable_name(source)
+        expected_path = os.path.join(tmp_path, f'{executable}_f.json')
+        ObjdumpDisassembler(subprocess).disassemble_functions(pipeline.get_build_path(executable), expected_path)
+        assert read_whole_file(pipeline.get_functions_path(executable)) == read_whole_file(expected_path)
+
+def test_disassemble_all_skips_current_binaries(tmp_path):
+    pipeline = create_resumable_pipeline(tmp_path, None)
+    pipeline.disassembler = spy_on(ObjdumpDisassembler(subprocess), 'disassemble', 'disassemble_texts')
+    sources = copy_all_small_test_sources(pipeline)
+    executables = pipeline.compile_all(sources)
+    pipeline.disassemble_all(executables)
+
+    with open(os.path.join(pipeline.sources_path, 'sumtwo.c'), 'a') as file:
+        file.write('\nint unused;\n')
+    pipeline.compile_all(sources)
+    pipeline.disassembler.disassemble_texts.reset_mock()
+    pipeline.disassemble_all(executables)
+
+    pipeline.disassembler.disassemble_texts.assert_called_once_with([pipeline.get_build_path('sumtwo')], None)
+
+def test_compile_all_skips_current_sources(tmp_path):
+    pipeline = create_resumable_pipeline(tmp_path, None)
+    sources = copy_all_small_test_sources(pipeline)
+    pipeline.compile_all(sources)
+
+    with open(os.path.join(pipeline.sources_path, 'sumtwo.c'), 'a') as file:
+        file.write('\nint unused;\n')
+    pipeline.compiler.compile_many.reset_mock()
+    pipeline.compile_all(sources)
+
+    pipeline.compiler.compile_many.assert_called_once_with(
+            [(os.path.join(pipeline.sources_path, 'sumtwo.c'), pipeline.get_build_path('sumtwo'))],
+            None)
+
+def test_predict_parallel_keeps_source_order(pipeline_factory):
+    predictors = [create_mock_predictor('a'), create_mock_predictor('b')]
+    for predictor in predictors:
+        predictor.generate_prediction.side_effect = lambda build_path, disassembly_path: os.path.basename(build_path)
+    pipeline = pipeline_factory(compiler=MagicMock(), disassembler=MagicMock(), predictors=predictors)
+    sources = copy_all_small_test_sources(pipeline)
+    executables = [pipeline.get_executable_name(source) for source in sources]
+    mock_callback = MagicMock()
+
+    pipeline.predict_parallel(jobs=4, status_callback=mock_callback)
+
+    for predictor in predictors:
+        combined_file_path = os.path.join(pipeline.predictions_path, f'{predictor.name}_all.txt')
+        assert read_whole_file(combined_file_path) == '\n'.join(executables) + '\n'
+        for executable in executables:
+            prediction_file_path = os.path.join(pipeline.predictions_path, f'{predictor.name}_{executable}.c')
+            assert read_whole_file(prediction_file_path) == executable
+            mock_callback.assert_any_call(executable, predictor.name)
+
+    assert mock_callback.call_count == len(executables) * len(predictors)
+
+def test_predict_parallel_uses_batches(pipeline_factory):
+    batch_predictor = BatchPredictor('batch')
+    pipeline = pipeline_factory(compiler=MagicMock(), disassembler=MagicMock(),
+                                predictors=[batch_predictor, create_mock_predictor('single')])
+    sources = copy_all_small_test_sources(pipeline)
+    executables = [pipeline.get_executable_name(source) for source in sources]
+
+    pipeline.predict_parallel(jobs=4)
+
+    assert len(batch_predictor.batches) == 1
+    assert read_whole_file(os.path.join(pipeline.predictions_path, 'batch_all.txt')) == \
+            '\n'.join(executables) + '\n'
+
+def test_predict_all_asks_once_per_duplicate_group(pipeline_factory):
+    predictor = create_mock_predictor('test')
+    predictor.generate_prediction.return_value = "int add(int a, int b) { return a + b; }"
+    pipeline = pipeline_factory(predictors=[predictor])
+    pipeline.deduplicator = DisassemblyDeduplicator()
+    source = read_whole_file("sources/small_test/sumtwo.c")
+    with open(os.path.join(pipeline.sources_path, 'addtwo.c'), 'w') as source_file:
+        source_file.write(source.replace('sum', 'add'))
+    copyfile("sources/small_test/sumtwo.c", os.path.join(pipeline.sources_path, 'sumtwo.c'))
+    pipeline.prepare_parallel()
+    executables = ['addtwo', 'helloworld', 'sumtwo']
+
+    predictions = pipeline.predict_all(executables, predictor)
+
+    assert predictor.generate_prediction.call_count == 2
+    assert predictions[0] == "int add(int a, int b) { return a + b; }"
+    assert predictions[2] == "int sum(int a, int b) { return a + b; }"
+    assert read_whole_file(os.path.join(pipeline.predictions_path, 'test_sumtwo.c')) == predictions[2]
+    assert pipeline.deduplication_summary()['saved_requests'] == 1
+
+def test_resume_without_dedup_asks_for_copied_predictions(tmp_path):
+    predictor = create_mock_predictor('test')
+    pipeline = create_resumable_pipeline(tmp_path, [predictor])
+    pipeline.deduplicator = DisassemblyDeduplicator()
+    source = read_whole_file("sources/small_test/sumtwo.c")
+    with open(os.path.join(pipeline.sources_path, 'addtwo.c'), 'w') as source_file:
+        source_file.write(source.replace('sum', 'add'))
+    copyfile("sources/small_test/sumtwo.c", os.path.join(pipeline.sources_path, 'sumtwo.c'))
+    pipeline.prepare_parallel()
+    executables = ['addtwo', 'helloworld', 'sumtwo']
+    pipeline.predict_all(executables, predictor)
+    assert predictor.generate_prediction.call_count == 2
+
+    pipeline.deduplicator = None
+    pipeline.predict_all(executables, predictor)
+
+    assert predictor.generate_prediction.call_count == 3
+    assert predictor.generate_prediction.call_args[0][0] == pipeline.get_build_path('sumtwo')
+
+def test_run_parallel_matches_serial_run(pipeline_factory, tmp_path):
+    serial = setup_pipeline(tmp_path / "serial", None, None, None, None)
+    parallel = pipeline_factory()
+    copy_all_small_test_sources(serial)
+    copy_all_small_test_sources(parallel)
+
+    for source in serial.get_sources():
+        executable = serial.compile_and_disassemble(source)
+        serial.add_source_to_dataset(source)
+        serial.generate_and_save_predictions(executable)
+    parallel.run_parallel(jobs=3)
+
+    assert read_whole_file(parallel.references_file_path) == read_whole_file(serial.references_file_path)
+    assert read_whole_file(os.path.join(parallel.predictions_path, 'test_all.txt')) == \
+            read_whole_file(os.path.join(serial.predictions_path, 'test_all.txt'))
+
+def create_resumable_pipeline(tmp_path, predictors):
+    compiler = spy_on(GCCCompiler(subprocess), 'compile', 'compile_many')
+    disassembler = spy_on(ObjdumpDisassembler(subprocess), 'disassemble')
+    manifest = Manifest(os.path.join(tmp_path, "data", "manifest.json"))
+    return setup_pipeline(tmp_path, compiler, disassembler, predictors, None, manifest)
+
+def spy_on(component, *method_names):
+    # Keeps the real class so the pipeline still sees the optional methods
+    for method_name in method_names:
+        setattr(component, method_name, MagicMock(wraps=getattr(component, method_name)))
+    return component
+
+def reset_spies(pipeline, predictor):
+    pipeline.compiler.compile.reset_mock()
+    pipeline.compiler.compile_many.reset_mock()
+    pipeline.disassembler.disassemble.reset_mock()
+    predictor.reset_mock()
+
+def run_serial(pipeline):
+    pipeline.clean_combined_files()
+    for source in pipeline.get_sources():
+        executable = pipeline.compile_and_disassemble(source)
+        pipeline.add_source_to_dataset(source)
+        pipeline.generate_and_save_predictions(executable)
+
+def test_resume_skips_unchanged_stages(tmp_path):
+    predictor = create_mock_predictor('test')
+    pipeline = create_resumable_pipeline(tmp_path, [predictor])
+    sources = copy_all_small_test_sources(pipeline)
+    run_serial(pipeline)
+    references = read_whole_file(pipeline.references_file_path)
+    combined = read_whole_file(os.path.join(pipeline.predictions_path, 'test_all.txt'))
+
+    reset_spies(pipeline, predictor)
+    run_serial(pipeline)
+
+    pipeline.compiler.compile.assert_not_called()
+    pipeline.disassembler.disassemble.assert_not_called()
+    predictor.generate_prediction.assert_not_called()
+    assert read_whole_file(pipeline.references_file_path) == references
+    assert read_whole_file(os.path.join(pipeline.predictions_path, 'test_all.txt')) == combined
+    assert combined == f'{mock_prediction_expected_result}\n' * len(sources)
+
+def test_resume_only_redoes_changed_source(tmp_path):
+    predictor = create_mock_predictor('test')
+    pipeline = create_resumable_pipeline(tmp_path, [predictor])
+    copy_all_small_test_sources(pipeline)
+    run_serial(pipeline)
+
+    with open(os.path.join(pipeline.sources_path, 'sumtwo.c'), 'a') as file:
+        file.write('\nint sum_three(int a, int b, int c) { return a + b + c; }\n')
+    reset_spies(pipeline, predictor)
+    run_serial(pipeline)
+
+    build_path = pipeline.get_build_path('sumtwo')
+    disassembly_path = pipeline.get_disassembly_path('sumtwo')
+    pipeline.compiler.compile.assert_called_once_with(os.path.join(pipeline.sources_path, 'sumtwo.c'), build_path)
+    pipeline.disassembler.disassemble.assert_called_once_with(build_path, disassembly_path)
+    predictor.generate_prediction.assert_called_once_with(build_path, disassembly_path)
+
+def test_resume_continues_interrupted_predictions(tmp_path):
+    predictor = create_mock_predictor('test')
+    pipeline = create_resumable_pipeline(tmp_path, [predictor])
+    sources = copy_all_small_test_sources(pipeline)
+    executables = [pipeline.get_executable_name(source) for source in sources]
+    pipeline.prepare_parallel()
+    pipeline.generate_prediction(executables[0], predictor)
+
+    predictor.reset_mock()
+    pipeline.clean_combined_files()
+    pipeline.run_parallel(jobs=2)
+
+    assert predictor.generate_prediction.call_count == len(executables) - 1
+    assert read_whole_file(os.path.join(pipeline.predictions_path, 'test_all.txt')) == \
+            f'{mock_prediction_expected_result}\n' * len(executables)
+
+def test_resume_batch_predictor_only_gets_missing(tmp_path):
+    predictor = BatchPredictor('batch')
+    pipeline = create_resumable_pipeline(tmp_path, [predictor])
+    sources = copy_all_small_test_sources(pipeline)
+    executables = [pipeline.get_executable_name(source) for source in sources]
+    pipeline.prepare_parallel()
+    pipeline.predict_and_save_files(executables[:2], predictor)
+
+    predictions = pipeline.predict_and_save_files(executables, predictor)
+
+    assert predictions == executables
+    assert [len(batch) for batch in predictor.batches] == [2, len(executables) - 2]
+
+def test_clean_clears_manifest(tmp_path):
+    pipeline = create_resumable_pipeline(tmp_path, None)
+    pipeline.compile(source_filename, executable_filename)
+    assert os.path.exists(pipeline.manifest.journal_path)
+
+    pipeline.clean()
+
+    assert not os.path.exists(pipeline.manifest.path)
+    assert not os.path.exists(pipeline.manifest.journal_path)
+
 def test_clean_function(pipeline_factory):
     pipeline = pipeline_factory()
     Path(pipeline.references_file_path).touch()
@@ -191,8 +573,241 @@ def test_clean_function(pipeline_factory):
     assert not os.path.exists(pipeline.references_file_path), "Reference file exists after clean function execution."
     assert not os.path.exists(pipeline.predictions_path), "Predictions file exists after clean function execution."
 
+def create_stored_pipeline(tmp_path, predictors, evaluator=None):
+    result_store = ResultStore(os.path.join(tmp_path, "data", "results.jsonl"))
+    return setup_pipeline(tmp_path, MagicMock(), MagicMock(), predictors, evaluator, None, result_store)
+
+def test_result_store_keeps_sources_and_predictions(tmp_path):
+    predictor = create_mock_predictor('test')
+    predictor.generate_prediction.return_value = "int main() {\n  return 0;\n}\n"
+    pipeline = create_stored_pipeline(tmp_path, [predictor])
+
+    pipeline.add_source_to_dataset(source_filename)
+    pipeline.generate_prediction(executable_filename, predictor)
+
+    assert not os.path.exists(pipeline.references_file_path)
+    assert not os.path.exists(os.path.join(pipeline.predictions_path, 'test_all.txt'))
+    assert pipeline.result_store.references() == {
+        executable_filename: read_whole_file(os.path.join(pipeline.sources_path, source_filename))
+    }
+    assert pipeline.result_store.predictions('test') == {executable_filename: "int main() {\n  return 0;\n}\n"}
+
+    record = list(pipeline.result_store.records())[-1]
+    assert record['disassembly_path'] == pipeline.get_disassembly_path(executable_filename)
+    assert record['seconds'] >= 0
+    assert not record['cached']
+
+def test_result_store_evaluation_matches_tasks_not_order(tmp_path):
+    predictor = create_mock_predictor('a')
+    pipeline = create_stored_pipeline(tmp_path, [predictor], CodeBleuEvaluator(calc_codebleu))
+    sources = copy_all_small_test_sources(pipeline)
+    executables = [pipeline.get_executable_name(source) for source in sources]
+    predictor.generate_prediction.side_effect = lambda build_path, disassembly_path: \
+            read_whole_file(os.path.join(pipeline.sources_path, os.path.basename(build_path) + '.c'))
+
+    pipeline.predict_parallel(jobs=4)
+    for source in reversed(sources):
+        pipeline.add_source_to_dataset(source)
+    samples = pipeline.evaluate_samples()
+    results = pipeline.evaluate(samples)
+
+    assert sorted(samples['a'].index) == sorted(executables)
+    assert results['a']['codebleu'] == pytest.approx(1.0)
+    assert pipeline.result_store.corpus_results() == results
+    table = pipeline.result_store.sample_table(['codebleu'])
+    assert sorted(table.loc['a'].index) == sorted(executables)
+
+def test_clean_combined_files_clears_result_store(tmp_path):
+    pipeline = create_stored_pipeline(tmp_path, None)
+    pipeline.add_source_to_dataset(source_filename)
+
+    pipeline.clean_combined_files()
+
+    assert not os.path.exists(pipeline.result_store.path)
+
+def test_resume_refills_result_store(tmp_path):
+    predictor = create_mock_predictor('test')
+    manifest = Manifest(os.path.join(tmp_path, "data", "manifest.json"))
+    result_store = ResultStore(os.path.join(tmp_path, "data", "results.jsonl"))
+    pipeline = setup_pipeline(tmp_path, None, None, [predictor], None, manifest, result_store)
+    copy_all_small_test_sources(pipeline)
+    run_serial(pipeline)
+
+    predictor.reset_mock()
+    run_serial(pipeline)
+
+    predictor.generate_prediction.assert_not_called()
+    assert len(pipeline.result_store.predictions('test')) == len(pipeline.get_sources())
+    assert all(record['cached'] for record in pipeline.result_store.records() if 'prediction' in record)
+
+def test_tracer_records_every_stage(tmp_path):
+    predictor = create_mock_predictor('test')
+    pipeline = setup_pipeline(tmp_path, None, None, [predictor], MagicMock())
+    pipeline.tracer = Tracer()
+
+    executable = pipeline.compile_and_disassemble(source_filename)
+    pipeline.add_source_to_dataset(source_filename)
+    pipeline.generate_and_save_predictions(executable)
+    pipeline.evaluate()
+
+    assert [(span['stage'], span['item'], span['predictor']) for span in pipeline.tracer.spans] == [
+        ('compile', executable_filename, None),
+        ('disassemble', executable_filename, None),
+        ('add_source_to_dataset', executable_filename, None),
+        ('predict', executable_filename, 'test'),
+        ('evaluate', None, 'test'),
+    ]
+
+def test_disassemble_writes_functions_when_slicing(tmp_path):
+    pipeline = create_resumable_pipeline(tmp_path, None)
+    pipeline.compile(source_filename, executable_filename)
+    pipeline.disassemble(executable_filename)
+    assert not os.path.exists(pipeline.get_functions_path(executable_filename))
+
+    # Turning slicing on makes the recorded disassembly stale
+    pipeline.slice_functions = True
+    pipeline.disassemble(executable_filename)
+
+    assert [function.name for function in load_functions(pipeline.get_functions_path(executable_filename))] == \
+            ['print_hello']
+    assert pipeline.disassembler.disassemble.call_count == 2
+
+def test_disassemble_normalizes_for_predictors(tmp_path):
+    pipeline = create_resumable_pipeline(tmp_path, None)
+    pipeline.normalizer = DisassemblyNormalizer()
+    pipeline.slice_functions = True
+
+    executable = pipeline.compile_and_disassemble(source_filename)
+
+    raw_disassembly = read_whole_file(pipeline.get_raw_disassembly_path(executable))
+    assert read_whole_file(pipeline.get_disassembly_path(executable)) == \
+            DisassemblyNormalizer().normalize(raw_disassembly)
+    function, = load_functions(pipeline.get_functions_path(executable))
+    assert function.instructions[0] == "  push %rbp"
+
+    report = pipeline.normalization_report()
+    assert list(report['task']) == [executable]
+    assert (report['normalized_tokens'] < report['raw_tokens']).all()
+
+def test_changing_normalizer_redoes_disassembly(tmp_path):
+    pipeline = create_resumable_pipeline(tmp_path, None)
+    pipeline.normalizer = DisassemblyNormalizer()
+    executable = pipeline.compile_and_disassemble(source_filename)
+
+    pipeline.normalizer = DisassemblyNormalizer(strip_bytes=False)
+    pipeline.disassemble(executable)
+
+    assert pipeline.disassembler.disassemble.call_count == 2
+    assert '48 89 e5' in read_whole_file(pipeline.get_disassembly_path(executable))
+
+def test_artifacts_pass_disassembly_in_memory(tmp_path):
+    predictor = create_mock_predictor('test')
+    pipeline = create_resumable_pipeline(tmp_path, [predictor])
+    pipeline.disassembler = spy_on(ObjdumpDisassembler(subprocess), 'disassemble', 'disassemble_text')
+    pipeline.artifacts = ArtifactStore()
+    run_serial(pipeline)
+
+    build_path = pipeline.get_build_path(executable_filename)
+    disassembly_path = pipeline.get_disassembly_path(executable_filename)
+    pipeline.disassembler.disassemble.assert_not_called()
+    pipeline.disassembler.disassemble_text.assert_called_once_with(build_path)
+    predictor.generate_prediction.assert_called_once_with(build_path, disassembly_path)
+    disassembly = pipeline.artifacts.read(disassembly_path)
+    pipeline.artifacts.close()
+
+    assert read_whole_file(disassembly_path) == disassembly
+    assert read_whole_file(pipeline.get_prediction_path(predictor, executable_filename)) == \
+            mock_prediction_expected_result
+
+    # The manifest does not depend on where the stages read their inputs,
+    # a run without the artifact store finds everything current
+    pipeline.artifacts = None
+    reset_spies(pipeline, predictor)
+    run_serial(pipeline)
+    pipeline.disassembler.disassemble.assert_not_called()
+    predictor.generate_prediction.assert_not_called()
+
+def test_artifacts_stage_not_recorded_before_write(tmp_path, monkeypatch):
+    def fail_write(path, text):
+        raise OSError("disk full")
+    monkeypatch.setattr('src.artifacts.write_file', fail_write)
+    pipeline = create_resumable_pipeline(tmp_path, None)
+    pipeline.artifacts = ArtifactStore()
+    # Left over from an earlier run, the manifest must not vouch for it
+    with open(pipeline.get_disassembly_path(executable_filename), 'w') as file:
+        file.write("stale")
+
+    executable = pipeline.compile_and_disassemble(source_filename)
+    with pytest.raises(OSError):
+        pipeline.artifacts.close()
+
+    # The new disassembly never reached the disk, a resume redoes it
+    assert pipeline.is_stage_current(executable, 'compile', pipeline.compile_inputs(source_filename))
+    assert not pipeline.is_stage_current(executable, 'disassemble', pipeline.disassemble_inputs(executable))
+
+def test_artifacts_normalize_in_memory(tmp_path):
+    pipeline = create_resumable_pipeline(tmp_path, None)
+    pipeline.normalizer = DisassemblyNormalizer()
+    pipeline.artifacts = ArtifactStore(persist=False)
+
+    executable = pipeline.compile_and_disassemble(source_filename)
+
+    raw_disassembly = pipeline.artifacts.read(pipeline.get_raw_disassembly_path(executable))
+    assert pipeline.artifacts.read(pipeline.get_disassembly_path(executable)) == \
+            DisassemblyNormalizer().normalize(raw_disassembly)
+    assert not os.path.exists(pipeline.get_disassembly_path(executable))
+    assert list(pipeline.normalization_report()['task']) == [executable]
+
 def str_contains_word(string, word):
     return re.search(r'\b' + word + r'\b', string) is not None
 
 def is_stripped(file_type):
     return "not stripped" not in file_type and str_contains_word(file_type, "stripped")
+
+def test_evaluate_execution_tests_every_prediction_file(tmp_path):
+    predictors = [create_mock_predictor('a'), create_mock_predictor('b')]
+    pipeline = create_stored_pipeline(tmp_path, predictors)
+    pipeline.execution_evaluator = ExecutionEvaluator(subprocess, os.path.join(tmp_path, "tests"))
+    pipeline.execution_evaluator.run_tests = MagicMock(side_effect=lambda tests: [
+        {'compiles': True, 'passes': predictor_path.endswith(f'a_{executable_filename}.c'), 'status': 'passed'}
+        for predictor_path, _ in tests])
+    pipeline.generate_prediction(executable_filename, predictors[0])
+    pipeline.generate_prediction(executable_filename, predictors[1])
+
+    samples, results = pipeline.evaluate_execution()
+
+    pipeline.execution_evaluator.run_tests.assert_called_once_with([
+        (pipeline.get_prediction_path(predictors[0], executable_filename), executable_filename),
+        (pipeline.get_prediction_path(predictors[1], executable_filename), executable_filename),
+    ])
+    assert list(samples['a'].index) == [executable_filename]
+    assert samples['a'].loc[executable_filename, 'passes']
+    assert not samples['b'].loc[executable_filename, 'passes']
+    assert results['a'] == {'tested': 1, 'compile_rate': 1.0, 'pass_rate': 1.0}
+    assert results['b']['pass_rate'] == 0.0
+    assert pipeline.result_store.latest('execution_rates', 'b', corpus=True) == {None: results['b']}
+    assert pipeline.result_store.latest('execution', 'a')[executable_filename]['passes']
+
+def test_dataset_sources_are_written_for_selected_tasks(tmp_path):
+    dataset = Dataset(os.path.join(tmp_path, "dataset.sqlite"))
+    source_code = read_whole_file(os.path.join("sources/small_test/", source_filename))
+    dataset.add([
+        DatasetRecord("task_000_O0", 0, "O0", source_code, "int main() { return 0; }"),
+        DatasetRecord("task_000_O1", 0, "O1", source_code),
+    ])
+    data_path = os.path.join(tmp_path, "data")
+    pipeline = Pipeline(GCCCompiler(subprocess), ObjdumpDisassembler(subprocess), [], MagicMock(),
+                        data_path=data_path, dataset=dataset.select(opt_levels=["O0"]))
+    pipeline.init_folders()
+
+    assert pipeline.get_sources() == ["task_000_O0.c"]
+    assert pipeline.sources_path == os.path.join(data_path, "sources")
+    assert os.listdir(pipeline.sources_path) == ["task_000_O0.c"]
+    assert read_whole_file(os.path.join(pipeline.tests_path, "task_000_O0.c")) == "int main() { return 0; }"
+
+    executable = pipeline.compile_and_disassemble("task_000_O0.c")
+    assert os.path.exists(pipeline.get_disassembly_path(executable))
+
+    pipeline.clean()
+    assert not os.path.exists(pipeline.sources_path)
+    assert not os.path.exists(pipeline.tests_path)
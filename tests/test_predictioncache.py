@@ -0,0 +1,52 @@
+import os
+from src.predictioncache import PredictionCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+def test_get_missing_key(tmp_path):
+    cache = PredictionCache(os.path.join(tmp_path, "cache.sqlite"))
+
+    assert cache.get("missing") is None
+    assert cache.misses == 1
+    assert cache.hits == 0
+
+def test_put_and_get(tmp_path):
+    cache = PredictionCache(os.path.join(tmp_path, "cache.sqlite"))
+
+    cache.put("key", "int main() {}")
+
+    assert cache.get("key") == "int main() {}"
+    assert cache.hits == 1
+    assert cache.misses == 0
+
+def test_persists_between_instances(tmp_path):
+    db_path = os.path.join(tmp_path, "nested", "cache.sqlite")
+    cache = PredictionCache(db_path)
+    cache.put("key", "prediction")
+    cache.close()
+
+    reopened = PredictionCache(db_path)
+
+    assert reopened.get("key") == "prediction"
+    assert len(reopened) == 1
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = PredictionCache(os.path.join(tmp_path, "cache.sqlite"), max_size_bytes=30, clock=FakeClock())
+
+    cache.put("a", "a" * 10)
+    cache.put("b", "b" * 10)
+    cache.put("c", "c" * 10)
+    cache.get("a")
+    cache.put("d", "d" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" * 10
+    assert cache.get("c") == "c" * 10
+    assert cache.get("d") == "d" * 10
+    assert cache.size() <= 30
@@ -1,4 +1,5 @@
 import os
+import pytest
 import subprocess
 from src.predictor.r2decompilepredictor import R2DecompilePredictor
 from src.r2runner import R2Runner
@@ -16,9 +17,32 @@ def test_generate_prediction():
 
     prediction = decompiler.generate_prediction(executable_path, "not/used")
 
-    mock_r2_runner.run_str.assert_called_once_with("aaa;pdg", executable_path)
+    mock_r2_runner.run_str.assert_called_once_with("aaa;pdg", executable_path, check=True)
     assert prediction == expected_prediction, f"Unexpected prediction: {prediction}"
 
+def test_generate_prediction_raises_when_r2_fails():
+    mock_subprocess = MagicMock()
+    mock_subprocess.CalledProcessError = subprocess.CalledProcessError
+    mock_subprocess.run.return_value = MagicMock(returncode=1, stdout="partial", stderr="Segmentation fault")
+    decompiler = R2DecompilePredictor(R2Runner(mock_subprocess))
+
+    with pytest.raises(subprocess.CalledProcessError):
+        decompiler.generate_prediction("/path/to/executable", "not/used")
+
+def test_cache_key(tmp_path):
+    binary_path = os.path.join(tmp_path, "binary")
+    with open(binary_path, 'wb') as file:
+        file.write(b"first")
+    decompiler = R2DecompilePredictor(MagicMock())
+
+    first_key = decompiler.cache_key(binary_path, "not/used")
+    with open(binary_path, 'wb') as file:
+        file.write(b"second")
+    second_key = decompiler.cache_key(binary_path, "not/used")
+
+    assert first_key.startswith("R2_decompile|aaa;pdg|")
+    assert first_key != second_key
+
 def test_generate_prediction_integration(tmp_path):
     decompiler = R2DecompilePredictor(R2Runner(subprocess))
 
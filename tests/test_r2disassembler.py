@@ -1,5 +1,6 @@
 import os
 import subprocess
+from src.disassembler.disassembledfunction import load_functions
 from src.disassembler.r2disassembler import R2Disassembler
 from src.r2runner import R2Runner
 from unittest.mock import MagicMock
@@ -18,6 +19,28 @@ def test_disassemble_calls_runner():
             test_sample_path,
             output_path)
 
+def test_disassemble_text_checks_runner():
+    mock_r2_runner = MagicMock()
+    mock_r2_runner.run_str.return_value = ("0x40  55  push rbp\n", "")
+    disassembler = R2Disassembler(mock_r2_runner)
+
+    assert disassembler.disassemble_text(test_sample_path) == "0x40  55  push rbp\n"
+    mock_r2_runner.run_str.assert_called_once_with('pd', test_sample_path, check=True)
+
+def test_disassemble_functions_calls_runner(tmp_path):
+    mock_r2_runner = MagicMock()
+    mock_r2_runner.run_str.return_value = (
+            '{"name":"sym.print_hello","addr":64,"size":26,"ops":[{"offset":64,"bytes":"55","disasm":"push rbp"}]}\n', '')
+    output_path = os.path.join(tmp_path, 'r2_f.json')
+    disassembler = R2Disassembler(mock_r2_runner)
+
+    disassembler.disassemble_functions(test_sample_path, output_path)
+
+    mock_r2_runner.run_str.assert_called_once_with('aa;pdfj @@F', test_sample_path)
+    function, = load_functions(output_path)
+    assert function.name == "sym.print_hello"
+    assert function.instructions == ["0x40  55  push rbp"]
+
 def test_disassemble_integration(tmp_path):
     output_path = os.path.join(tmp_path, 'r2_out.txt')
     disassembler = R2Disassembler(R2Runner(subprocess))
@@ -2,7 +2,7 @@ import os
 import pytest
 import subprocess
 from unittest.mock import MagicMock, call, mock_open, patch
-from src.r2runner import R2Runner
+from src.r2runner import R2Runner, R2Session, R2SessionPool
 
 command = "aaa"
 test_sample_path = "tests/sample.o"
@@ -81,3 +81,141 @@ def test_r2_run_str():
 
     assert result == mock_result.stdout, f"Unexpected result: {result}"
     assert error == mock_result.stderr, f"Unexpected error: {result}"
+
+def test_r2_run_str_check():
+    mock_subprocess = MagicMock()
+    mock_subprocess.CalledProcessError = subprocess.CalledProcessError
+    mock_subprocess.run.return_value = MagicMock(returncode=1, stdout="", stderr="Cannot open file")
+    r2_runner = R2Runner(mock_subprocess)
+
+    assert r2_runner.run_str(command, test_sample_path) == ("", "Cannot open file")
+    with pytest.raises(subprocess.CalledProcessError):
+        r2_runner.run_str(command, test_sample_path, check=True)
+
+class FakeR2Process:
+    def __init__(self, args, **kwargs):
+        self.args = args
+        self.commands = []
+        self.pending = bytearray(b'\x00')
+        self.stdin = MagicMock()
+        self.stdin.write.side_effect = self.write
+        self.stdout = MagicMock()
+        self.stdout.read1.side_effect = self.read1
+        self.wait = MagicMock()
+
+    def write(self, data):
+        command = data.decode().strip()
+        self.commands.append(command)
+        if command != 'q!!':
+            self.pending.extend(f"output of {command}\n".encode() + b'\x00')
+
+    def read1(self, size):
+        # Hand out small chunks to exercise reading until the null terminator
+        chunk = bytes(self.pending[:3])
+        del self.pending[:3]
+        return chunk
+
+def create_session_subprocess():
+    mock_subprocess = MagicMock()
+    mock_subprocess.Popen.side_effect = FakeR2Process
+    return mock_subprocess
+
+def test_r2_session_runs_commands_in_one_process(tmp_path):
+    mock_subprocess = create_session_subprocess()
+    r2_runner = R2Runner(mock_subprocess, session_pool=R2SessionPool(mock_subprocess))
+    out_path = os.path.join(tmp_path, "test_out.txt")
+
+    r2_runner.run('pd', test_sample_path, out_path)
+    result, error = r2_runner.run_str('aaa;pdg', test_sample_path)
+
+    mock_subprocess.Popen.assert_called_once_with(
+            ['radare2', '-q0', test_sample_path],
+            stdin=mock_subprocess.PIPE,
+            stdout=mock_subprocess.PIPE,
+            stderr=mock_subprocess.DEVNULL)
+    mock_subprocess.run.assert_not_called()
+    with open(out_path) as file:
+        assert file.read() == "output of pd\n"
+    assert result == "output of aaa;pdg\n"
+    assert error == ''
+
+def test_r2_session_analyses_once():
+    mock_subprocess = create_session_subprocess()
+    r2_runner = R2Runner(mock_subprocess, session_pool=R2SessionPool(mock_subprocess))
+
+    r2_runner.run_str('aaa;pdg', test_sample_path)
+    r2_runner.run_str('aaa;pdg', test_sample_path)
+    r2_runner.run_str('aa;afl', test_sample_path)
+    result, _ = r2_runner.run_str('aaa', test_sample_path)
+
+    session = r2_runner.session_pool.sessions[next(iter(r2_runner.session_pool.sessions))]
+    assert session.process.commands == ['aaa;pdg', 'pdg', 'afl']
+    assert result == ''
+
+def test_r2_session_pool_evicts_least_recently_used(tmp_path):
+    mock_subprocess = create_session_subprocess()
+    pool = R2SessionPool(mock_subprocess, max_sessions=2)
+    binaries = []
+    for name in ['a', 'b', 'c']:
+        binary = os.path.join(tmp_path, name)
+        with open(binary, 'w') as file:
+            file.write(name)
+        binaries.append(binary)
+
+    for binary in binaries:
+        with pool.session(binary) as session:
+            session.cmd('pd')
+    with pool.session(binaries[2]) as session:
+        session.cmd('pd')
+
+    assert len(pool) == 2
+    assert mock_subprocess.Popen.call_count == 3
+    open_paths = [session.executable_path for session in pool.sessions.values()]
+    assert open_paths == binaries[1:]
+
+def test_r2_session_pool_reopens_rebuilt_binary(tmp_path):
+    mock_subprocess = create_session_subprocess()
+    pool = R2SessionPool(mock_subprocess)
+    binary = os.path.join(tmp_path, 'binary')
+    with open(binary, 'w') as file:
+        file.write('first build')
+
+    with pool.session(binary) as session:
+        session.cmd('pd')
+    with open(binary, 'w') as file:
+        file.write('second, longer build')
+    with pool.session(binary) as session:
+        session.cmd('pd')
+
+    assert mock_subprocess.Popen.call_count == 2
+
+def test_r2_session_pool_close():
+    mock_subprocess = create_session_subprocess()
+    pool = R2SessionPool(mock_subprocess)
+
+    with pool.session(test_sample_path) as session:
+        session.cmd('pd')
+    process = session.process
+    pool.close()
+
+    assert process.commands[-1] == 'q!!'
+    process.wait.assert_called_once()
+    assert len(pool) == 0
+
+def test_r2_session_exited():
+    mock_subprocess = MagicMock()
+    process = mock_subprocess.Popen.return_value
+    process.stdout.read1.return_value = b''
+
+    with pytest.raises(RuntimeError):
+        R2Session(mock_subprocess, 'radare2', test_sample_path)
+
+def test_r2_session_integration():
+    session_runner = R2Runner(subprocess, session_pool=R2SessionPool(subprocess))
+    process_runner = R2Runner(subprocess)
+
+    session_result, _ = session_runner.run_str('pd 10', test_sample_path)
+    process_result, _ = process_runner.run_str('pd 10', test_sample_path)
+    session_runner.close()
+
+    assert session_result == process_result
@@ -0,0 +1,85 @@
+import os
+import pytest
+from codebleu import calc_codebleu
+from src.evaluator.codebleuevaluator import CodeBleuEvaluator
+from src.evaluator.codebleustatistics import CodeAnalyser
+from src.evaluator.parallelcodebleuevaluator import ParallelCodeBleuEvaluator
+from src.evaluator.referencecache import ReferenceCache
+from src.util import read_whole_file
+from unittest.mock import MagicMock
+
+test_sample_path = "tests/data"
+
+def read_lines(filename):
+    return read_whole_file(os.path.join(test_sample_path, filename)).splitlines()
+
+def count_cache_files(cache_path):
+    return sum(len(files) for _, _, files in os.walk(cache_path))
+
+def test_analyse_reference_once():
+    analyser = MagicMock(wraps=CodeAnalyser())
+    analyser.lang = "c"
+    analyser.tokenizer = str.split
+    cache = ReferenceCache()
+
+    first = cache.analyse(analyser, "int main() { return 0; }")
+    second = cache.analyse(analyser, "int main() { return 0; }")
+
+    assert first is second
+    analyser.analyse.assert_called_once_with("int main() { return 0; }")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_persists_between_instances(tmp_path):
+    cache_path = os.path.join(tmp_path, "codebleu")
+    analyser = CodeAnalyser()
+    ReferenceCache(cache_path).analyse(analyser, "int main() { return 0; }")
+    assert count_cache_files(cache_path) == 1
+
+    cache = ReferenceCache(cache_path)
+    mock_analyser = MagicMock(lang="c", tokenizer=str.split)
+    analysis = cache.analyse(mock_analyser, "int main() { return 0; }")
+
+    mock_analyser.analyse.assert_not_called()
+    assert analysis.length == 6
+    assert cache.hits == 1
+
+def test_damaged_entry_is_analysed_again(tmp_path):
+    cache_path = os.path.join(tmp_path, "codebleu")
+    analyser = CodeAnalyser()
+    cache = ReferenceCache(cache_path)
+    key = cache.key(analyser, "int a;")
+    os.makedirs(os.path.dirname(cache.get_file_path(key)))
+    with open(cache.get_file_path(key), 'wb') as file:
+        file.write(b"not a pickle")
+
+    analysis = cache.analyse(analyser, "int a;")
+
+    assert analysis.length == 2
+    assert cache.misses == 1
+
+def test_key_depends_on_language_and_tokenizer():
+    cache = ReferenceCache()
+    c_analyser = MagicMock(lang="c", tokenizer=str.split)
+    java_analyser = MagicMock(lang="java", tokenizer=str.split)
+    custom_analyser = MagicMock(lang="c", tokenizer=lambda code: list(code))
+
+    keys = {cache.key(analyser, "int a;") for analyser in [c_analyser, java_analyser, custom_analyser]}
+
+    assert len(keys) == 3
+
+@pytest.mark.parametrize("evaluator_class", [CodeBleuEvaluator, ParallelCodeBleuEvaluator])
+def test_evaluator_with_reference_cache(tmp_path, evaluator_class):
+    references = read_lines('references.txt')
+    predictions = read_lines('r2_predictions.txt')
+    cache_path = os.path.join(tmp_path, "codebleu")
+    evaluator = evaluator_class(calc_codebleu, reference_cache=ReferenceCache(cache_path))
+
+    try:
+        first = evaluator.evaluate_samples(references, predictions)
+        second = evaluator.evaluate_samples(references, references)
+    finally:
+        evaluator.close()
+
+    assert first.equals(CodeBleuEvaluator(calc_codebleu).evaluate_samples(references, predictions))
+    assert evaluator.corpus_scores(second)['codebleu'] == pytest.approx(1.0)
+    assert count_cache_files(cache_path) == len(references)
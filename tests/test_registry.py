@@ -0,0 +1,30 @@
+import json
+import pytest
+import subprocess
+import sys
+from src.disassembler.objdumpdisassembler import ObjdumpDisassembler
+from src.registry import Registry, registry
+
+def test_load_imports_registered_component():
+    components = Registry()
+    components.register('disassembler', 'objdump', 'src.disassembler.objdumpdisassembler:ObjdumpDisassembler')
+
+    assert components.names('disassembler') == ['objdump']
+    assert components.load('disassembler', 'objdump') is ObjdumpDisassembler
+
+def test_load_unknown_component_lists_names():
+    with pytest.raises(ValueError, match="Unknown disassembler ghidra, expected one of: objdump, r2"):
+        registry.load('disassembler', 'ghidra')
+
+def test_every_component_can_be_loaded():
+    for kind, components in registry.components.items():
+        for name in components:
+            assert callable(registry.load(kind, name))
+
+def test_main_does_not_import_heavy_dependencies():
+    # A fresh interpreter, the test run itself has most of them loaded already
+    heavy = ['codebleu', 'matplotlib', 'openai', 'pandas', 'tabulate', 'tree_sitter']
+    result = subprocess.run(
+            [sys.executable, '-c', f'import json, sys, main; print(json.dumps([m for m in {heavy!r} if m in sys.modules]))'],
+            stdout=subprocess.PIPE, text=True, check=True)
+    assert json.loads(result.stdout) == []
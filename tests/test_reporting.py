@@ -0,0 +1,81 @@
+import pytest
+import pandas as pd
+import pickle
+from unittest.mock import patch
+from src.reporting import codebleu_create_graph, codebleu_create_latex_table, load_results, write_samples
+from src.resultstore import ResultStore
+
+@pytest.mark.parametrize("show_plot", [
+    (True),
+    (False)
+])
+def test_codebleu_create_graph(tmp_path, show_plot):
+    # Create sample data and save it as a pickle file
+    data = {
+        'LLM': {'Metric1': 0.9, 'Metric2': 0.85, 'Metric3': 0.88},
+        'R2': {'Metric1': 0.92, 'Metric2': 0.87, 'Metric3': 0.89}
+    }
+    pkl_file_path = tmp_path / "results.pkl"
+    with open(pkl_file_path, 'wb') as f:
+        pickle.dump(data, f)
+
+    png_file_path = tmp_path / "results.png"
+
+    # Use patch to mock plt.show() during the test
+    with patch("matplotlib.pyplot.show") as mock_show:
+        codebleu_create_graph(pkl_file_path, png_file_path, show_plot=show_plot)
+
+        if show_plot:
+            mock_show.assert_called_once()
+        else:
+            mock_show.assert_not_called()
+
+    assert png_file_path.exists()
+    assert png_file_path.is_file()
+
+def test_load_results_from_result_store(tmp_path):
+    store = ResultStore(tmp_path / "results.jsonl")
+    store.append("task", "LLM", scores={'Metric1': 0.1})
+    store.append(None, "LLM", scores={'Metric1': 0.9, 'Metric2': 0.85})
+    store.append(None, "R2", scores={'Metric1': 0.92, 'Metric2': 0.87})
+
+    assert load_results(tmp_path / "results.jsonl") == {
+        'LLM': {'Metric1': 0.9, 'Metric2': 0.85},
+        'R2': {'Metric1': 0.92, 'Metric2': 0.87}
+    }
+
+    codebleu_create_graph(tmp_path / "results.jsonl", tmp_path / "results.png")
+    assert (tmp_path / "results.png").is_file()
+
+def test_codebleu_create_latex_table(tmp_path):
+    eval_path = tmp_path
+    results = {
+        'LLM': {'Metric1': 0.9, 'Metric2': 0.85, 'Metric3': 0.88},
+        'R2': {'Metric1': 0.92, 'Metric2': 0.87, 'Metric3': 0.89}
+    }
+    headers = ["Metric"] + list(results.keys())
+    filename = "results.tex"
+    latex_file_path = eval_path / filename
+
+    codebleu_create_latex_table(latex_file_path, results, headers)
+
+    assert latex_file_path.exists()
+    assert latex_file_path.is_file()
+
+    with open(latex_file_path, 'r') as f:
+        latex_content = f.read()
+        assert "Metric" in latex_content
+        assert "LLM" in latex_content
+        assert "R2" in latex_content
+
+def test_write_samples_has_one_row_per_predictor_and_task(tmp_path):
+    samples = {
+        'LLM': pd.DataFrame({'codebleu': [0.5, 0.25]}, index=['task_a', 'task_b']),
+        'R2': pd.DataFrame({'codebleu': [0.75]}, index=['task_a']),
+    }
+
+    write_samples(samples, tmp_path / "samples.csv")
+
+    table = pd.read_csv(tmp_path / "samples.csv", index_col=['predictor', 'task'])
+    assert list(table.index) == [('LLM', 'task_a'), ('LLM', 'task_b'), ('R2', 'task_a')]
+    assert table.loc[('R2', 'task_a'), 'codebleu'] == 0.75
@@ -0,0 +1,67 @@
+import os
+from src.resultstore import ResultStore
+
+def test_empty_store(tmp_path):
+    store = ResultStore(os.path.join(tmp_path, "results.jsonl"))
+
+    assert list(store.records()) == []
+    assert store.references() == {}
+    assert store.corpus_results() == {}
+    assert len(store.sample_table()) == 0
+
+def test_records_are_written_immediately(tmp_path):
+    path = os.path.join(tmp_path, "results.jsonl")
+    store = ResultStore(path)
+
+    store.append("task", source="int main() {\n  return 0;\n}\n")
+
+    # A second reader sees the record without closing the writer
+    assert ResultStore(path).references() == {"task": "int main() {\n  return 0;\n}\n"}
+
+def test_later_records_replace_earlier_ones(tmp_path):
+    store = ResultStore(os.path.join(tmp_path, "results.jsonl"))
+    store.append("a", "gpt", prediction="first", seconds=1.0)
+    store.append("b", "gpt", prediction="other")
+    store.append("a", "r2", prediction="r2 prediction")
+    store.append("a", "gpt", prediction="second", seconds=2.0)
+
+    assert store.predictions("gpt") == {"a": "second", "b": "other"}
+    assert store.predictions("r2") == {"a": "r2 prediction"}
+    assert store.latest("seconds", "gpt") == {"a": 2.0}
+
+def test_corpus_results_and_sample_table(tmp_path):
+    store = ResultStore(os.path.join(tmp_path, "results.jsonl"))
+    store.append("a", "gpt", scores={"codebleu": 0.5, "syntax_match_score": 0.4})
+    store.append("b", "gpt", scores={"codebleu": 0.7, "syntax_match_score": 0.6})
+    store.append(None, "gpt", scores={"codebleu": 0.6})
+    store.append(None, "r2", scores={"codebleu": 0.2})
+
+    assert store.corpus_results() == {"gpt": {"codebleu": 0.6}, "r2": {"codebleu": 0.2}}
+
+    table = store.sample_table(["codebleu"])
+    assert list(table.columns) == ["codebleu"]
+    assert list(table.index) == [("gpt", "a"), ("gpt", "b")]
+    assert list(table["codebleu"]) == [0.5, 0.7]
+
+def test_truncated_line_is_skipped(tmp_path):
+    path = os.path.join(tmp_path, "results.jsonl")
+    store = ResultStore(path)
+    store.append("a", source="a")
+    store.close()
+    with open(path, 'a') as file:
+        file.write('{"task": "b", "sou')
+
+    store.append("c", source="c")
+
+    assert store.references() == {"a": "a", "c": "c"}
+
+def test_clear(tmp_path):
+    path = os.path.join(tmp_path, "results.jsonl")
+    store = ResultStore(path)
+    store.append("a", source="a")
+
+    store.clear()
+    assert not os.path.exists(path)
+
+    store.append("b", source="b")
+    assert store.references() == {"b": "b"}
@@ -0,0 +1,102 @@
+import os
+import subprocess
+from shutil import copyfile
+from unittest.mock import MagicMock
+from src.compiler.gcccompiler import GCCCompiler
+from src.disassembler.objdumpdisassembler import ObjdumpDisassembler
+from src.manifest import Manifest
+from src.pipeline import Pipeline
+from src.resultstore import ResultStore
+from src.sweep import Sweep, SweepConfiguration
+
+class DisassemblyPredictor:
+    def __init__(self):
+        self.name = 'llm'
+        self.calls = 0
+
+    def generate_prediction(self, binary_path, disassembly_path):
+        self.calls += 1
+        return f'// {os.path.basename(disassembly_path)}'
+
+class BinaryPredictor(DisassemblyPredictor):
+    def __init__(self):
+        super().__init__()
+        self.name = 'decompiler'
+        self.uses_disassembly = False
+
+class NamedDisassembler:
+    # Same output as objdump, with its own name so it counts as another disassembler
+    def __init__(self, name):
+        self.name = name
+        self.objdump = ObjdumpDisassembler(subprocess)
+
+    def disassemble(self, binary_path, output_path):
+        self.objdump.disassemble(binary_path, output_path)
+
+def setup_sweep(tmp_path):
+    sources_path = os.path.join(tmp_path, 'sources')
+    os.makedirs(sources_path)
+    copyfile('sources/small_test/helloworld.c', os.path.join(sources_path, 'helloworld.c'))
+
+    compiler = GCCCompiler(subprocess)
+    compiler.compile = MagicMock(wraps=compiler.compile)
+    predictors = [DisassemblyPredictor(), BinaryPredictor()]
+    evaluate = MagicMock(side_effect=lambda configuration, pipeline: configuration.data_path)
+
+    def create_pipeline(configuration):
+        return Pipeline(
+                compiler=compiler,
+                disassembler=NamedDisassembler(configuration.disassembler),
+                predictors=predictors,
+                evaluator=MagicMock(),
+                sources_path=configuration.sources_path,
+                data_path=configuration.data_path,
+                manifest=Manifest(os.path.join(configuration.data_path, 'manifest.json')),
+                result_store=ResultStore(os.path.join(configuration.data_path, 'results.jsonl')))
+
+    configurations = [
+        SweepConfiguration(sources_path, False, disassembler, os.path.join(tmp_path, f'data_{disassembler}'))
+        for disassembler in ['first', 'second']
+        ]
+    return Sweep(create_pipeline, evaluate, jobs=2), configurations, compiler, predictors, evaluate
+
+def test_build_shares_compile_and_binary_predictions(tmp_path):
+    sweep, configurations, _, _, _ = setup_sweep(tmp_path)
+
+    graph, pipelines = sweep.build(configurations)
+
+    assert len(pipelines) == 2
+    assert sorted(key[0] for key in graph.tasks) == \
+        ['compile', 'disassemble', 'disassemble', 'evaluate', 'evaluate', 'predict', 'predict', 'predict']
+    # The decompiler shares the binary, and with --r2-sessions the radare2
+    # session, with the disassembler of the first configuration
+    decompile_key = ('predict', configurations[0].sources_path, False, 'decompiler')
+    assert graph.dependencies[decompile_key] == [('disassemble', configurations[0].data_path)]
+
+def test_run_compiles_once_and_fills_every_configuration(tmp_path):
+    sweep, configurations, compiler, predictors, evaluate = setup_sweep(tmp_path)
+
+    results = sweep.run(configurations)
+
+    assert results == {configuration.data_path: configuration.data_path for configuration in configurations}
+    assert compiler.compile.call_count == 1
+    assert predictors[0].calls == 2
+    assert predictors[1].calls == 1
+    assert evaluate.call_count == 2
+
+    for configuration in configurations:
+        store = ResultStore(os.path.join(configuration.data_path, 'results.jsonl'))
+        assert store.predictions('llm') == {'helloworld': '// helloworld_d.txt'}
+        assert store.predictions('decompiler') == {'helloworld': '// helloworld_d.txt'}
+        assert os.path.exists(os.path.join(configuration.data_path, 'builds', 'helloworld'))
+        assert os.path.exists(os.path.join(configuration.data_path, 'predictions', 'decompiler_helloworld.c'))
+
+def test_run_resumes_from_manifest(tmp_path):
+    sweep, configurations, compiler, predictors, _ = setup_sweep(tmp_path)
+    sweep.run(configurations)
+
+    sweep.run(configurations)
+
+    assert compiler.compile.call_count == 1
+    assert predictors[0].calls == 2
+    assert predictors[1].calls == 1
@@ -0,0 +1,56 @@
+import pytest
+import threading
+from src.taskgraph import TaskGraph
+
+def test_run_respects_dependencies():
+    graph = TaskGraph()
+    order = []
+    graph.add('a', lambda: order.append('a') or 1)
+    graph.add('b', lambda: order.append('b') or graph.result('a') + 1, ['a'])
+    graph.add('c', lambda: order.append('c') or graph.result('b') + 1, ['b'])
+
+    results = graph.run(jobs=4)
+
+    assert order == ['a', 'b', 'c']
+    assert results == {'a': 1, 'b': 2, 'c': 3}
+
+def test_add_same_key_keeps_first_task():
+    graph = TaskGraph()
+    assert graph.add('a', lambda: 'first') == 'a'
+    assert graph.add('a', lambda: 'second') == 'a'
+
+    assert len(graph) == 1
+    assert graph.run()['a'] == 'first'
+
+def test_add_unknown_dependency():
+    graph = TaskGraph()
+    with pytest.raises(ValueError):
+        graph.add('b', lambda: None, ['a'])
+    assert 'b' not in graph
+
+def test_run_independent_tasks_concurrently():
+    graph = TaskGraph()
+    barrier = threading.Barrier(3, timeout=5)
+    for key in range(3):
+        graph.add(key, barrier.wait)
+
+    # Deadlocks into a BrokenBarrierError unless all three run at once
+    assert len(graph.run(jobs=3)) == 3
+
+def test_run_reports_status():
+    graph = TaskGraph()
+    graph.add('a', lambda: None)
+    graph.add('b', lambda: None, ['a'])
+    done = []
+
+    graph.run(status_callback=done.append)
+
+    assert done == ['a', 'b']
+
+def test_run_raises_task_error():
+    graph = TaskGraph()
+    graph.add('a', lambda: 1 / 0)
+    graph.add('b', lambda: None, ['a'])
+
+    with pytest.raises(ZeroDivisionError):
+        graph.run()
@@ -0,0 +1,114 @@
+import json
+import os
+import pstats
+import subprocess
+import pytest
+from unittest.mock import patch
+from src.tracer import Tracer, percentile
+
+class TokenPredictor:
+    name = "llm"
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def token_usage(self):
+        return self.prompt_tokens, self.completion_tokens
+
+def test_span_records_resources(tmp_path):
+    tracer = Tracer()
+
+    with tracer.span("compile", "hello"):
+        subprocess.run(["true"], check=True)
+        with open(os.path.join(tmp_path, "output"), 'w') as file:
+            file.write("x" * 1000)
+
+    span, = tracer.spans
+    assert span['stage'] == "compile"
+    assert span['item'] == "hello"
+    assert span['predictor'] is None
+    assert span['wall_seconds'] > 0
+    assert span['children_cpu_seconds'] >= 0
+    assert span['bytes_written'] is None or span['bytes_written'] >= 1000
+    assert span['prompt_tokens'] is None
+
+def test_span_records_child_rss_only_when_peak_rises():
+    tracer = Tracer()
+
+    with patch('src.tracer.children_max_rss_kb', side_effect=[1024, 4096, 4096, 4096]):
+        with tracer.span("compile", "large"):
+            pass
+        with tracer.span("compile", "small"):
+            pass
+
+    assert [span['children_peak_rss_kb'] for span in tracer.spans] == [4096, None]
+    row, = tracer.summary()
+    assert row[8] == 4
+
+def test_span_records_token_usage():
+    tracer = Tracer()
+    predictor = TokenPredictor()
+    predictor.prompt_tokens = 5
+
+    with tracer.span("predict", "hello", predictor):
+        predictor.prompt_tokens += 100
+        predictor.completion_tokens += 20
+
+    span, = tracer.spans
+    assert span['predictor'] == "llm"
+    assert (span['prompt_tokens'], span['completion_tokens']) == (100, 20)
+
+def test_span_is_recorded_when_stage_fails():
+    tracer = Tracer()
+
+    with pytest.raises(RuntimeError):
+        with tracer.span("disassemble"):
+            raise RuntimeError("objdump failed")
+
+    assert [span['stage'] for span in tracer.spans] == ["disassemble"]
+
+def test_percentile():
+    values = [5, 1, 4, 2, 3]
+
+    assert percentile(values, 0.5) == 3
+    assert percentile(values, 0.95) == 5
+    assert percentile([7], 0.95) == 7
+
+def test_summary_groups_by_stage_and_predictor():
+    tracer = Tracer()
+    predictor = TokenPredictor()
+    for _ in range(3):
+        with tracer.span("predict", predictor=predictor):
+            predictor.prompt_tokens += 10
+    with tracer.span("compile"):
+        pass
+
+    rows = {(row[0], row[1]): row for row in tracer.summary()}
+
+    assert rows[("predict", "llm")][2] == 3
+    assert rows[("predict", "llm")][9] == 30
+    assert rows[("compile", "")][2] == 1
+
+def test_write_trace_and_profiles(tmp_path):
+    trace_path = os.path.join(tmp_path, "trace.json")
+    profile_path = os.path.join(tmp_path, "profiles")
+    tracer = Tracer(trace_path, profile_path)
+
+    for _ in range(2):
+        with tracer.span("evaluate"):
+            sorted(range(1000), key=lambda value: -value)
+            # Nested spans are traced but only the outer one is profiled
+            with tracer.span("inner"):
+                pass
+
+    tracer.write()
+
+    with open(trace_path) as file:
+        events = json.load(file)['traceEvents']
+    assert [event['name'] for event in events] == ["inner", "evaluate", "inner", "evaluate"]
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events)
+
+    assert os.listdir(profile_path) == ["evaluate.prof"]
+    stats = pstats.Stats(os.path.join(profile_path, "evaluate.prof"))
+    assert any(function[2] == "<lambda>" for function in stats.stats)
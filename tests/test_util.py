@@ -1,9 +1,6 @@
 import os
 import pytest
-import pandas as pd
-import pickle
-from unittest.mock import patch
-from src.util import create_folder_if_not_exists, read_whole_file, codebleu_create_graph, codebleu_create_latex_table
+from src.util import create_folder_if_not_exists, read_whole_file, hash_text, hash_file
 
 def test_create_folder_if_not_exists(tmp_path):
     test_folder = tmp_path / "test_folder"
@@ -18,51 +15,8 @@ def test_read_whole_file(tmp_path):
     read_content = read_whole_file(test_file)
     assert read_content == test_content
 
-@pytest.mark.parametrize("show_plot", [
-    (True),
-    (False)
-])
-def test_codebleu_create_graph(tmp_path, show_plot):
-    # Create sample data and save it as a pickle file
-    data = {
-        'LLM': {'Metric1': 0.9, 'Metric2': 0.85, 'Metric3': 0.88},
-        'R2': {'Metric1': 0.92, 'Metric2': 0.87, 'Metric3': 0.89}
-    }
-    pkl_file_path = tmp_path / "results.pkl"
-    with open(pkl_file_path, 'wb') as f:
-        pickle.dump(data, f)
-
-    png_file_path = tmp_path / "results.png"
-
-    # Use patch to mock plt.show() during the test
-    with patch("matplotlib.pyplot.show") as mock_show:
-        codebleu_create_graph(pkl_file_path, png_file_path, show_plot=show_plot)
-
-        if show_plot:
-            mock_show.assert_called_once()
-        else:
-            mock_show.assert_not_called()
-
-    assert png_file_path.exists()
-    assert png_file_path.is_file()
-
-def test_codebleu_create_latex_table(tmp_path):
-    eval_path = tmp_path
-    results = {
-        'LLM': {'Metric1': 0.9, 'Metric2': 0.85, 'Metric3': 0.88},
-        'R2': {'Metric1': 0.92, 'Metric2': 0.87, 'Metric3': 0.89}
-    }
-    headers = ["Metric"] + list(results.keys())
-    filename = "results.tex"
-    latex_file_path = eval_path / filename
-
-    codebleu_create_latex_table(latex_file_path, results, headers)
-
-    assert latex_file_path.exists()
-    assert latex_file_path.is_file()
-
-    with open(latex_file_path, 'r') as f:
-        latex_content = f.read()
-        assert "Metric" in latex_content
-        assert "LLM" in latex_content
-        assert "R2" in latex_content
+def test_hash_file_matches_hash_text(tmp_path):
+    test_file = tmp_path / "test_file.txt"
+    test_file.write_text("Hello, world!")
+    assert hash_file(test_file) == hash_text("Hello, world!")
+    assert hash_text("Hello, world!") != hash_text("Hello, world")
@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+import pytest
+from src.workqueue import WorkQueue, Worker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=10, max_attempts=2, clock=clock)
+    yield queue
+    queue.close()
+
+def test_lease_in_order_and_complete(queue):
+    queue.enqueue("a", "kind", {"value": 1})
+    queue.enqueue("b", "kind", {"value": 2})
+
+    task = queue.lease("worker")
+    assert (task.key, task.kind, task.payload, task.attempts) == ("a", "kind", {"value": 1}, 1)
+    assert queue.lease("worker").key == "b"
+    assert queue.lease("worker") is None
+
+    assert queue.complete("a", "worker", {"result": 1})
+    assert queue.results() == {"a": {"result": 1}}
+    assert queue.counts() == {"done": 1, "leased": 1}
+    assert not queue.is_finished()
+
+def test_dependency_waits_until_done(queue):
+    queue.enqueue("prepare", "prepare", {})
+    queue.enqueue("predict", "predict", {}, "prepare")
+
+    assert queue.lease("worker").key == "prepare"
+    assert queue.lease("other") is None
+
+    queue.complete("prepare", "worker", None)
+    assert queue.lease("other").key == "predict"
+
+def test_failed_task_is_retried_then_fails_dependents(queue):
+    queue.enqueue("prepare", "prepare", {})
+    queue.enqueue("predict", "predict", {}, "prepare")
+
+    assert queue.fail(queue.lease("worker").key, "worker", "first")
+    task = queue.lease("worker")
+    assert task.attempts == 2
+    queue.fail(task.key, "worker", "second")
+
+    assert queue.lease("worker") is None
+    assert queue.failures() == {"prepare": "second", "predict": "dependency prepare failed"}
+    assert queue.is_finished()
+
+def test_expired_lease_goes_to_next_worker(queue, clock):
+    queue.enqueue("a", "kind", {})
+    queue.lease("dead")
+
+    clock.now += 5
+    assert queue.heartbeat("a", "dead")
+    clock.now += 9
+    assert queue.lease("alive") is None
+    clock.now += 5
+    task = queue.lease("alive")
+
+    assert task.key == "a"
+    assert task.attempts == 2
+    # The first worker lost the task, its late result is ignored
+    assert not queue.complete("a", "dead", "late")
+    assert not queue.heartbeat("a", "dead")
+    assert queue.complete("a", "alive", "result")
+    assert queue.results() == {"a": "result"}
+
+def test_config_and_clear(queue):
+    queue.put_config({"models": ["a", "b"]})
+    queue.enqueue("a", "kind", {})
+
+    assert queue.get_config() == {"models": ["a", "b"]}
+    queue.clear()
+    assert queue.get_config() is None
+    assert queue.counts() == {}
+
+def test_worker_retries_failing_handler(queue):
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("flaky")
+        return payload["value"] * 2
+
+    queue.enqueue("a", "double", {"value": 21})
+    worker = Worker(queue, {"double": flaky}, "worker", poll_interval=0)
+
+    assert worker.run() == 1
+    assert worker.failed == 1
+    assert queue.results() == {"a": 42}
+
+def square(payload):
+    return {"square": payload["value"] ** 2, "pid": os.getpid()}
+
+def run_worker(path, name):
+    queue = WorkQueue(path)
+    Worker(queue, {"square": square}, name, poll_interval=0.01).run()
+    queue.close()
+
+def test_worker_processes_share_queue(tmp_path):
+    path = str(tmp_path / "queue.sqlite")
+    queue = WorkQueue(path)
+    for value in range(40):
+        queue.enqueue(f"task{value}", "square", {"value": value})
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=run_worker, args=(path, f"worker{index}")) for index in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+
+    results = queue.results()
+    assert all(process.exitcode == 0 for process in processes)
+    assert {key: result["square"] for key, result in results.items()} == \
+        {f"task{value}": value ** 2 for value in range(40)}
+    assert queue.is_finished()